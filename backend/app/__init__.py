@@ -1,15 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers.auth import router as auth_router
-from app.routers.incident import router as incident_router
-from app.routers.userTable import router as users_router
-from app.routers.stats import router as stats_router
 from app import models, database
+from app.utils.fulltext import setup_fulltext
+from app.utils.sort_ranks import setup_sort_ranks
+from app.utils.stats_rollup import backfill_if_empty
+from app.utils.logger import LogContextMiddleware
+from app.utils.metrics import MetricsMiddleware
+from app.utils.sql_trace import SqlTraceMiddleware
+from app.utils import archival
 
 
 models.Base.metadata.create_all(bind=database.engine)
+setup_sort_ranks(database.engine)
+setup_fulltext(database.engine)
+backfill_if_empty(database.engine)
 
-app = FastAPI()
+if database.DB_MODE == "async":
+    from app.routers.aio import auth_router, incident_router, user_router as users_router, stats_router
+else:
+    from app.routers import auth_router, incident_router, user_router as users_router, stats_router
+from app.routers.admin import router as admin_router
+from app.routers.incident_stream import router as incident_stream_router
+from app.routers.metrics import router as metrics_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    archival.start()
+    yield
+    await archival.stop()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
+
+# orjson for every JSON response; list endpoints also skip response validation (see utils/fast_json)
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 
 
@@ -19,10 +46,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
+app.add_middleware(SqlTraceMiddleware)
+app.add_middleware(LogContextMiddleware)
+# outermost, so the timings include the other middleware
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
 
 app.include_router(auth_router)
 app.include_router(incident_router)
+app.include_router(incident_stream_router)
 app.include_router(users_router)
 app.include_router(stats_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
 
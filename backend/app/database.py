@@ -1,14 +1,117 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
+from app.utils.db_pool import TimedQueuePool, TimedAsyncQueuePool
 
 # Load environment variables
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./incident_management.db")
 
-# Create database engine with debug logging
-engine = create_engine(DATABASE_URL, echo=True)
+# "sync" serves requests from the threadpool with Session, "async" from the
+# event loop with AsyncSession (aiosqlite / asyncpg)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+if DB_MODE not in ("sync", "async"):
+    raise RuntimeError("DB_MODE must be 'sync' or 'async'")
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Engine profiles; every value can be overridden with the DB_* / SQLITE_*
+# variable of the same name. dev echoes SQL, prod and bench do not.
+ENGINE_PROFILES = {
+    "dev": {
+        "echo": True, "pool_size": 5, "max_overflow": 10, "pool_timeout": 30,
+        "pool_recycle": -1, "pool_pre_ping": False,
+        "sqlite_journal_mode": "WAL", "sqlite_synchronous": "NORMAL",
+        "sqlite_mmap_size": 0, "sqlite_busy_timeout_ms": 5000,
+    },
+    "prod": {
+        "echo": False, "pool_size": 20, "max_overflow": 10, "pool_timeout": 10,
+        "pool_recycle": 1800, "pool_pre_ping": True,
+        "sqlite_journal_mode": "WAL", "sqlite_synchronous": "NORMAL",
+        "sqlite_mmap_size": 256 * 1024 * 1024, "sqlite_busy_timeout_ms": 5000,
+    },
+    # sized above the request threadpool (40) so checkouts never queue
+    "bench": {
+        "echo": False, "pool_size": 40, "max_overflow": 20, "pool_timeout": 30,
+        "pool_recycle": -1, "pool_pre_ping": False,
+        "sqlite_journal_mode": "WAL", "sqlite_synchronous": "NORMAL",
+        "sqlite_mmap_size": 256 * 1024 * 1024, "sqlite_busy_timeout_ms": 5000,
+    },
+}
+
+DB_PROFILE = os.getenv(
+    "DB_PROFILE", "dev" if os.getenv("ENVIRONMENT", "development") == "development" else "prod"
+).lower()
+if DB_PROFILE not in ENGINE_PROFILES:
+    raise RuntimeError(f"DB_PROFILE must be one of: {', '.join(ENGINE_PROFILES)}")
+
+
+def _setting(name: str, value):
+    raw = os.getenv(name.upper() if name.startswith("sqlite_") else f"DB_{name.upper()}")
+    if raw is None:
+        return value
+    if isinstance(value, bool):
+        return raw.lower() in ("1", "true", "yes", "on")
+    if isinstance(value, int):
+        return int(raw)
+    return raw.upper()
+
+
+engine_settings = {name: _setting(name, value) for name, value in ENGINE_PROFILES[DB_PROFILE].items()}
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    url = make_url(url)
+    options = {"echo": engine_settings["echo"]}
+    if _is_memory_sqlite(url):
+        # a single shared connection, so every thread sees the same database
+        # (the tests run on one); pool sizing does not apply
+        if not is_async:
+            options.update(poolclass=StaticPool, connect_args={"check_same_thread": False})
+        return options
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=engine_settings["pool_size"],
+        max_overflow=engine_settings["max_overflow"],
+        pool_timeout=engine_settings["pool_timeout"],
+        pool_recycle=engine_settings["pool_recycle"],
+        pool_pre_ping=engine_settings["pool_pre_ping"],
+    )
+    return options
+
+
+def configure_sqlite(engine):
+    """Apply the profile's pragmas to every new SQLite connection of engine."""
+    url = engine.url
+    if url.get_backend_name() != "sqlite":
+        return
+    # WAL needs a file; in-memory databases keep their default journal
+    journal_mode = None if _is_memory_sqlite(url) else engine_settings["sqlite_journal_mode"]
+
+    @event.listens_for(getattr(engine, "sync_engine", engine), "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if journal_mode:
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={engine_settings['sqlite_synchronous']}")
+        cursor.execute(f"PRAGMA mmap_size={int(engine_settings['sqlite_mmap_size'])}")
+        cursor.execute(f"PRAGMA busy_timeout={int(engine_settings['sqlite_busy_timeout_ms'])}")
+        cursor.close()
+
+
+# Create database engine
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+configure_sqlite(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -23,3 +126,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_url(url: str) -> str:
+    """Same database as url, through the dialect's asyncio driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# The sync engine is still used for schema setup and scripts in async mode.
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(async_url(DATABASE_URL), **engine_options(DATABASE_URL, is_async=True))
+    configure_sqlite(async_engine)
+    # objects stay readable after commit: the routers return them after committing
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,5 +1,8 @@
 from .user import User
-from .incident import Incident, IncidentPriority, IncidentStatus, IncidentCategory
+from .incident import Incident, IncidentPriority, IncidentStatus, IncidentCategory, IncidentSnapshot, PRIORITY_RANK, STATUS_RANK
+from .incident_stats import IncidentDailyStat
+from .incident_change import IncidentChange
+from .incident_archive import IncidentArchive
 
 
 from app.database import Base
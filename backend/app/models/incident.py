@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Enum as SQLEnum, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Enum as SQLEnum, DateTime, ForeignKey, Index, Computed, text
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.functions import FunctionElement
 from app.database import Base
+from collections import namedtuple
 import enum
 
 class IncidentStatus(str, enum.Enum):
@@ -20,6 +23,61 @@ class IncidentCategory(str, enum.Enum):
     network = "network"
     security = "security"
 
+# list sort order of priorities and statuses, stored as the priority_rank /
+# status_rank generated columns so keyset pages seek and order on an index
+PRIORITY_RANK = {
+    IncidentPriority.low: 1,
+    IncidentPriority.medium: 2,
+    IncidentPriority.high: 3,
+    IncidentPriority.critical: 4,
+}
+STATUS_RANK = {
+    IncidentStatus.open: 1,
+    IncidentStatus.in_progress: 2,
+    IncidentStatus.solved: 3,
+}
+
+
+def rank_expression(column: str, ranks: dict) -> str:
+    whens = " ".join(f"WHEN '{value.value}' THEN {rank}" for value, rank in ranks.items())
+    return f"CASE {column} {whens} ELSE {len(ranks) + 1} END"
+
+
+PRIORITY_RANK_SQL = rank_expression("priority", PRIORITY_RANK)
+STATUS_RANK_SQL = rank_expression("status", STATUS_RANK)
+
+
+class utcnow(FunctionElement):
+    """
+    CURRENT_TIMESTAMP. SQLite stores it as text, so it is written with
+    microseconds in the format SQLAlchemy binds datetimes in: a created_at
+    carried in a cursor then compares equal to the stored value.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+# plain copy of an incident row, taken before a write changes it; the scope
+# fields drive the rollup and cache eviction, the rest is the event payload
+IncidentSnapshot = namedtuple(
+    "IncidentSnapshot",
+    ["id", "category", "status", "priority", "reporter_id", "resolver_id", "created_at",
+     "title", "description", "updated_at"]
+)
+
+def _value(v):
+    return v.value if isinstance(v, enum.Enum) else v
+
 class Incident(Base):
     __tablename__ = "incidents"
 
@@ -37,11 +95,67 @@ class Incident(Base):
         nullable=False
     )
 
-    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=utcnow())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=utcnow(), onupdate=utcnow())
+
+    priority_rank = Column(Integer, Computed(PRIORITY_RANK_SQL, persisted=True), nullable=False)
+    status_rank = Column(Integer, Computed(STATUS_RANK_SQL, persisted=True), nullable=False)
 
     reporter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     resolver_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     reporter = relationship("User", foreign_keys=[reporter_id], backref="reported_incidents")
     resolver = relationship("User", foreign_keys=[resolver_id], backref="resolved_incidents")
+
+    # Access paths of the incident list and /stats queries:
+    #  - (created_at, id) serves the unscoped list and its keyset pagination
+    #  - (<filter>, created_at) serves the status / category / priority filters
+    #  - reporter and resolver scopes carry status so the stats group-bys stay index-only
+    #  - the partial index covers the sector-admin "unassigned in my category" branch
+    #  - (<scope>, <rank>, id) serve the priority and status sorts in every scope
+    __table_args__ = (
+        Index("ix_incidents_created_at_id", "created_at", "id"),
+        Index("ix_incidents_priority_rank_id", "priority_rank", "id"),
+        Index("ix_incidents_status_rank_id", "status_rank", "id"),
+        Index("ix_incidents_reporter_priority_rank_id", "reporter_id", "priority_rank", "id"),
+        Index("ix_incidents_reporter_status_rank_id", "reporter_id", "status_rank", "id"),
+        Index("ix_incidents_resolver_priority_rank_id", "resolver_id", "priority_rank", "id"),
+        Index("ix_incidents_resolver_status_rank_id", "resolver_id", "status_rank", "id"),
+        Index("ix_incidents_status_created_at", "status", "created_at"),
+        Index("ix_incidents_category_created_at", "category", "created_at"),
+        Index("ix_incidents_priority_created_at", "priority", "created_at"),
+        Index("ix_incidents_reporter_created_at", "reporter_id", "created_at", "status"),
+        Index("ix_incidents_resolver_created_at", "resolver_id", "created_at", "status"),
+        Index(
+            "ix_incidents_unassigned_category_created_at", "category", "created_at", "status",
+            sqlite_where=text("resolver_id IS NULL"),
+            postgresql_where=text("resolver_id IS NULL"),
+        ),
+        Index(
+            "ix_incidents_unassigned_category_priority_rank_id", "category", "priority_rank", "id",
+            sqlite_where=text("resolver_id IS NULL"),
+            postgresql_where=text("resolver_id IS NULL"),
+        ),
+        Index(
+            "ix_incidents_unassigned_category_status_rank_id", "category", "status_rank", "id",
+            sqlite_where=text("resolver_id IS NULL"),
+            postgresql_where=text("resolver_id IS NULL"),
+        ),
+    )
+
+    # fetch created_at / updated_at with RETURNING on flush instead of a refresh SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    def snapshot(self) -> IncidentSnapshot:
+        return IncidentSnapshot(
+            id=self.id,
+            category=_value(self.category),
+            status=_value(self.status),
+            priority=_value(self.priority),
+            reporter_id=self.reporter_id,
+            resolver_id=self.resolver_id,
+            created_at=self.created_at,
+            title=self.title,
+            description=self.description,
+            updated_at=self.updated_at,
+        )
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Computed, func
+from app.database import Base
+from app.models.incident import Incident, PRIORITY_RANK_SQL, STATUS_RANK_SQL
+
+_incidents = Incident.__table__
+
+
+class IncidentArchive(Base):
+    """
+    Solved incidents moved out of the incidents table once they are older than
+    ARCHIVE_AFTER_DAYS (see app/utils/archival.py). Rows keep their id and
+    columns; the incident list reads them with include_archived=true, and the
+    /stats rollup still counts them.
+    """
+    __tablename__ = "incidents_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(255), nullable=False)
+    description = Column(String, nullable=False)
+    # the same enum types as incidents, so Postgres reuses them
+    category = Column(_incidents.c.category.type, nullable=False)
+    status = Column(_incidents.c.status.type, nullable=False)
+    priority = Column(_incidents.c.priority.type, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # the union with incidents sorts on them; not indexed here
+    priority_rank = Column(Integer, Computed(PRIORITY_RANK_SQL, persisted=True), nullable=False)
+    status_rank = Column(Integer, Computed(STATUS_RANK_SQL, persisted=True), nullable=False)
+
+    reporter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    resolver_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    # cold data: only the list's default order and the role scopes are indexed
+    __table_args__ = (
+        Index("ix_incidents_archive_created_at_id", "created_at", "id"),
+        Index("ix_incidents_archive_reporter_created_at", "reporter_id", "created_at"),
+        Index("ix_incidents_archive_resolver_created_at", "resolver_id", "created_at"),
+        Index("ix_incidents_archive_category_created_at", "category", "created_at"),
+    )
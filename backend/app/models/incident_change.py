@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
+from app.database import Base
+
+
+class IncidentChange(Base):
+    """
+    Append-only log of incident writes behind GET /incidents/changes. seq is
+    the client's change cursor. Each row carries the scope fields of the
+    incident as of that change, so the feed is filtered like the incident list.
+    A write that moves an incident out of a scope also logs a "delete" in the
+    old scope, and rows past CHANGE_LOG_RETENTION_DAYS are pruned (see
+    app/utils/change_log.py).
+    """
+    __tablename__ = "incident_changes"
+
+    seq = Column(Integer, primary_key=True)
+    incident_id = Column(Integer, nullable=False)
+    op = Column(String(8), nullable=False)  # "upsert" or "delete"
+    category = Column(String(16), nullable=False)
+    reporter_id = Column(Integer, nullable=False)
+    resolver_id = Column(Integer, nullable=True)
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_incident_changes_reporter_seq", "reporter_id", "seq"),
+        Index("ix_incident_changes_resolver_seq", "resolver_id", "seq"),
+        Index("ix_incident_changes_category_seq", "category", "seq"),
+        # seq values are never reused, even after old rows are pruned
+        {"sqlite_autoincrement": True},
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Date, Index
+from app.database import Base
+
+
+class IncidentDailyStat(Base):
+    """
+    Incident counts per creation day and scope, maintained by the incident
+    router in the same transaction as the write (see app/utils/stats_rollup.py).
+    resolver_id is 0 for unassigned incidents so it can be part of the key.
+    """
+    __tablename__ = "incident_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    category = Column(String(16), primary_key=True)
+    status = Column(String(16), primary_key=True)
+    priority = Column(String(16), primary_key=True)
+    reporter_id = Column(Integer, primary_key=True)
+    resolver_id = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_incident_daily_stats_reporter_day", "reporter_id", "day"),
+        Index("ix_incident_daily_stats_resolver_day", "resolver_id", "day"),
+        Index("ix_incident_daily_stats_category_day", "category", "day"),
+    )
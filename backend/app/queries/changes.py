@@ -0,0 +1,101 @@
+from collections import namedtuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, func, and_, bindparam, union_all
+
+from app.models import Incident, IncidentChange
+from app.queries import scope as role_scope
+from app.queries.scope import cached_statement, Scoped
+from app.utils.change_log import UPSERT, DELETE
+
+# GET /incidents/changes: the scoped slice of the change log after a cursor,
+# joined to the current incident rows and collapsed to one entry per incident.
+
+ChangesQuery = namedtuple("ChangesQuery", ["statement", "params", "shape"])
+
+_changes = IncidentChange.__table__
+
+
+def latest_cursor():
+    return select(func.coalesce(func.max(IncidentChange.seq), 0))
+
+
+def oldest_cursor():
+    """The earliest cursor the log can still serve: everything after it is kept."""
+    return select(func.coalesce(func.min(IncidentChange.seq) - 1, 0))
+
+
+def check_cursor(since: int, oldest: int):
+    if since < oldest:
+        # rows after the cursor were pruned; only a full reload is exact
+        raise HTTPException(status_code=410, detail="Cursor is older than the change log; reload the incident list and start from a new cursor")
+
+
+@cached_statement
+def _scope_version_statement(kind: str):
+    # the incident list scope rules, applied to the scope fields logged with each change
+    scoped = role_scope.where(select(func.max(IncidentChange.seq)), kind, _changes.c)
+    # a scope whose rows were all pruned takes the pruning horizon, which only
+    # grows, so the version never goes back to a value it had before
+    return select(func.coalesce(scoped.scalar_subquery(), oldest_cursor().scalar_subquery()))
+
+
+def scope_version(user) -> Scoped:
+    """Seq of the last change in the user's scope; it moves whenever their incident list or stats can change."""
+    scope = role_scope.of(user)
+    return Scoped(_scope_version_statement(scope.kind), role_scope.params(scope))
+
+
+@cached_statement
+def _changes_statement(kind: str):
+    # only join rows the user can still see; anything else is reported as deleted
+    visible = role_scope.condition(kind, Incident.__table__.c)
+    join_on = Incident.id == IncidentChange.incident_id
+    if visible is not None:
+        join_on = and_(join_on, visible)
+
+    after = IncidentChange.seq > bindparam("since", required=True)
+    branches = role_scope.branches(kind, _changes.c)
+    if len(branches) > 1:
+        # each branch reads the next entries off its own (scope, seq) index;
+        # the page is taken from their union rather than sorting the whole scope
+        arms = [
+            select(_changes.c.seq).where(branch, after).order_by(_changes.c.seq).limit(bindparam("limit")).subquery()
+            for branch in branches
+        ]
+        logged = [IncidentChange.seq.in_(union_all(*[select(arm.c.seq) for arm in arms]))]
+    else:
+        logged = [after, *branches]
+
+    return (
+        select(IncidentChange.seq, IncidentChange.op, IncidentChange.incident_id, Incident)
+        .outerjoin(Incident, join_on)
+        .where(*logged)
+        .order_by(IncidentChange.seq)
+        .limit(bindparam("limit"))
+    )
+
+
+def changes_since(user, since: int, limit: int) -> ChangesQuery:
+    scope = role_scope.of(user)
+    params = dict(role_scope.params(scope), since=since, limit=limit + 1)
+
+    def shape(rows):
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        latest = {}
+        for seq, op, incident_id, incident in rows:
+            # re-insert so incidents come out in the order of their last change
+            latest.pop(incident_id, None)
+            latest[incident_id] = incident if op == UPSERT else None
+        return {
+            "changes": [
+                {"op": UPSERT, "id": incident_id, "incident": incident} if incident is not None
+                else {"op": DELETE, "id": incident_id}
+                for incident_id, incident in latest.items()
+            ],
+            "cursor": rows[-1].seq if rows else since,
+            "has_more": has_more,
+        }
+
+    return ChangesQuery(_changes_statement(scope.kind), params, shape)
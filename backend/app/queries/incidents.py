@@ -0,0 +1,374 @@
+from collections import namedtuple
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select, func, union_all, bindparam, tuple_, Column, Integer
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql.visitors import replacement_traverse
+
+from app import models
+from app.queries import scope as role_scope
+from app.queries.scope import cached_statement, Scoped
+from app.utils import fulltext
+from app.utils.pagination import decode_cursor
+
+# Incident list statements shared by the sync and async routers. A request is
+# described by a ListFilter: its shape (role kind, which filters are present,
+# date bounds, search mode) and the parameters carrying the values. The
+# statements are built once per shape (see app/queries/scope) and run with
+# db.execute(*scoped).
+
+_incidents = models.Incident.__table__
+_archive = models.IncidentArchive.__table__
+
+FILTER_ENUMS = {
+    "status": models.IncidentStatus,
+    "priority": models.IncidentPriority,
+    "category": models.IncidentCategory,
+}
+
+
+# the list sorts on created_at or a generated rank column, ties broken by id;
+# every scope has a (scope, key, id) index to seek and read a page in order
+SORT_COLUMNS = {
+    "created_at": _incidents.c.created_at,
+    "priority": _incidents.c.priority_rank,
+    "status": _incidents.c.status_rank,
+}
+
+
+def sort_key(sort_by: str):
+    # returns the SQL sort column and how to read the same key from a loaded row
+    column = SORT_COLUMNS[sort_by]
+    return column, lambda row: getattr(row, column.key)
+
+
+def seek_after(sort_by: str, sort_order: str):
+    """Keyset condition for rows after the cursor_key / cursor_id parameters (see cursor_params)."""
+    key_col, _ = sort_key(sort_by)
+    # a row value comparison, so the (key, id) index range starts at the cursor
+    after = tuple_(key_col, _incidents.c.id)
+    anchor = tuple_(
+        bindparam("cursor_key", type_=key_col.type, required=True),
+        bindparam("cursor_id", type_=Integer, required=True)
+    )
+    return after > anchor if sort_order == "asc" else after < anchor
+
+
+def cursor_params(cursor: str, sort_by: str, sort_order: str) -> dict:
+    cursor = decode_cursor(cursor, sort_by, sort_order)
+    if sort_by == "created_at":
+        try:
+            key = datetime.fromisoformat(str(cursor["k"]))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    elif isinstance(cursor["k"], int):
+        key = cursor["k"]
+    else:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"cursor_id": cursor["i"], "cursor_key": key}
+
+
+class ListFilter(namedtuple("ListFilter", ["kind", "filters", "bounds", "search", "params"])):
+    """
+    The WHERE part of an incident list request. kind is the role scope,
+    filters the IN filters present, bounds the created_at bounds present
+    ("date_from", "date_to") and search the fulltext search mode, or None.
+    """
+    __slots__ = ()
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(self[:4])
+
+    def without_search(self):
+        return self._replace(search=None)
+
+
+def list_filter(user, status=None, priority=None, category=None, search=None) -> ListFilter:
+    scope = role_scope.of(user)
+    params = role_scope.params(scope)
+    filters = []
+    for name, values in (("status", status), ("priority", priority), ("category", category)):
+        if values:
+            filters.append(name)
+            params[name] = [FILTER_ENUMS[name](v) for v in values]
+    if search:
+        params.update(fulltext.search_params(search))
+    return ListFilter(scope.kind, tuple(filters), (), fulltext.search_mode(search) if search else None, params)
+
+
+def _bounded(where: ListFilter, **bounds) -> ListFilter:
+    return where._replace(
+        bounds=tuple(sorted({*where.bounds, *bounds})),
+        params=dict(where.params, **bounds)
+    )
+
+
+def parse_start_date(startDate: str) -> datetime:
+    try:
+        return datetime.strptime(startDate, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+
+
+def on_date(where: ListFilter, date_obj: datetime) -> ListFilter:
+    return _bounded(
+        where,
+        date_from=datetime.combine(date_obj, datetime.min.time()),
+        date_to=datetime.combine(date_obj, datetime.max.time())
+    )
+
+
+def since_date(where: ListFilter, date_obj: datetime) -> ListFilter:
+    return _bounded(where, date_from=datetime.combine(date_obj, datetime.min.time()))
+
+
+def until_date(where: ListFilter, date_obj: datetime) -> ListFilter:
+    return _bounded(where, date_to=datetime.combine(date_obj, datetime.max.time()))
+
+
+def _conditions(shape: tuple, scoped: bool = True) -> list:
+    kind, filters, bounds, search = shape
+    conditions = [getattr(models.Incident, name).in_(bindparam(name, expanding=True)) for name in filters]
+    scope = role_scope.condition(kind, _incidents.c) if scoped else None
+    if scope is not None:
+        conditions.append(scope)
+    if "date_from" in bounds:
+        conditions.append(models.Incident.created_at >= bindparam("date_from", required=True))
+    if "date_to" in bounds:
+        conditions.append(models.Incident.created_at <= bindparam("date_to", required=True))
+    if search:
+        conditions.append(fulltext.search_condition(search))
+    return conditions
+
+
+INCIDENT_FIELDS = (
+    "id", "title", "description", "category", "status", "priority",
+    "created_at", "updated_at", "reporter_id", "resolver_id",
+)
+
+
+def parse_fields(fields: str):
+    """The requested subset of incident fields, id first; None when fields= is not given."""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names).difference(INCIDENT_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(unknown)}. Use {', '.join(INCIDENT_FIELDS)}.")
+    return tuple(dict.fromkeys(["id", *names]))
+
+
+def select_fields(fields=None, *extra) -> list:
+    """Core columns for a list read: the requested fields (all by default), then extra ones like the sort key."""
+    names = dict.fromkeys([*(fields or INCIDENT_FIELDS), *extra])
+    return [models.Incident.__table__.c[name] for name in names]
+
+
+def load_fields(query, fields, *extra):
+    """
+    Select only the columns for fields (plus extra ones the caller reads, like
+    the sort key). The other columns stay deferred and raise if touched, so a
+    projection can never fall back to one lazy load per row.
+    """
+    names = dict.fromkeys([*fields, *extra])
+    return query.options(load_only(*[getattr(models.Incident, name) for name in names], raiseload=True))
+
+
+def project(incident, fields) -> dict:
+    return {name: getattr(incident, name) for name in fields}
+
+
+INCLUDE_OPTIONS = ("total", "facets")
+
+
+def parse_include(include: str) -> set:
+    parts = {part.strip() for part in include.split(",") if part.strip()} if include else set()
+    unknown = parts.difference(INCLUDE_OPTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid include: {', '.join(sorted(unknown))}. Use total, facets.")
+    return parts
+
+
+def facet_counts(statement):
+    """One grouped count over a filtered incident select, a row per (status, priority, category) present."""
+    columns = (models.Incident.status, models.Incident.priority, models.Incident.category)
+    return statement.with_only_columns(*columns, func.count(models.Incident.id)).group_by(*columns)
+
+
+def shape_counts(rows, include: set) -> dict:
+    """Total and per-status/priority/category counts from the facet_counts rows."""
+    counts = {}
+    if "total" in include:
+        counts["total"] = sum(n for *_, n in rows)
+    if "facets" in include:
+        facets = {
+            "status": {s.value: 0 for s in models.IncidentStatus},
+            "priority": {p.value: 0 for p in models.IncidentPriority},
+            "category": {c.value: 0 for c in models.IncidentCategory},
+        }
+        for status, priority, category, n in rows:
+            facets["status"][getattr(status, "value", status)] += n
+            facets["priority"][getattr(priority, "value", priority)] += n
+            facets["category"][getattr(category, "value", category)] += n
+        counts["facets"] = facets
+    return counts
+
+
+def normalize_sort(sortBy: str, sortOrder: str):
+    sort_by = sortBy if sortBy in ("priority", "status") else "created_at"
+    sort_order = "asc" if sortOrder == "asc" else "desc"
+    return sort_by, sort_order
+
+
+def _ordered(query, sort_by: str, sort_order: str, seek: bool):
+    key_col, _ = sort_key(sort_by)
+    order_func = lambda col: col.asc() if sort_order == "asc" else col.desc()
+    query = query.order_by(order_func(key_col), order_func(_incidents.c.id))
+    return query.filter(seek_after(sort_by, sort_order)) if seek else query
+
+
+def _retarget(element, target):
+    # element with every reference to the incidents table moved to target,
+    # a table or subquery with the same column names
+    if hasattr(element, "__clause_element__"):
+        element = element.__clause_element__()
+
+    def replace(obj):
+        if obj is _incidents:
+            return target
+        if isinstance(obj, Column) and obj.table is _incidents:
+            return target.c[obj.key]
+        return None
+    # replacement_traverse leaves the element itself alone, only its children
+    replaced = replace(element)
+    return replacement_traverse(element, {}, replace) if replaced is None else replaced
+
+
+def archived(statement, search: str = None):
+    """The same incident select against incidents_archive, which is searched with ILIKE (it has no fulltext index)."""
+    statement = _retarget(statement, _archive)
+    if search:
+        pattern = bindparam("search_pattern", required=True)
+        statement = statement.filter(or_(_archive.c.title.ilike(pattern), _archive.c.description.ilike(pattern)))
+    return statement
+
+
+def _page_arms(shape: tuple, fields, sort_by: str, sort_order: str, seek: bool, include_archived: bool) -> list:
+    # one ordered read per scope branch, and per table with include_archived;
+    # each returns only the rows that can reach the requested page, in list
+    # order off its own index
+    kind, _, _, search = shape
+    key_col, _ = sort_key(sort_by)
+    unscoped = select(*select_fields(fields, key_col.key)).where(*_conditions(shape[:3] + (None,), scoped=False))
+    arms = []
+    for branch in role_scope.branches(kind, _incidents.c) or [None]:
+        unsearched = unscoped if branch is None else unscoped.where(branch)
+        hot = unsearched.where(fulltext.search_condition(search)) if search else unsearched
+        arms.append(_ordered(hot, sort_by, sort_order, seek))
+        if include_archived:
+            arms.append(archived(_ordered(unsearched, sort_by, sort_order, seek), search))
+    return arms
+
+
+@cached_statement
+def _page_statement(shape: tuple, fields, sort_by: str, sort_order: str, seek: bool, include_archived: bool):
+    arms = _page_arms(shape, fields, sort_by, sort_order, seek, include_archived)
+    if len(arms) == 1:
+        query = arms[0]
+    else:
+        # merge the arms; subqueries, since SQLite has no ORDER BY / LIMIT inside a UNION
+        merged = union_all(*[
+            select(*arm.limit(bindparam("arm_limit")).subquery().c) for arm in arms
+        ]).subquery("incidents_page")
+        key_col, _ = sort_key(sort_by)
+        order_func = lambda col: col.asc() if sort_order == "asc" else col.desc()
+        query = select(*merged.c).order_by(order_func(merged.c[key_col.key]), order_func(merged.c.id))
+    if not seek:
+        query = query.offset(bindparam("offset"))
+    return query.limit(bindparam("limit"))
+
+
+def page_query(where: ListFilter, fields, sort_by: str, sort_order: str, page: int, page_size: int,
+               cursor: str = None, include_archived: bool = False):
+    """
+    One page in (key, id) order, by cursor or offset, with one extra row to
+    detect a next page. Returns the Scoped statement and how to read the sort
+    key from a row.
+    """
+    _, key_of = sort_key(sort_by)
+    params = dict(where.params, limit=page_size + 1)
+    if cursor:
+        params.update(cursor_params(cursor, sort_by, sort_order))
+        params["arm_limit"] = page_size + 1
+    else:
+        params["offset"] = (page - 1) * page_size
+        params["arm_limit"] = page * page_size + 1
+    statement = _page_statement(where.shape, fields, sort_by, sort_order, bool(cursor), include_archived)
+    return Scoped(statement, params), key_of
+
+
+@cached_statement
+def _facet_statements(shape: tuple, include_archived: bool) -> tuple:
+    statements = (facet_counts(select(_incidents.c.id).where(*_conditions(shape))),)
+    if include_archived:
+        unsearched = select(_incidents.c.id).where(*_conditions(shape[:3] + (None,)))
+        statements += (archived(facet_counts(unsearched), shape[3]),)
+    return statements
+
+
+def facet_queries(where: ListFilter, include_archived: bool = False) -> list:
+    """The facet_counts statements for a list request, one per table read; shape_counts takes their rows together."""
+    return [Scoped(statement, where.params) for statement in _facet_statements(where.shape, include_archived)]
+
+
+@cached_statement
+def _exists_statement(shape: tuple, include_archived: bool):
+    matching = select(_incidents.c.id).where(*_conditions(shape))
+    probe = matching.exists()
+    if include_archived:
+        probe = or_(probe, archived(matching, shape[3]).exists())
+    return select(probe)
+
+
+def exists_query(where: ListFilter, include_archived: bool = False) -> Scoped:
+    return Scoped(_exists_statement(where.shape, include_archived), where.params)
+
+
+@cached_statement
+def _export_statement(shape: tuple, columns: tuple, sort_by: str, sort_order: str):
+    return _ordered(select(*columns).where(*_conditions(shape)), sort_by, sort_order, False)
+
+
+def export_query(user, columns, status=None, priority=None, category=None,
+                 startDate=None, endDate=None, search=None, sortBy="created_at", sortOrder="desc") -> Scoped:
+    """Unpaged select of columns with the incident list filters and role scope."""
+    where = list_filter(user, status, priority, category, search)
+    # exports take a plain range: incidents created from startDate through endDate
+    if startDate:
+        where = since_date(where, parse_start_date(startDate))
+    if endDate:
+        where = until_date(where, parse_start_date(endDate))
+    sort_by, sort_order = normalize_sort(sortBy, sortOrder)
+    return Scoped(_export_statement(where.shape, tuple(columns), sort_by, sort_order), where.params)
+
+
+@cached_statement
+def _search_statement(kind: str, fields, mode: str):
+    query = role_scope.where(select(models.Incident), kind, _incidents.c)
+    if fields:
+        query = load_fields(query, fields)
+    return (
+        fulltext.ranked_search(query, mode)
+        .order_by(models.Incident.created_at.desc())
+        .offset(bindparam("offset"))
+        .limit(bindparam("limit"))
+    )
+
+
+def search_query(user, q: str, fields, skip: int, limit: int) -> Scoped:
+    """Ranked fulltext search in the user's scope; rows are (Incident, rank, title_highlight, snippet)."""
+    scope = role_scope.of(user)
+    params = dict(role_scope.params(scope), **fulltext.search_params(q), offset=skip, limit=limit)
+    return Scoped(_search_statement(scope.kind, fields, fulltext.search_mode(q)), params)
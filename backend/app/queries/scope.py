@@ -0,0 +1,97 @@
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+from sqlalchemy import bindparam
+
+# Role scopes for every incident, change log and rollup query, and for the
+# event broker. A user sees:
+#   admin_system    every incident
+#   admin_<sector>  incidents assigned to them, and unassigned ones in category <sector>
+#   anyone else     incidents they reported
+#
+# Statement builders take the scope kind, not the user: the user id and sector
+# reach the SQL as the bound parameters scope_user_id / scope_category, from
+# params(). Statements are immutable, so builders are memoized on their shape
+# arguments (@cached_statement) and one statement object serves every request
+# of that shape. Reusing the object also reuses its memoized SQLAlchemy cache
+# key, so finding the compiled SQL costs nothing either.
+#
+#   STATEMENT_CACHE_SIZE  statements kept per builder (default 256)
+
+STATEMENT_CACHE_SIZE = int(os.getenv("STATEMENT_CACHE_SIZE", "256"))
+
+SYSTEM, SECTOR, REPORTER = "system", "sector", "reporter"
+
+Scope = namedtuple("Scope", ["kind", "user_id", "category"])
+
+# a statement with the parameters to run it with: db.execute(*scoped)
+Scoped = namedtuple("Scoped", ["statement", "params"])
+
+_builders = []
+
+
+def of(user) -> Scope:
+    if user.role == "admin_system":
+        # every system admin sees the same rows
+        return Scope(SYSTEM, None, None)
+    if user.role.startswith("admin_"):
+        return Scope(SECTOR, user.id, user.role.replace("admin_", ""))
+    return Scope(REPORTER, user.id, None)
+
+
+def params(scope: Scope) -> dict:
+    return {"scope_user_id": scope.user_id, "scope_category": scope.category}
+
+
+def condition(kind: str, columns, unassigned=None):
+    """
+    The scope rule over columns (a table's .c with reporter_id, resolver_id and
+    category); None for system admins. unassigned is the resolver_id stored for
+    unassigned rows when it is not NULL (the rollup uses 0).
+    """
+    if kind == SYSTEM:
+        return None
+    user_id = bindparam("scope_user_id", required=True)
+    if kind == SECTOR:
+        is_unassigned = columns.resolver_id.is_(None) if unassigned is None else columns.resolver_id == unassigned
+        return (columns.resolver_id == user_id) | (
+            is_unassigned & (columns.category == bindparam("scope_category", required=True))
+        )
+    return columns.reporter_id == user_id
+
+
+def branches(kind: str, columns) -> list:
+    """
+    condition() as disjoint alternatives, so an ordered read can take each
+    off its own index and merge them: [] for system admins, two for sector
+    admins (assigned to them; unassigned in their category), one otherwise.
+    """
+    if kind != SECTOR:
+        scope = condition(kind, columns)
+        return [] if scope is None else [scope]
+    return [
+        columns.resolver_id == bindparam("scope_user_id", required=True),
+        columns.resolver_id.is_(None) & (columns.category == bindparam("scope_category", required=True)),
+    ]
+
+
+def where(statement, kind: str, columns, unassigned=None):
+    scope = condition(kind, columns, unassigned)
+    return statement if scope is None else statement.where(scope)
+
+
+def cached_statement(builder):
+    """Memoize a builder whose arguments only describe the statement's shape."""
+    cached = lru_cache(maxsize=STATEMENT_CACHE_SIZE)(builder)
+    _builders.append(cached)
+    return cached
+
+
+def stats() -> dict:
+    infos = [builder.cache_info() for builder in _builders]
+    return {
+        "statements": sum(info.currsize for info in infos),
+        "hits": sum(info.hits for info in infos),
+        "misses": sum(info.misses for info in infos),
+    }
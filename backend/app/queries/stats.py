@@ -0,0 +1,175 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, case, bindparam
+
+from app.models import Incident, IncidentStatus, IncidentDailyStat
+from app.queries import scope as role_scope
+from app.queries.scope import cached_statement
+from app.utils.stats_rollup import UNASSIGNED
+
+# Statement builders for the /stats endpoints, shared by the sync and async
+# routers. Each builder returns the statement to run, its parameters and a
+# function that turns its rows into the response payload. Statements are
+# cached per role kind; dates and the user go in the parameters.
+
+StatsQuery = namedtuple("StatsQuery", ["statement", "params", "shape"])
+
+SECTOR_CATEGORY_MESSAGE = {"message": "No category stats for sector admin"}
+
+STATUSES = [status.value for status in IncidentStatus]
+CATEGORIES = [c.value for c in Incident.__table__.c.category.type.enum_class]
+
+
+_stats = IncidentDailyStat.__table__
+
+
+def is_sector_admin(user) -> bool:
+    return role_scope.of(user).kind == role_scope.SECTOR
+
+
+def _scoped(statement, kind: str):
+    return role_scope.where(statement, kind, _stats.c, unassigned=UNASSIGNED)
+
+
+def _last_7_days():
+    today = datetime.utcnow().date()
+    return [(today - timedelta(days=i)) for i in range(6, -1, -1)]
+
+
+@cached_statement
+def _last_7_days_statement(kind: str):
+    return _scoped(
+        select(IncidentDailyStat.day, IncidentDailyStat.status, func.sum(IncidentDailyStat.count))
+        .where(IncidentDailyStat.day >= bindparam("since", required=True))
+        .group_by(IncidentDailyStat.day, IncidentDailyStat.status),
+        kind
+    )
+
+
+def last_7_days(user) -> StatsQuery:
+    days = _last_7_days()
+    scope = role_scope.of(user)
+
+    def shape(rows):
+        stats = {"dates": [d.isoformat() for d in days], **{status: [0]*7 for status in STATUSES}}
+        for date_obj, status, count in rows:
+            if date_obj in days and status in stats:
+                stats[status][days.index(date_obj)] = count
+        return stats
+
+    return StatsQuery(_last_7_days_statement(scope.kind), dict(role_scope.params(scope), since=days[0]), shape)
+
+
+@cached_statement
+def _by_category_statement(kind: str):
+    statement = select(IncidentDailyStat.category, func.sum(IncidentDailyStat.count)).group_by(IncidentDailyStat.category)
+    # everyone but system admins counts only what they reported
+    return _scoped(statement, kind if kind == role_scope.SYSTEM else role_scope.REPORTER)
+
+
+def by_category(user) -> StatsQuery:
+    # sector admins get SECTOR_CATEGORY_MESSAGE instead; callers check is_sector_admin first
+    scope = role_scope.of(user)
+
+    def shape(rows):
+        stats = {c: 0 for c in CATEGORIES}
+        for category, count in rows:
+            stats[category] = count
+        return stats
+
+    return StatsQuery(_by_category_statement(scope.kind), role_scope.params(scope), shape)
+
+
+def _count_by_status(rows):
+    stats = {status: 0 for status in STATUSES}
+    for status, count in rows:
+        stats[status] = count
+    return stats
+
+
+@cached_statement
+def _status_distribution_statement(kind: str):
+    return _scoped(
+        select(IncidentDailyStat.status, func.sum(IncidentDailyStat.count)).group_by(IncidentDailyStat.status),
+        kind
+    )
+
+
+def status_distribution(user) -> StatsQuery:
+    scope = role_scope.of(user)
+    return StatsQuery(_status_distribution_statement(scope.kind), role_scope.params(scope), _count_by_status)
+
+
+@cached_statement
+def _last_3_months_statement(kind: str):
+    return _scoped(
+        select(IncidentDailyStat.status, func.sum(IncidentDailyStat.count))
+        .where(IncidentDailyStat.day >= bindparam("since", required=True))
+        .group_by(IncidentDailyStat.status),
+        kind
+    )
+
+
+def last_3_months(user) -> StatsQuery:
+    start_date = datetime.utcnow().date() - timedelta(days=90)  # 3 months
+    scope = role_scope.of(user)
+    return StatsQuery(_last_3_months_statement(scope.kind), dict(role_scope.params(scope), since=start_date), _count_by_status)
+
+
+@cached_statement
+def _dashboard_statement(kind: str):
+    # all four statistics from one grouped scan using conditional aggregation
+    count = IncidentDailyStat.count
+    return _scoped(
+        select(
+            IncidentDailyStat.category,
+            IncidentDailyStat.status,
+            func.sum(count),
+            func.sum(case((IncidentDailyStat.day >= bindparam("since", required=True), count), else_=0)),
+            *[func.sum(case((IncidentDailyStat.day == bindparam(f"day_{i}", required=True), count), else_=0))
+              for i in range(7)]
+        )
+        .group_by(IncidentDailyStat.category, IncidentDailyStat.status),
+        kind
+    )
+
+
+def dashboard(user) -> StatsQuery:
+    days = _last_7_days()
+    scope = role_scope.of(user)
+    params = dict(role_scope.params(scope), since=days[-1] - timedelta(days=90))
+    params.update({f"day_{i}": day for i, day in enumerate(days)})
+
+    def shape(rows):
+        last_7 = {"dates": [d.isoformat() for d in days], **{status: [0]*7 for status in STATUSES}}
+        categories = {c: 0 for c in CATEGORIES}
+        distribution = {status: 0 for status in STATUSES}
+        last_3 = {status: 0 for status in STATUSES}
+
+        for category, status, total, in_last_3_months, *per_day in rows:
+            categories[category] = categories.get(category, 0) + total
+            if status not in distribution:
+                continue
+            distribution[status] += total
+            last_3[status] += in_last_3_months
+            for idx, day_count in enumerate(per_day):
+                last_7[status][idx] += day_count
+
+        return {
+            "last_7_days": last_7,
+            "by_category": SECTOR_CATEGORY_MESSAGE if is_sector_admin(user) else categories,
+            "status_distribution": distribution,
+            "last_3_months": last_3,
+        }
+
+    return StatsQuery(_dashboard_statement(scope.kind), params, shape)
+
+
+BUILDERS = {
+    "last-7-days": last_7_days,
+    "by-category": by_category,
+    "status-distirubtion": status_distribution,
+    "last-3-months": last_3_months,
+    "dashboard": dashboard,
+}
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from anyio import to_thread
+
+from app import database
+from app.models import User
+from app.utils.db_pool import pool_stats
+
+if database.DB_MODE == "async":
+    from app.routers.aio.auth import get_current_system_admin
+else:
+    from app.utils.dependencies import get_current_system_admin
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"]
+)
+
+
+@router.get("/pool")
+async def pool_status(current_admin: User = Depends(get_current_system_admin)):
+    # pool and engine state only; cache, hashing and job counters are in /metrics
+    # async so it reads the counters without taking a threadpool slot itself
+    limiter = to_thread.current_default_thread_limiter()
+    return {
+        "mode": database.DB_MODE,
+        "profile": database.DB_PROFILE,
+        "database": {
+            "sync": pool_stats(database.engine),
+            "async": pool_stats(database.async_engine),
+        },
+        "threadpool": {
+            "size": limiter.total_tokens,
+            "in_use": limiter.borrowed_tokens,
+            "waiting": limiter.statistics().tasks_waiting,
+        },
+    }
@@ -0,0 +1,8 @@
+# Async versions of the routers, mounted instead of the sync ones when DB_MODE=async.
+# Same paths, parameters and responses; requests run on the event loop with AsyncSession.
+# The endpoint bodies live in the sync routers and take a Session: these run
+# them with AsyncSession.run_sync, so only how the session is driven differs.
+from .auth import router as auth_router
+from .incident import router as incident_router
+from .userTable import router as user_router
+from .stats import router as stats_router
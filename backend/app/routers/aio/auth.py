@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import database, models, schemas
+from app.routers.auth import (
+    oauth2_scheme, UserInfo, LoginResponse, token_email, authenticated,
+    login_errors, find_login_user, login_response, refresh_tokens, user_info_response
+)
+from app.utils.dependencies import require_system_admin
+from app.utils.token import get_user_by_email_async
+from app.utils.logger import logger
+
+
+router = APIRouter(
+    prefix="/auth",
+    tags=["Authentication"]
+)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)):
+    email = token_email(token)
+    return authenticated(await get_user_by_email_async(db, email), email)
+
+
+async def get_current_system_admin(current_user: models.User = Depends(get_current_user)):
+    return require_system_admin(current_user)
+
+
+@router.post("/login", response_model=LoginResponse)
+async def login(
+    login_request: schemas.LoginRequest,
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    logger.info("Login attempt for email: %s", login_request.email)
+    with login_errors(login_request.email):
+        user = await db.run_sync(find_login_user, login_request.email)
+        return await login_response(login_request, user)
+
+
+@router.post("/refresh", response_model=LoginResponse)
+async def refresh_access_token(request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    return await db.run_sync(refresh_tokens, request)
+
+
+@router.get("/me", response_model=UserInfo)
+async def get_current_user_info(
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(get_current_user)
+):
+    return user_info_response(request, response, current_user)
@@ -0,0 +1,124 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from app import database, models
+from app.schemas.incident import IncidentCreate, IncidentRead, IncidentStatus, IncidentSearchResult, IncidentChangeFeed, IncidentPage, IncidentFields, IncidentSearchFields
+from app.routers.aio.auth import get_current_user
+from app.routers.incident import (
+    IncidentListQuery, insert_incident, read_changes, list_incidents, remove_incident, find_incidents, set_status
+)
+from app.utils.logger import logger
+from app.queries import incidents as incident_queries
+from app.utils import bulk_ingest, incident_export
+
+
+router = APIRouter(
+    prefix="/incidents",
+    tags=["Incidents"]
+)
+
+get_db = database.get_async_db
+
+
+@router.post("/", response_model=IncidentRead, status_code=status.HTTP_201_CREATED)
+async def create_incident(
+    incident: IncidentCreate,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(insert_incident, incident, current_user)
+
+
+@router.post("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_incidents(
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create incidents from a JSON array or an NDJSON stream; returns an id or errors per item."""
+    logger.info("User id=%s bulk creating incidents", current_user.id)
+    try:
+        summary = await bulk_ingest.ingest(
+            request, lambda batch: db.run_sync(bulk_ingest.insert_batch, batch)
+        )
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error bulk creating incidents by user ID=%s", current_user.id)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create incidents")
+    logger.info("Bulk create by user ID=%s: %s created, %s failed", current_user.id, summary['created'], summary['failed'])
+    return summary
+
+
+@router.get("/export")
+async def export_incidents(
+    current_user: models.User = Depends(get_current_user),
+    fmt: incident_export.ExportFormat = Query("csv", alias="format", description="csv or ndjson"),
+    status: Optional[List[str]] = Query(None),
+    priority: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    startDate: Optional[str] = Query(None, description="Incidents created on or after YYYY-MM-DD"),
+    endDate: Optional[str] = Query(None, description="Incidents created on or before YYYY-MM-DD"),
+    search: Optional[str] = None,
+    sortBy: Optional[str] = Query("created_at", description="Sort by: created_at, priority, status"),
+    sortOrder: Optional[str] = Query("desc", description="Sort order: asc or desc")
+):
+    statement, params = incident_queries.export_query(
+        current_user, incident_export.EXPORT_COLUMNS, status, priority, category,
+        startDate, endDate, search, sortBy, sortOrder
+    )
+    logger.info("User id=%s exporting incidents as %s", current_user.id, fmt)
+    return incident_export.response(incident_export.stream_async(database.async_engine, statement, params, fmt), fmt)
+
+
+@router.get("/changes", response_model=IncidentChangeFeed)
+async def get_incident_changes(
+    since: Optional[int] = Query(None, ge=0, description="Cursor from a previous response; omit to get the current cursor"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum log entries to read"),
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Incidents created, changed or removed from the user's scope since the cursor; 410 once the cursor has been pruned."""
+    return await db.run_sync(read_changes, current_user, since, limit)
+
+
+@router.get("/", response_model=Union[List[IncidentRead], List[IncidentFields], IncidentPage], response_model_exclude_unset=True)
+async def get_incidents(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+    params: IncidentListQuery = Depends()
+):
+    return await db.run_sync(list_incidents, request, response, current_user, params)
+
+
+@router.delete("/{incident_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_incident(
+    incident_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(remove_incident, incident_id, current_user)
+
+
+@router.get("/search", response_model=Union[List[IncidentSearchResult], List[IncidentSearchFields]], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def search_incidents(
+    q: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, gt=0),
+    fields: Optional[str] = Query(None, description="Comma-separated incident fields to return; rank, title_highlight and snippet are always included"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return await db.run_sync(find_incidents, current_user, q, skip, limit, fields)
+
+
+@router.patch("/{incident_id}/status", response_model=IncidentRead)
+async def update_incident_status(
+    incident_id: int,
+    new_status: IncidentStatus = Query(..., description="New status for the incident"),
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(set_status, incident_id, new_status, current_user)
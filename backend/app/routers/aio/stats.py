@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.queries import stats as stats_queries
+from app.routers.stats import cached_stats
+from app.routers.aio.auth import get_current_user
+
+
+router = APIRouter(
+    prefix="/stats",
+    tags = ["Statistics"]
+)
+
+
+@router.get("/last-7-days")
+async def last_7_days_stats(request: Request, response: Response, current_user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(cached_stats, "last-7-days", current_user, request, response)
+
+
+@router.get("/by-category")
+async def incidents_by_category(request: Request, response: Response, current_user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    if stats_queries.is_sector_admin(current_user):
+        return stats_queries.SECTOR_CATEGORY_MESSAGE
+    return await db.run_sync(cached_stats, "by-category", current_user, request, response)
+
+
+@router.get("/status-distirubtion")
+async def status_distribution(request: Request, response: Response, current_user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(cached_stats, "status-distirubtion", current_user, request, response)
+
+
+@router.get("/last-3-months")
+async def last_3_months(request: Request, response: Response, current_user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(cached_stats, "last-3-months", current_user, request, response)
+
+
+@router.get("/dashboard")
+async def dashboard_stats(request: Request, response: Response, current_user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(cached_stats, "dashboard", current_user, request, response)
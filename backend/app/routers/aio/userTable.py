@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.models import User
+from app.database import get_async_db
+from app.schemas import UserRead, UserCreate, UserUpdate
+from app.routers.aio.auth import get_current_system_admin
+from app.routers.userTable import (
+    write_errors, list_users, check_new_user, insert_user, deactivate_user,
+    user_to_update, apply_update, find_users
+)
+from app.utils import hashing
+from app.schemas.user import SignupResponse
+from app.utils.logger import logger
+
+router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+)
+
+
+@router.get("/", response_model=List[UserRead])
+async def get_system_users(
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: User = Depends(get_current_system_admin),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, gt=0)
+):
+    return await db.run_sync(list_users, current_admin, skip, limit)
+
+
+@router.post("/create", response_model=SignupResponse, status_code=status.HTTP_201_CREATED)
+async def create_user(
+    user: UserCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: User = Depends(get_current_system_admin)
+):
+    logger.info("Creating user by admin: email=%s, id=%s, new user email=%s, role=%s, sector=%s", current_admin.email, current_admin.id, user.email, user.role, user.sector)
+    with write_errors("Failed to create user", "Error creating user"):
+        await db.run_sync(check_new_user, user)
+        return await db.run_sync(insert_user, user, await hashing.hash_password_async(user.password))
+
+
+@router.delete("/{user_id}", status_code=status.HTTP_200_OK)
+async def delete_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: User = Depends(get_current_system_admin)
+):
+    return await db.run_sync(deactivate_user, user_id, current_admin)
+
+
+@router.put("/{user_id}", response_model=UserRead)
+async def update_user(
+    user_id: int,
+    user_data: UserUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: User = Depends(get_current_system_admin)
+):
+    logger.info("Updating user ID: %s by admin: email=%s, id=%s", user_id, current_admin.email, current_admin.id)
+    with write_errors("Error updating user", "Error updating user with ID: %s", user_id):
+        user = await db.run_sync(user_to_update, user_id, user_data)
+        hashed_pw = await hashing.hash_password_async(user_data.password) if user_data.password else None
+        return await db.run_sync(apply_update, user, user_data, hashed_pw)
+
+
+@router.get("/search", response_model=List[UserRead], status_code=status.HTTP_200_OK)
+async def search_users(
+    q: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, gt=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: User = Depends(get_current_system_admin)
+):
+    return await db.run_sync(find_users, current_admin, q, skip, limit)
@@ -1,17 +1,18 @@
-from urllib import response
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from contextlib import contextmanager
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import select, text
 from typing import Optional
 from jose import jwt, JWTError
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
 from app import database, models, schemas
-from app.utils import hashing, token
-from app.utils.logger import logger
+from app.utils import hashing, token, etag as etags
+from app.utils.token import decode_token, get_user_by_email
+from app.utils.logger import logger, bind_user
 from fastapi.encoders import jsonable_encoder
 
 load_dotenv()
@@ -29,34 +30,45 @@ router = APIRouter(
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-# Dependency to extract request_id from headers
-def get_request_id(request: Request):
-    return request.headers.get("X-Request-ID", "N/A")
+# The aio routers share everything below; the session helpers take a sync
+# Session, which async mode passes them with AsyncSession.run_sync.
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db), request_id: str = Depends(get_request_id)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def token_email(token: str) -> str:
+    """The subject of an access token; 401 when the token does not decode."""
     try:
-        payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
+        payload = decode_token(token, secret_key)
         email: str = payload.get("sub")
-        logger.debug(f"[RequestID={request_id}][JWT Decode] Decoded payload: {payload}")
         if email is None:
-            logger.info(f"[RequestID={request_id}][JWT Decode] Payload missing 'sub'")
-            raise credentials_exception
+            logger.info("[JWT Decode] Payload missing 'sub'")
+            raise _credentials_exception()
     except JWTError:
-        logger.exception(f"[RequestID={request_id}][JWT Decode] JWT decode error")
-        raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == email).first()
+        logger.exception("[JWT Decode] JWT decode error")
+        raise _credentials_exception()
+    return email
+
+
+def authenticated(user, email: str):
     if user is None:
-        logger.info(f"[RequestID={request_id}][JWT Decode] No user found for email: {email}")
-        raise credentials_exception
+        logger.info("[JWT Decode] No active user found for email: %s", email)
+        raise _credentials_exception()
+    bind_user(user.email)
     return user
 
 
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    email = token_email(token)
+    return authenticated(get_user_by_email(db, email), email)
+
+
 class UserInfo(schemas.UserRead):
     pass
 
@@ -72,184 +84,180 @@ class LoginResponse(BaseModel):
     user: Optional[UserInfo] = None
 
 
-@router.post("/login", response_model=LoginResponse)
-async def login(
-    login_request: schemas.LoginRequest,
-    db: Session = Depends(database.get_db),
-    request_id: str = Depends(get_request_id)
-):
-    logger.info(f"[RequestID={request_id}] Login attempt for email: {login_request.email}")
-
-    try:
-        # DB test
-        try:
-            db_test = db.execute(text("SELECT 1")).scalar()
-            logger.info(f"[RequestID={request_id}] Database connection test passed: {db_test}")
-        except Exception:
-            logger.exception(f"[RequestID={request_id}] Database connection test failed")
-            raise HTTPException(status_code=500, detail="Database connection failed")
-
-        # Find user
-        user = db.query(models.User).filter(models.User.email == login_request.email).first()
-        logger.info(f"[RequestID={request_id}] User found: {user is not None}")
-
-        if user:
-            logger.debug(f"[RequestID={request_id}] User role: {user.role}, sector: {user.sector}")
-
-        if not user:
-            logger.info(f"[RequestID={request_id}] Login failed: invalid email {login_request.email}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid email or password"
-            )
-
-        # Verify password
-        try:
-            is_valid = hashing.verify_password(login_request.password, user.password)
-            logger.info(f"[RequestID={request_id}] Password valid: {is_valid} for user email: {login_request.email}")
-        except Exception:
-            logger.exception(f"[RequestID={request_id}] Error during password verification for user email: {login_request.email}")
-            raise HTTPException(
-                status_code=500,
-                detail="Password verification failed"
-            )
-
-        if not is_valid:
-            logger.info(f"[RequestID={request_id}] Login failed: invalid password for email {login_request.email}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid email or password"
-            )
-
-        # Create tokens
-        try:
-            access_token = token.create_access_token(data={"sub": user.email})
-            refresh_token = token.create_refresh_token({"sub": user.email})
-            user_data = schemas.UserRead.from_orm(user)
-            logger.info(f"[RequestID={request_id}] Token and user data created successfully for email: {user.email}")
-            logger.debug(f"[RequestID={request_id}] Access token payload: {access_token}")
-        except Exception:
-            logger.exception(f"[RequestID={request_id}] Error creating token or user data for email: {user.email}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error processing login"
-            )
-        
-        #Return response with HttpOnly refresh token cookie
-        response = JSONResponse(
-            content=jsonable_encoder({
-                "access_token": access_token,
-                "token_type":"bearer",
-                "user": user_data
-            })
-        )
-        response.set_cookie(
-            key="refresh_token",
-            value = refresh_token,
-            httponly = True,
-            max_age = 7*24*60*60
-        )
+def token_response(access_token: str, refresh_token: str, user_data) -> JSONResponse:
+    """The login / refresh body, with the refresh token in an HttpOnly cookie."""
+    response = JSONResponse(
+        content=jsonable_encoder({
+            "access_token": access_token,
+            "token_type": "bearer",
+            "user": user_data
+        })
+    )
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        httponly=True,
+        max_age=7*24*60*60
+    )
+    return response
 
-        logger.info(f"[RequestID={request_id}] Login successful for email: {login_request.email}")
-        return response
 
+@contextmanager
+def login_errors(email: str):
+    try:
+        yield
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"[RequestID={request_id}] Unexpected error during login for email: {login_request.email}")
+        logger.exception("Unexpected error during login for email: %s", email)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
 
-#Refresh endpoint
-@router.post("/refresh", response_model=LoginResponse)
-def refresh_access_token(request: Request, db: Session = Depends(database.get_db), request_id: str = Depends(get_request_id)):
+def find_login_user(db: Session, email: str):
+    # DB test
+    try:
+        db_test = db.execute(text("SELECT 1")).scalar()
+        logger.info("Database connection test passed: %s", db_test)
+    except Exception:
+        logger.exception("Database connection test failed")
+        raise HTTPException(status_code=500, detail="Database connection failed")
+
+    # Find user
+    user = db.execute(select(models.User).where(models.User.email == email)).scalars().first()
+    logger.info("User found: %s", user is not None)
+
+    if not user:
+        logger.info("Login failed: invalid email %s", email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+    logger.debug("User role: %s, sector: %s", user.role, user.sector)
+    return user
+
+
+async def login_response(login_request: schemas.LoginRequest, user) -> JSONResponse:
+    # Verify password
+    try:
+        is_valid = await hashing.verify_password_async(login_request.password, user.password)
+        logger.info("Password valid: %s for user email: %s", is_valid, login_request.email)
+    except hashing.HashPoolBusy:
+        logger.warning("Password hashing queue full, rejecting login for email: %s", login_request.email)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    except Exception:
+        logger.exception("Error during password verification for user email: %s", login_request.email)
+        raise HTTPException(
+            status_code=500,
+            detail="Password verification failed"
+        )
+
+    if not is_valid:
+        logger.info("Login failed: invalid password for email %s", login_request.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+
+    # Create tokens
+    try:
+        access_token = token.create_access_token(data={"sub": user.email})
+        refresh_token = token.create_refresh_token({"sub": user.email})
+        user_data = schemas.UserRead.model_validate(user)
+        logger.info("Token and user data created successfully for email: %s", user.email)
+    except Exception:
+        logger.exception("Error creating token or user data for email: %s", user.email)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error processing login"
+        )
+
+    logger.info("Login successful for email: %s", login_request.email)
+    return token_response(access_token, refresh_token, user_data)
+
+
+@router.post("/login", response_model=LoginResponse)
+async def login(
+    login_request: schemas.LoginRequest,
+    db: Session = Depends(database.get_db)
+):
+    logger.info("Login attempt for email: %s", login_request.email)
+    with login_errors(login_request.email):
+        user = find_login_user(db, login_request.email)
+        return await login_response(login_request, user)
+
+
+def refresh_tokens(db: Session, request: Request) -> JSONResponse:
     try:
         # Get refresh token from cookie
         refresh_token = request.cookies.get("refresh_token")
         if not refresh_token:
-            logger.info(f"[RequestID={request_id}] No refresh token provided")
+            logger.info("No refresh token provided")
             raise HTTPException(status_code=401, detail="No refresh token provided")
         # decode refresh token
         try:
             payload = jwt.decode(refresh_token, secret_key, algorithms=[ALGORITHM])
             email = payload.get("sub")
             if not email:
-                logger.info(f"[RequestID={request_id}] Refresh token missing 'sub'")
+                logger.info("Refresh token missing 'sub'")
                 raise HTTPException(status_code=401, detail="Invalid refresh token")
         except JWTError:
-            logger.exception(f"[RequestID={request_id}] Invalid or expired refresh token")
+            logger.exception("Invalid or expired refresh token")
             raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
-        
+
         # get user from db
         try:
-            user = db.query(models.User).filter(models.User.email == email).first()
+            user = db.execute(select(models.User).where(models.User.email == email)).scalars().first()
             if not user:
                 raise HTTPException(status_code=401, detail="User not found")
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.exception(f"[RequestID={request_id}] Error fetching user: {str(e)}")
+            logger.exception("Error fetching user: %s", str(e))
             raise HTTPException(status_code=500, detail="Internal Server Error")
-        
+
         # create new access token
         new_access_token = token.create_access_token({"sub": email})
-        user_data = schemas.UserRead.from_orm(user)
-
         new_refresh_token = token.create_refresh_token({"sub": email})
-        
-
-        # create JWTResponse and set cookie for refresh token
-        response = JSONResponse(
-            content=jsonable_encoder({
-                "access_token": new_access_token,
-                "token_type": "bearer",
-                "user": user_data
-            })
-        )
-
-        response.set_cookie(
-            key="refresh_token",
-            value=new_refresh_token,
-            httponly=True,
-            max_age=7*24*60*60  
-        )
+        user_data = schemas.UserRead.model_validate(user)
 
-        logger.info(f"[RequestID={request_id}] Access token refreshed for user: {email}")
-        return response
+        logger.info("Access token refreshed for user: %s", email)
+        return token_response(new_access_token, new_refresh_token, user_data)
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"[RequestID={request_id}] Unexpected error in refresh endpoint: {str(e)}")
+        logger.exception("Unexpected error in refresh endpoint: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+#Refresh endpoint
+@router.post("/refresh", response_model=LoginResponse)
+def refresh_access_token(request: Request, db: Session = Depends(database.get_db)):
+    return refresh_tokens(db, request)
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+def user_info_response(request: Request, response: Response, current_user):
+    logger.info("Fetching current user info: email=%s, id=%s", current_user.email, current_user.id)
+    user_info = UserInfo.model_validate(current_user)
+    not_modified = etags.conditional(request, response, etags.make_etag("me", user_info.model_dump_json()))
+    if not_modified:
+        return not_modified
+    return user_info
 
 
 @router.get("/me", response_model=UserInfo)
 def get_current_user_info(
-    current_user: models.User = Depends(get_current_user),
-    request_id: str = Depends(get_request_id)
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(get_current_user)
 ):
-    logger.info(f"[RequestID={request_id}] Fetching current user info: email={current_user.email}, id={current_user.id}")
-    return current_user
+    return user_info_response(request, response, current_user)
 
 
 
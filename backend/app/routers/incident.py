@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List,Optional
+from typing import List, Optional, Union
 from app import database, models
-from app.schemas.incident import IncidentCreate,IncidentRead, IncidentUpdate,IncidentStatus
-from sqlalchemy import case,or_
+from app.schemas.incident import IncidentCreate,IncidentRead, IncidentUpdate,IncidentStatus, IncidentSearchResult, IncidentChangeFeed, IncidentPage, IncidentFields, IncidentSearchFields
 from app.routers.auth import get_current_user
-from app.utils.logger import info, debug, warning, exception, logger
-from fastapi.encoders import jsonable_encoder
+from app.utils.logger import logger
 from datetime import datetime
 from app.models import IncidentCategory
+from app.utils.pagination import next_cursor
+from app.utils import etag as etags
+from app.queries import incidents as incident_queries, changes as change_queries
+from app.utils import fulltext, incident_writes, bulk_ingest, incident_export, fast_json
+from starlette.concurrency import run_in_threadpool
 
 
 router = APIRouter(
@@ -18,200 +23,271 @@ router = APIRouter(
 
 get_db = database.get_db
 
-# Dependency to extract request_id from headers
-def get_request_id(request: Request):
-    return request.headers.get("X-Request-ID", "N/A")
+# Endpoint bodies below take a sync Session; the aio router runs the same
+# functions on its AsyncSession with run_sync.
 
-@router.post("/", response_model=IncidentRead, status_code=status.HTTP_201_CREATED)
-def create_incident(
-    incident: IncidentCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    request_id: str = Depends(get_request_id)
-):
-    logger.info(f"[RequestID={request_id}] User email={current_user.email}, id={current_user.id} creating incident: title={incident.title}, category={incident.category}, priority={incident.priority}")
-    logger.debug(f"[RequestID={request_id}] Full incident input: {incident.dict()}")
+
+def insert_incident(db: Session, incident: IncidentCreate, current_user):
+    logger.info("User email=%s, id=%s creating incident: title=%s, category=%s, priority=%s", current_user.email, current_user.id, incident.title, incident.category, incident.priority)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Full incident input: %s", incident.model_dump())
     try:
-        db_incident = models.Incident(**incident.dict())
+        db_incident = models.Incident(**incident.model_dump())
         db.add(db_incident)
+        db.flush()
+        incident_writes.record_created(db, db_incident.snapshot())
         db.commit()
         db.refresh(db_incident)
 
-        # 🔹 converting JSON datat UTC
-        incident_data = jsonable_encoder(db_incident)
-        print("Incident UTC:", incident_data["created_at"])
-
-        logger.info(f"[RequestID={request_id}] Incident created successfully with ID:{db_incident.id} by user ID={current_user.id}")
+        logger.info("Incident created successfully with ID:%s by user ID=%s", db_incident.id, current_user.id)
         return db_incident
     except Exception:
-        logger.exception(f"[RequestID={request_id}] Error creating incident by user ID={current_user.id}")
+        logger.exception("Error creating incident by user ID=%s", current_user.id)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create incident")
 
 
-@router.get("/", response_model=List[IncidentRead])
-def get_incidents(
-    db: Session = Depends(database.get_db),
+@router.post("/", response_model=IncidentRead, status_code=status.HTTP_201_CREATED)
+def create_incident(
+    incident: IncidentCreate,
     current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return insert_incident(db, incident, current_user)
+
+
+def _insert_bulk_batch(batch):
+    # a session per batch: successive batches can run on different threadpool threads
+    with database.SessionLocal() as db:
+        return bulk_ingest.insert_batch(db, batch)
+
+
+@router.post("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_incidents(
+    request: Request,
+    current_user: models.User = Depends(get_current_user)
+):
+    """Create incidents from a JSON array or an NDJSON stream; returns an id or errors per item."""
+    logger.info("User id=%s bulk creating incidents", current_user.id)
+    try:
+        summary = await bulk_ingest.ingest(request, lambda batch: run_in_threadpool(_insert_bulk_batch, batch))
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error bulk creating incidents by user ID=%s", current_user.id)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create incidents")
+    logger.info("Bulk create by user ID=%s: %s created, %s failed", current_user.id, summary['created'], summary['failed'])
+    return summary
+
+
+@router.get("/export")
+def export_incidents(
+    current_user: models.User = Depends(get_current_user),
+    fmt: incident_export.ExportFormat = Query("csv", alias="format", description="csv or ndjson"),
     status: Optional[List[str]] = Query(None),
     priority: Optional[List[str]] = Query(None),
-    category: Optional[List[str]] = Query(None, description="Filter by categories"),
-    startDate: Optional[str] = Query(None, description="Filter incidents from this date YYYY-MM-DD"),
+    category: Optional[List[str]] = Query(None),
+    startDate: Optional[str] = Query(None, description="Incidents created on or after YYYY-MM-DD"),
+    endDate: Optional[str] = Query(None, description="Incidents created on or before YYYY-MM-DD"),
     search: Optional[str] = None,
     sortBy: Optional[str] = Query("created_at", description="Sort by: created_at, priority, status"),
-    sortOrder: Optional[str] = Query("desc", description="Sort order: asc or desc"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(10, ge=1, le=100, description="Number of incidents per page")
+    sortOrder: Optional[str] = Query("desc", description="Sort order: asc or desc")
 ):
-    query = db.query(models.Incident)
-
-    # status filter
-    if status:
-        status_enums = [models.IncidentStatus(s) for s in status]
-        query = query.filter(models.Incident.status.in_(status_enums))
-
-    #  priority filter
-    if priority:
-        priority_enums = [models.IncidentPriority(p) for p in priority]
-        query = query.filter(models.Incident.priority.in_(priority_enums))
-
-    #category filter
-    if category:
-        category_enums = [models.IncidentCategory(c) for c in category]
-        query = query.filter(models.Incident.category.in_(category_enums))
-
-    # role
-    if current_user.role == "admin_system":
-        query = query  
-    elif current_user.role.startswith("admin_"):
-        sector_category = current_user.role.replace("admin_", "")
-        query = query.filter(
-            (models.Incident.resolver_id == current_user.id) |
-            ((models.Incident.resolver_id.is_(None)) & (models.Incident.category == sector_category))
-        )
-    else:
-        query = query.filter(models.Incident.reporter_id == current_user.id)
-
-    # date filter
-    if startDate:
-        try:
-            date_obj = datetime.strptime(startDate, "%Y-%m-%d")
-            query_on_date = query.filter(
-                models.Incident.created_at >= datetime.combine(date_obj, datetime.min.time()),
-                models.Incident.created_at <= datetime.combine(date_obj, datetime.max.time())
-            )
-            incidents_on_date = query_on_date.all()
-            if incidents_on_date:
-                query = query_on_date
-            else:
-                query = query.filter(models.Incident.created_at >= datetime.combine(date_obj, datetime.min.time()))
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
-
-    # Search
-    if search:
-        query = query.filter(
-            or_(
-                models.Incident.title.ilike(f"%{search}%"),
-                models.Incident.description.ilike(f"%{search}%")
-            )
-        )
-
-    # Sort
-    priority_order = case(
-        (models.Incident.priority == models.IncidentPriority.low, 1),
-        (models.Incident.priority == models.IncidentPriority.medium, 2),
-        (models.Incident.priority == models.IncidentPriority.high, 3),
-        (models.Incident.priority == models.IncidentPriority.critical, 4),
-        else_=5
+    statement, params = incident_queries.export_query(
+        current_user, incident_export.EXPORT_COLUMNS, status, priority, category,
+        startDate, endDate, search, sortBy, sortOrder
     )
-    status_order = case(
-        (models.Incident.status == models.IncidentStatus.open, 1),
-        (models.Incident.status == models.IncidentStatus.in_progress, 2),
-        (models.Incident.status == models.IncidentStatus.solved, 3),
-        else_=4
-    )
-
-    order_func = lambda col: col.asc() if sortOrder == "asc" else col.desc()
-
-    if sortBy == "priority":
-        query = query.order_by(order_func(priority_order))
-    elif sortBy == "status":
-        query = query.order_by(order_func(status_order))
-    else:
-        query = query.order_by(order_func(models.Incident.created_at))
+    logger.info("User id=%s exporting incidents as %s", current_user.id, fmt)
+    return incident_export.response(incident_export.stream(database.engine, statement, params, fmt), fmt)
 
-    # Pagination
-    offset = (page - 1) * page_size
-    query = query.offset(offset).limit(page_size)
 
-    return query.all()
+def read_changes(db: Session, current_user, since: Optional[int], limit: int):
+    if since is None:
+        return {"changes": [], "cursor": db.execute(change_queries.latest_cursor()).scalar(), "has_more": False}
+    change_queries.check_cursor(since, db.execute(change_queries.oldest_cursor()).scalar())
+    query = change_queries.changes_since(current_user, since, limit)
+    return query.shape(db.execute(query.statement, query.params).all())
 
 
+@router.get("/changes", response_model=IncidentChangeFeed)
+def get_incident_changes(
+    since: Optional[int] = Query(None, ge=0, description="Cursor from a previous response; omit to get the current cursor"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum log entries to read"),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Incidents created, changed or removed from the user's scope since the cursor; 410 once the cursor has been pruned."""
+    return read_changes(db, current_user, since, limit)
+
+
+class IncidentListQuery:
+    """The GET /incidents/ query parameters."""
+
+    def __init__(
+        self,
+        status: Optional[List[str]] = Query(None),
+        priority: Optional[List[str]] = Query(None),
+        category: Optional[List[str]] = Query(None, description="Filter by categories"),
+        startDate: Optional[str] = Query(None, description="Filter incidents from this date YYYY-MM-DD"),
+        search: Optional[str] = None,
+        sortBy: Optional[str] = Query("created_at", description="Sort by: created_at, priority, status"),
+        sortOrder: Optional[str] = Query("desc", description="Sort order: asc or desc"),
+        page: int = Query(1, ge=1, description="Page number"),
+        page_size: int = Query(10, ge=1, le=100, description="Number of incidents per page"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces page"),
+        include: Optional[str] = Query(None, description="Comma-separated: total, facets. Wraps the page as {items, total, facets}"),
+        fields: Optional[str] = Query(None, description="Comma-separated incident fields to return, e.g. id,title,status; id is always included"),
+        include_archived: bool = Query(False, description="Also return solved incidents moved to the archive")
+    ):
+        self.status = status
+        self.priority = priority
+        self.category = category
+        self.startDate = startDate
+        self.search = search
+        self.sortBy = sortBy
+        self.sortOrder = sortOrder
+        self.page = page
+        self.page_size = page_size
+        self.cursor = cursor
+        self.include = include
+        self.fields = fields
+        self.include_archived = include_archived
+
+
+def list_incidents(db: Session, request: Request, response: Response, current_user, params: IncidentListQuery):
+    include = incident_queries.parse_include(params.include)
+    fields = incident_queries.parse_fields(params.fields)
+    page_size, include_archived = params.page_size, params.include_archived
+
+    # unchanged since the client's copy: skip the list query
+    version = db.execute(*change_queries.scope_version(current_user)).scalar()
+    etag = etags.make_etag("incidents", current_user.id, current_user.role, version, etags.query_key(request))
+    not_modified = etags.conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    # filters, role scope and search; statements are cached per shape
+    sort_by, sort_order = incident_queries.normalize_sort(params.sortBy, params.sortOrder)
+    where = incident_queries.list_filter(current_user, params.status, params.priority, params.category, params.search)
 
-@router.delete("/{incident_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_incident(
-    incident_id: int,
+    # date filter
+    if params.startDate:
+        date_obj = incident_queries.parse_start_date(params.startDate)
+        on_date = incident_queries.on_date(where, date_obj)
+        # EXISTS probe: only whether anything was created that day matters
+        if db.execute(*incident_queries.exists_query(on_date.without_search(), include_archived)).scalar():
+            where = on_date
+        else:
+            where = incident_queries.since_date(where, date_obj)
+
+    # Sort and page (Core rows, serialized with orjson below); archived
+    # incidents are merged in from incidents_archive
+    page_query, key_of = incident_queries.page_query(where, fields, sort_by, sort_order, params.page, page_size, params.cursor, include_archived)
+    incidents = db.execute(*page_query).all()
+
+    token = next_cursor(incidents, page_size, sort_by, sort_order, key_of)
+    if token:
+        response.headers["X-Next-Cursor"] = token
+    items = fast_json.rows_to_dicts(incidents[:page_size], fields or incident_queries.INCIDENT_FIELDS)
+    if not include:
+        return fast_json.response(items, response)
+
+    # total and facets for the same filters, from one grouped query (per table)
+    rows = []
+    for facets in incident_queries.facet_queries(where, include_archived):
+        rows += db.execute(*facets).all()
+    counts = incident_queries.shape_counts(rows, include)
+    return fast_json.response({"items": items, **counts}, response)
+
+
+@router.get("/", response_model=Union[List[IncidentRead], List[IncidentFields], IncidentPage], response_model_exclude_unset=True)
+def get_incidents(
+    request: Request,
+    response: Response,
+    db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    request_id: str = Depends(get_request_id)
+    params: IncidentListQuery = Depends()
 ):
-    logger.info(f"[RequestID={request_id}] User email={current_user.email}, id={current_user.id} attempting to delete incident with ID: {incident_id}")
+    return list_incidents(db, request, response, current_user, params)
+
+
+def remove_incident(db: Session, incident_id: int, current_user):
+    logger.info("User email=%s, id=%s attempting to delete incident with ID: %s", current_user.email, current_user.id, incident_id)
     try:
-        incident = db.query(models.Incident).filter(models.Incident.id == incident_id).first()
+        incident = db.execute(select(models.Incident).where(models.Incident.id == incident_id)).scalars().first()
         if not incident:
-            logger.warning(f"[RequestID={request_id}] Incident not found with ID: {incident_id}")
+            logger.warning("Incident not found with ID: %s", incident_id)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Incident not found")
+        before = incident.snapshot()
         db.delete(incident)
+        incident_writes.record_deleted(db, before)
         db.commit()
-        logger.info(f"[RequestID={request_id}] Deleted incident successfully with ID: {incident_id} by user ID={current_user.id}")
+        logger.info("Deleted incident successfully with ID: %s by user ID=%s", incident_id, current_user.id)
         return None
     except Exception:
-        logger.exception(f"[RequestID={request_id}] Error deleting incident with ID: {incident_id} by user ID={current_user.id}")
+        logger.exception("Error deleting incident with ID: %s by user ID=%s", incident_id, current_user.id)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting incident")
 
 
-@router.get("/search", response_model=List[IncidentRead], status_code=status.HTTP_200_OK)
-def search_incidents(
-    q: str = Query(..., min_length=1),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(10, gt=0),
-    db: Session = Depends(get_db),
+@router.delete("/{incident_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_incident(
+    incident_id: int,
     current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
+    return remove_incident(db, incident_id, current_user)
+
+
+def find_incidents(db: Session, current_user, q: str, skip: int, limit: int, fields):
+    fields = incident_queries.parse_fields(fields)
     try:
-        incidents = (
-            db.query(models.Incident)
-            .filter(
-                models.Incident.title.ilike(f"%{q}%"),
-                models.Incident.description.ilike(f"%{q}%") | models.Incident.title.ilike(f"%{q}%")
+        rows = db.execute(*incident_queries.search_query(current_user, q, fields, skip, limit)).all()
+        if fields:
+            return [
+                dict(
+                    incident_queries.project(incident, fields),
+                    rank=rank,
+                    title_highlight=fulltext.to_html(title),
+                    snippet=fulltext.to_html(snippet)
+                )
+                for incident, rank, title, snippet in rows
+            ]
+        return [
+            IncidentSearchResult(
+                **IncidentRead.model_validate(incident).model_dump(),
+                rank=rank,
+                title_highlight=fulltext.to_html(title),
+                snippet=fulltext.to_html(snippet)
             )
-            .order_by(models.Incident.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-        return incidents
+            for incident, rank, title, snippet in rows
+        ]
     except Exception:
-        logger.exception(f"[RequestID=N/A] Error searching incidents")
+        logger.exception("Error searching incidents")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error searching incidents")
 
-ALLOWED_STATUSES = [status.value for status in IncidentStatus]
 
-@router.patch("/{incident_id}/status", response_model=IncidentRead)
-def update_incident_status(
-    incident_id: int,
-    new_status: IncidentStatus = Query(..., description="New status for the incident"),
-    current_user: models.User = Depends(get_current_user),
+@router.get("/search", response_model=Union[List[IncidentSearchResult], List[IncidentSearchFields]], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def search_incidents(
+    q: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, gt=0),
+    fields: Optional[str] = Query(None, description="Comma-separated incident fields to return; rank, title_highlight and snippet are always included"),
     db: Session = Depends(get_db),
-    request_id: str = Depends(get_request_id)
+    current_user: models.User = Depends(get_current_user),
 ):
+    return find_incidents(db, current_user, q, skip, limit, fields)
+
+ALLOWED_STATUSES = [status.value for status in IncidentStatus]
+
+def set_status(db: Session, incident_id: int, new_status: IncidentStatus, current_user):
     if not current_user.role.startswith("admin_"):
         raise HTTPException(status_code=403, detail="Only sector admins can change incident status")
 
-    incident = db.query(models.Incident).filter(models.Incident.id == incident_id).first()
+    incident = db.execute(select(models.Incident).where(models.Incident.id == incident_id)).scalars().first()
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
 
+    before = incident.snapshot()
+
     # if solved set resolver_id
     if new_status == IncidentStatus.solved:
         incident.resolver_id = current_user.id
@@ -220,12 +296,23 @@ def update_incident_status(
     incident.status = new_status.value
 
     try:
+        db.flush()
+        incident_writes.record_changed(db, before, incident.snapshot())
         db.commit()
         db.refresh(incident)
-        logger.info(f"[RequestID={request_id}] Incident {incident_id} status updated to {new_status.value} by user {current_user.id}")
+        logger.info("Incident %s status updated to %s by user %s", incident_id, new_status.value, current_user.id)
         return incident
     except Exception as e:
         db.rollback()
-        logger.exception(f"[RequestID={request_id}] Failed to update incident status: {e}")
+        logger.exception("Failed to update incident status: %s", e)
         raise HTTPException(status_code=500, detail="Failed to update incident status")
 
+
+@router.patch("/{incident_id}/status", response_model=IncidentRead)
+def update_incident_status(
+    incident_id: int,
+    new_status: IncidentStatus = Query(..., description="New status for the incident"),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return set_status(db, incident_id, new_status, current_user)
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from jose import JWTError
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.utils.incident_events import broker, to_sse, CLOSED
+from app.utils.logger import logger
+from app.utils.token import decode_token, get_user_by_email, create_stream_ticket, STREAM_TICKET, STREAM_TICKET_SECONDS
+
+# Live incident events for dashboards, shared by both DB modes. Connections
+# stay open for a long time, so they authenticate once up front and hold no
+# database session while idle. Browsers open them with a short-lived stream
+# ticket instead of their access token; a user whose account changes has
+# their streams closed (see token.invalidate_user) and must reconnect.
+
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "25"))
+
+router = APIRouter(
+    prefix="/incidents",
+    tags=["Incidents"]
+)
+
+
+def _load_user(token: str, purpose: Optional[str]):
+    db = SessionLocal()
+    try:
+        email = decode_token(token, purpose=purpose).get("sub")
+        return get_user_by_email(db, email) if email else None
+    except JWTError:
+        return None
+    finally:
+        db.close()
+
+
+async def authenticate(headers, ticket: Optional[str] = None):
+    # an access token in the Authorization header, or a stream ticket for
+    # EventSource and browser WebSockets, which cannot set headers
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return await run_in_threadpool(_load_user, authorization[7:], None)
+    if ticket:
+        return await run_in_threadpool(_load_user, ticket, STREAM_TICKET)
+    return None
+
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+
+@router.post("/stream/ticket")
+async def create_incident_stream_ticket(request: Request):
+    """A ticket for ?ticket= on /incidents/stream, valid for STREAM_TICKET_SECONDS."""
+    user = await authenticate(request.headers)
+    if user is None:
+        raise _unauthorized()
+    return {"ticket": create_stream_ticket(user.email), "expires_in": STREAM_TICKET_SECONDS}
+
+
+@router.get("/stream")
+async def stream_incident_events(request: Request, ticket: Optional[str] = Query(None)):
+    """Server-sent events: created, status_changed and deleted incidents the user can see."""
+    user = await authenticate(request.headers, ticket)
+    if user is None:
+        raise _unauthorized()
+
+    subscriber = broker.subscribe(user)
+    logger.info("User id=%s subscribed to incident events (sse)", user.id)
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event = await subscriber.get(EVENT_KEEPALIVE_SECONDS)
+                if event is CLOSED:
+                    break
+                yield to_sse(event) if event else ": keepalive\n\n"
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/stream")
+async def incident_events_socket(websocket: WebSocket, ticket: Optional[str] = Query(None)):
+    """The same events as JSON text frames."""
+    user = await authenticate(websocket.headers, ticket)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = broker.subscribe(user)
+    logger.info("User id=%s subscribed to incident events (websocket)", user.id)
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    closed = asyncio.create_task(wait_for_disconnect())
+    try:
+        while True:
+            next_event = asyncio.create_task(subscriber.get(EVENT_KEEPALIVE_SECONDS))
+            await asyncio.wait({closed, next_event}, return_when=asyncio.FIRST_COMPLETED)
+            if closed.done():
+                next_event.cancel()
+                break
+            event = next_event.result()
+            if event is CLOSED:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                break
+            if event:
+                await websocket.send_text(json.dumps(event))
+    finally:
+        closed.cancel()
+        broker.unsubscribe(subscriber)
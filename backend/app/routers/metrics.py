@@ -0,0 +1,68 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.queries import scope as role_scope
+from app.utils import logger as app_logging, archival
+from app.utils.hashing import hash_pool
+from app.utils.incident_events import broker
+from app.utils.metrics import request_metrics, render_families
+from app.utils.stats_cache import stats_cache
+from app.utils.token import token_cache, user_cache
+
+router = APIRouter(tags=["Admin"])
+
+
+def _process_families() -> list:
+    # counters kept by the app's own pools, caches and background jobs
+    hashes = hash_pool.stats()
+    caches = {"token": token_cache.stats(), "user": user_cache.stats(), "stats": stats_cache.stats()}
+    statements = role_scope.stats()
+    logs = app_logging.stats()
+    archive = archival.stats()
+    last_run = archive["last_run"]
+
+    def one(value):
+        return [({}, value)]
+
+    def per_cache(field):
+        return [({"cache": name}, stats[field]) for name, stats in caches.items() if field in stats]
+
+    return [
+        ("password_hash_workers", "gauge", "Password hashing worker threads.", one(hashes["workers"])),
+        ("password_hash_queue_limit", "gauge", "Hashes that may wait before requests get a 503.", one(hashes["max_queue"])),
+        ("password_hash_queued", "gauge", "Hashes waiting for a worker.", one(hashes["queued"])),
+        ("password_hash_queued_max", "gauge", "Most hashes seen waiting at once.", one(hashes["max_queued"])),
+        ("password_hash_running", "gauge", "Hashes being computed.", one(hashes["running"])),
+        ("password_hash_completed_total", "counter", "Hashes computed.", one(hashes["completed"])),
+        ("password_hash_rejected_total", "counter", "Hashes rejected because the queue was full.", one(hashes["rejected"])),
+        ("password_hash_wait_seconds_avg", "gauge", "Average time a hash waited for a worker.", one(hashes["avg_wait_seconds"])),
+        ("password_hash_wait_seconds_max", "gauge", "Longest time a hash waited for a worker.", one(hashes["max_wait_seconds"])),
+        ("app_cache_entries", "gauge", "Entries held per in-process cache.", per_cache("size")),
+        ("app_cache_max_entries", "gauge", "Entry limit per in-process cache.", per_cache("maxsize")),
+        ("app_cache_hits_total", "counter", "Cache lookups that found a live entry.", per_cache("hits")),
+        ("app_cache_misses_total", "counter", "Cache lookups that found nothing.", per_cache("misses")),
+        ("app_cache_evictions_total", "counter", "Entries evicted by writes.", per_cache("evictions")),
+        ("statement_cache_statements", "gauge", "Role-scoped statements built and cached.", one(statements["statements"])),
+        ("statement_cache_hits_total", "counter", "Statement builds served from the cache.", one(statements["hits"])),
+        ("statement_cache_misses_total", "counter", "Statements built.", one(statements["misses"])),
+        ("incident_event_subscribers", "gauge", "Open incident event streams.", one(broker.subscriber_count())),
+        ("incident_events_published_total", "counter", "Incident events published to streams.", one(broker.published)),
+        ("log_queue_records", "gauge", "Log records waiting for the log writer.", one(logs["queued"])),
+        ("log_queue_size", "gauge", "Log records the queue holds before dropping new ones.", one(logs["queue_size"])),
+        ("log_records_dropped_total", "counter", "Log records dropped because the queue was full.", one(logs["dropped"])),
+        ("log_records_sampled_out_total", "counter", "Log records dropped by LOG_SAMPLING.", one(logs["sampled_out"])),
+        ("archive_job_running", "gauge", "1 while the archival job is scheduled.", one(archive["running"])),
+        ("archive_last_run_timestamp_seconds", "gauge", "When the archival job last finished.",
+         one(last_run["at"].timestamp()) if last_run["at"] else []),
+        ("archive_last_run_archived", "gauge", "Incidents the last archival run moved.", one(last_run["archived"])),
+        ("archive_last_run_pruned_changes", "gauge", "Change log rows the last archival run pruned.", one(last_run["pruned_changes"])),
+        ("archive_last_run_seconds", "gauge", "How long the last archival run took.", one(last_run["seconds"])),
+        ("archive_last_run_failed", "gauge", "1 when the last archival run raised.", one(last_run["error"] is not None)),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    # Prometheus text exposition format 0.0.4
+    body = request_metrics.render() + render_families(_process_families())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+import logging
+from contextlib import contextmanager
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
-from sqlalchemy import or_
+from typing import List, Optional
+from sqlalchemy import or_, select
 
 from app.models import User
 from app.database import get_db
 from app.schemas import UserRead, UserCreate, UserUpdate
 from app.utils.dependencies import get_current_system_admin
-from app.utils import hashing
+from app.utils import hashing, fast_json
+from app.utils.token import invalidate_user, user_changing
 from app.schemas.user import SignupResponse
 from app.utils.logger import logger
 
@@ -16,93 +19,179 @@ router = APIRouter(
     tags=["users"],
 )
 
-def get_request_id(request: Request):
-    return request.headers.get("X-Request-ID", "N/A")
+# the user list is read as Core rows and serialized with orjson
+USER_READ_FIELDS = tuple(UserRead.model_fields)
+USER_READ_COLUMNS = [User.__table__.c[name] for name in USER_READ_FIELDS]
 
+# Endpoint bodies shared with the aio router, which runs them on its
+# AsyncSession with run_sync; password hashing stays in the routers.
 
 
+@contextmanager
+def write_errors(detail: str, message: str, *args):
+    """Turn hashing-pool overload into 503 and unexpected errors into 500."""
+    try:
+        yield
+    except hashing.HashPoolBusy:
+        logger.warning("Password hashing queue full")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception(message, *args)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail)
+
+
+def list_users(db: Session, current_admin, skip: int, limit: int):
+    logger.info("Fetching users by admin: email=%s, id=%s, skip=%s, limit=%s", current_admin.email, current_admin.id, skip, limit)
+    try:
+        users = db.execute(
+            select(*USER_READ_COLUMNS).where(User.is_active == True).offset(skip).limit(limit)
+        ).all()
+        logger.info("Fetched %s users", len(users))
+        return fast_json.response(fast_json.rows_to_dicts(users, USER_READ_FIELDS))
+    except Exception:
+        logger.exception("Error fetching system users")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch users")
+
+
+def check_new_user(db: Session, user: UserCreate):
+    existing_user = db.execute(select(User).where(User.email == user.email)).scalars().first()
+    if existing_user:
+        logger.warning("User creation failed: email %s already exists", user.email)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
+
+    if user.role.startswith("admin") and not user.sector:
+        logger.warning("Admin role requires sector")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Admin role requires sector")
+
+    if user.role.startswith("admin") and user.sector not in ["Hardware", "Software", "Network", "Security"]:
+        logger.warning("Invalid sector: %s", user.sector)
+        raise HTTPException(status_code=400, detail="Sector must be one of: Hardware, Software, Network, Security")
+
+
+def insert_user(db: Session, user: UserCreate, hashed_pw: str) -> SignupResponse:
+    new_user = User(
+        name=user.name,
+        email=user.email,
+        password=hashed_pw,
+        role=user.role,
+        sector=user.sector,
+        is_active=True
+    )
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    logger.info("User created successfully with ID: %s, email=%s", new_user.id, new_user.email)
+    return SignupResponse(message="User created successfully", user_id=new_user.id)
+
+
+def deactivate_user(db: Session, user_id: int, current_admin):
+    logger.info("Deleting user ID: %s by admin: email=%s, id=%s", user_id, current_admin.email, current_admin.id)
+    try:
+        user = db.execute(select(User).where(User.id == user_id, User.is_active == True)).scalars().first()
+        if not user:
+            logger.warning("User not found with ID: %s", user_id)
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        user.is_active = False
+        user_changing(user.email)
+        db.commit()
+        invalidate_user(user.email)
+        logger.info("User deleted successfully: ID=%s, email=%s", user.id, user.email)
+        return {"message": "User deleted successfully"}
+    except Exception:
+        logger.exception("Error deleting user with ID: %s", user_id)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting user")
+
+
+def user_to_update(db: Session, user_id: int, user_data: UserUpdate) -> User:
+    user = db.execute(select(User).where(User.id == user_id, User.is_active == True)).scalars().first()
+    if not user:
+        logger.warning("User not found with ID: %s", user_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    if user_data.email and user_data.email != user.email:
+        existing_user = db.execute(select(User).where(User.email == user_data.email)).scalars().first()
+        if existing_user:
+            logger.warning("Email update failed: %s already exists", user_data.email)
+            raise HTTPException(status_code=400, detail="Email already exists")
+    return user
+
+
+def apply_update(db: Session, user: User, user_data: UserUpdate, hashed_pw: Optional[str]) -> User:
+    previous_email = user.email
+    if user_data.name:
+        user.name = user_data.name
+    if user_data.email:
+        user.email = user_data.email
+    if user_data.role:
+        user.role = user_data.role
+    if user_data.sector:
+        user.sector = user_data.sector
+    if hashed_pw:
+        user.password = hashed_pw
+
+    user_changing(previous_email, user.email)
+    db.commit()
+    invalidate_user(previous_email, user.email)
+    db.refresh(user)
+    logger.info("User updated successfully: ID=%s, email=%s", user.id, user.email)
+    return user
+
+
+def find_users(db: Session, current_admin, q: str, skip: int, limit: int):
+    logger.info("Searching users: query='%s', admin email=%s, id=%s, skip=%s, limit=%s", q, current_admin.email, current_admin.id, skip, limit)
+    try:
+        users = db.execute(
+            select(User).where(
+                User.is_active == True,
+                or_(
+                    User.name.ilike(f"%{q}%"),
+                    User.email.ilike(f"%{q}%"),
+                    User.role.ilike(f"%{q}%"),
+                    User.sector.ilike(f"%{q}%"),
+                )
+            ).offset(skip).limit(limit)
+        ).scalars().all()
+        logger.info("Search returned %s users", len(users))
+        return users
+    except Exception:
+        logger.exception("Error searching users")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error searching users")
+
 
 @router.get("/", response_model=List[UserRead])
 def get_system_users(
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_system_admin),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, gt=0),
-    request_id: str = Depends(get_request_id)
+    limit: int = Query(10, gt=0)
 ):
-    logger.info(f"[RequestID={request_id}] Fetching users by admin: email={current_admin.email}, id={current_admin.id}, skip={skip}, limit={limit}")
-    try:
-        users = db.query(User).filter(User.is_active == True).offset(skip).limit(limit).all()
-        logger.info(f"[RequestID={request_id}] Fetched {len(users)} users")
-        return users
-    except Exception:
-        logger.exception(f"[RequestID={request_id}] Error fetching system users")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch users")
+    return list_users(db, current_admin, skip, limit)
 
 
 @router.post("/create", response_model=SignupResponse, status_code=status.HTTP_201_CREATED)
 def create_user(
     user: UserCreate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_system_admin),
-    request_id: str = Depends(get_request_id)
+    current_admin: User = Depends(get_current_system_admin)
 ):
-    logger.info(f"[RequestID={request_id}] Creating user by admin: email={current_admin.email}, id={current_admin.id}, new user email={user.email}, role={user.role}, sector={user.sector}")
-    logger.debug(f"[RequestID={request_id}] Full user input (without password): { {k:v for k,v in user.dict().items() if k != 'password'} }")
-    try:
-        existing_user = db.query(User).filter(User.email == user.email).first()
-        if existing_user:
-            logger.warning(f"[RequestID={request_id}] User creation failed: email {user.email} already exists")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-        
-        if user.role.startswith("admin") and not user.sector:
-            logger.warning(f"[RequestID={request_id}] Admin role requires sector")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Admin role requires sector")
-        
-        if user.role.startswith("admin") and user.sector not in ["Hardware", "Software", "Network", "Security"]:
-            logger.warning(f"[RequestID={request_id}] Invalid sector: {user.sector}")
-            raise HTTPException(status_code=400, detail="Sector must be one of: Hardware, Software, Network, Security")
-        
-        hashed_pw = hashing.hash_password(user.password)
-        new_user = User(
-            name=user.name,
-            email=user.email,
-            password=hashed_pw,
-            role=user.role,
-            sector=user.sector,
-            is_active=True
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        logger.info(f"[RequestID={request_id}] User created successfully with ID: {new_user.id}, email={new_user.email}")
-        return SignupResponse(message="User created successfully", user_id=new_user.id)
-    except Exception:
-        logger.exception(f"[RequestID={request_id}] Error creating user")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
+    logger.info("Creating user by admin: email=%s, id=%s, new user email=%s, role=%s, sector=%s", current_admin.email, current_admin.id, user.email, user.role, user.sector)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Full user input (without password): %s", user.model_dump(exclude={"password"}))
+    with write_errors("Failed to create user", "Error creating user"):
+        check_new_user(db, user)
+        return insert_user(db, user, hashing.hash_password_pooled(user.password))
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_200_OK)
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_system_admin),
-    request_id: str = Depends(get_request_id)
+    current_admin: User = Depends(get_current_system_admin)
 ):
-    logger.info(f"[RequestID={request_id}] Deleting user ID: {user_id} by admin: email={current_admin.email}, id={current_admin.id}")
-    try:
-        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-        if not user:
-            logger.warning(f"[RequestID={request_id}] User not found with ID: {user_id}")
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-        
-        user.is_active = False
-        db.commit()
-        logger.info(f"[RequestID={request_id}] User deleted successfully: ID={user.id}, email={user.email}")
-        return {"message": "User deleted successfully"}
-    except Exception:
-        logger.exception(f"[RequestID={request_id}] Error deleting user with ID: {user_id}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting user")
+    return deactivate_user(db, user_id, current_admin)
 
 
 @router.put("/{user_id}", response_model=UserRead)
@@ -110,41 +199,15 @@ def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_system_admin),
-    request_id: str = Depends(get_request_id)
+    current_admin: User = Depends(get_current_system_admin)
 ):
-    logger.info(f"[RequestID={request_id}] Updating user ID: {user_id} by admin: email={current_admin.email}, id={current_admin.id}")
-    logger.debug(f"[RequestID={request_id}] Update payload (without password): { {k:v for k,v in user_data.dict().items() if k != 'password'} }")
-    try:
-        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-        if not user:
-            logger.warning(f"[RequestID={request_id}] User not found with ID: {user_id}")
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-        
-        if user_data.email and user_data.email != user.email:
-            existing_user = db.query(User).filter(User.email == user_data.email).first()
-            if existing_user:
-                logger.warning(f"[RequestID={request_id}] Email update failed: {user_data.email} already exists")
-                raise HTTPException(status_code=400, detail="Email already exists")
-        
-        if user_data.name:
-            user.name = user_data.name
-        if user_data.email:
-            user.email = user_data.email
-        if user_data.role:
-            user.role = user_data.role
-        if user_data.sector:
-            user.sector = user_data.sector
-        if user_data.password:
-            user.password = hashing.hash_password(user_data.password)
-        
-        db.commit()
-        db.refresh(user)
-        logger.info(f"[RequestID={request_id}] User updated successfully: ID={user.id}, email={user.email}")
-        return user
-    except Exception:
-        logger.exception(f"[RequestID={request_id}] Error updating user with ID: {user_id}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating user")
+    logger.info("Updating user ID: %s by admin: email=%s, id=%s", user_id, current_admin.email, current_admin.id)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Update payload (without password): %s", user_data.model_dump(exclude={"password"}))
+    with write_errors("Error updating user", "Error updating user with ID: %s", user_id):
+        user = user_to_update(db, user_id, user_data)
+        hashed_pw = hashing.hash_password_pooled(user_data.password) if user_data.password else None
+        return apply_update(db, user, user_data, hashed_pw)
 
 
 @router.get("/search", response_model=List[UserRead], status_code=status.HTTP_200_OK)
@@ -153,25 +216,9 @@ def search_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, gt=0),
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_system_admin),
-    request_id: str = Depends(get_request_id)
+    current_admin: User = Depends(get_current_system_admin)
 ):
-    logger.info(f"[RequestID={request_id}] Searching users: query='{q}', admin email={current_admin.email}, id={current_admin.id}, skip={skip}, limit={limit}")
-    try:
-        users = db.query(User).filter(
-            User.is_active == True,
-            or_(
-                User.name.ilike(f"%{q}%"),
-                User.email.ilike(f"%{q}%"),
-                User.role.ilike(f"%{q}%"),
-                User.sector.ilike(f"%{q}%"),
-            )
-        ).offset(skip).limit(limit).all()
-        logger.info(f"[RequestID={request_id}] Search returned {len(users)} users")
-        return users
-    except Exception:
-        logger.exception(f"[RequestID={request_id}] Error searching users")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error searching users")
+    return find_users(db, current_admin, q, skip, limit)
 
 
 
@@ -1,6 +1,13 @@
 from .incident import (
     IncidentCreate,
     IncidentRead,
+    IncidentSearchResult,
+    IncidentFields,
+    IncidentSearchFields,
+    IncidentFacets,
+    IncidentPage,
+    IncidentChangeRead,
+    IncidentChangeFeed,
     IncidentUpdate,
     IncidentStatus,
     IncidentPriority,
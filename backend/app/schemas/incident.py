@@ -1,7 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
 # ENUMS
 
@@ -32,27 +32,27 @@ class IncidentCreate(BaseModel):
         min_length=1,
         max_length=255,
         description="Titulli i incidentit",
-        example="Printeri nuk punon"
+        examples=["Printeri nuk punon"]
     )
     description: str = Field(
         ..., 
         description="Përshkrimi i plotë i incidentit", 
-        example="Printeri në katin e dytë nuk funksionon."
+        examples=["Printeri në katin e dytë nuk funksionon."]
     )
     category: IncidentCategory = Field(
         ..., 
         description="Kategoria e incidentit", 
-        example="hardware"
+        examples=["hardware"]
     )
     priority: IncidentPriority = Field(
         ..., 
         description="Prioriteti i incidentit", 
-        example="high"
+        examples=["high"]
     )
     reporter_id: int = Field(
         ..., 
         description="ID e përdoruesit që ka raportuar incidentin", 
-        example=1
+        examples=[1]
     )
 
 # READ SCHEMA
@@ -69,16 +69,71 @@ class IncidentRead(BaseModel):
     reporter_id: int
     resolver_id: Optional[int] = None
 
-    class Config:
-        from_attributes = True  
+    model_config = ConfigDict(from_attributes=True)
+
+# SEARCH RESULT SCHEMA
+
+class IncidentSearchResult(IncidentRead):
+    rank: Optional[float] = None
+    title_highlight: Optional[str] = None
+    snippet: Optional[str] = None
 
 # UPDATE SCHEMA
 
 
 class IncidentUpdate(BaseModel):
-    title: Optional[str] = Field(None, description="Titulli i ri i incidentit", example="Probleme me internetin")
-    description: Optional[str] = Field(None, description="Përshkrimi i përditësuar", example="Internet i ngadalshëm në zyren A3")
-    category: Optional[IncidentCategory] = Field(None, description="Kategoria e përditësuar", example="network")
-    status: Optional[IncidentStatus] = Field(None, description="Statusi i ri", example="in_progress")
-    priority: Optional[IncidentPriority] = Field(None, description="Prioriteti i ri", example="critical")
-    resolver_id: Optional[int] = Field(None, description="ID e personit që po e zgjidh", example=3)
+    title: Optional[str] = Field(None, description="Titulli i ri i incidentit", examples=["Probleme me internetin"])
+    description: Optional[str] = Field(None, description="Përshkrimi i përditësuar", examples=["Internet i ngadalshëm në zyren A3"])
+    category: Optional[IncidentCategory] = Field(None, description="Kategoria e përditësuar", examples=["network"])
+    status: Optional[IncidentStatus] = Field(None, description="Statusi i ri", examples=["in_progress"])
+    priority: Optional[IncidentPriority] = Field(None, description="Prioriteti i ri", examples=["critical"])
+    resolver_id: Optional[int] = Field(None, description="ID e personit që po e zgjidh", examples=[3])
+
+
+# SPARSE FIELDS SCHEMAS (fields=): any subset of the read schema
+
+class IncidentFields(BaseModel):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[IncidentCategory] = None
+    status: Optional[IncidentStatus] = None
+    priority: Optional[IncidentPriority] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    reporter_id: Optional[int] = None
+    resolver_id: Optional[int] = None
+
+
+class IncidentSearchFields(IncidentFields):
+    rank: Optional[float] = None
+    title_highlight: Optional[str] = None
+    snippet: Optional[str] = None
+
+
+# PAGE WITH COUNTS SCHEMA
+
+class IncidentFacets(BaseModel):
+    status: Dict[str, int]
+    priority: Dict[str, int]
+    category: Dict[str, int]
+
+
+class IncidentPage(BaseModel):
+    items: List[Union[IncidentRead, IncidentFields]]
+    total: Optional[int] = None
+    facets: Optional[IncidentFacets] = None
+
+
+# CHANGE FEED SCHEMA
+
+class IncidentChangeRead(BaseModel):
+    op: str
+    id: int
+    incident: Optional[IncidentRead] = None
+
+
+class IncidentChangeFeed(BaseModel):
+    changes: List[IncidentChangeRead]
+    cursor: int
+    has_more: bool
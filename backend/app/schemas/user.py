@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from datetime import datetime
 from typing import Optional
 from app.constants import UserRole, UserSector
@@ -24,8 +24,7 @@ class UserRead(BaseModel):
     sector: Optional[str] = None  
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SignupResponse(BaseModel):
     message: str
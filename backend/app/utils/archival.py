@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, insert, delete
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import models, database
+from app.models import IncidentSnapshot
+from app.utils import incident_writes, change_log
+from app.utils.logger import logger
+
+# Hot/cold split of the incidents table. Incidents solved more than
+# ARCHIVE_AFTER_DAYS ago move, a batch per transaction, to incidents_archive:
+# the list, its indexes and the fulltext index only carry live work, while
+# include_archived=true on GET /incidents still reads both. The /stats rollup
+# keeps counting archived incidents; for the change log and the event stream
+# an archived incident leaves the list like a deleted one. Each run also
+# prunes the change log past CHANGE_LOG_RETENTION_DAYS (see change_log).
+#
+#   ARCHIVE_AFTER_DAYS        days after its last update a solved incident is archived (default 90)
+#   ARCHIVE_BATCH_SIZE        incidents moved per transaction (default 500)
+#   ARCHIVE_INTERVAL_SECONDS  pause between background runs (default 3600; 0 disables the job)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+_incidents = models.Incident.__table__
+_archive = models.IncidentArchive.__table__
+_columns = [_incidents.c[name] for name in IncidentSnapshot._fields]
+
+_last_run = {"at": None, "archived": 0, "pruned_changes": 0, "seconds": 0.0, "error": None}
+
+
+def cutoff_for(days: int = ARCHIVE_AFTER_DAYS) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def _snapshot(row) -> IncidentSnapshot:
+    return IncidentSnapshot(**dict(
+        row._mapping,
+        category=models.IncidentCategory(row.category).value,
+        status=models.IncidentStatus(row.status).value,
+        priority=models.IncidentPriority(row.priority).value,
+    ))
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move up to batch_size incidents solved before cutoff to incidents_archive in one transaction."""
+    candidates = (
+        select(*_columns)
+        .where(
+            _incidents.c.status == models.IncidentStatus.solved,
+            _incidents.c.updated_at < cutoff,
+            # implied by updated_at, but lets the (status, created_at) index bound the scan
+            _incidents.c.created_at < cutoff,
+        )
+        .order_by(_incidents.c.created_at, _incidents.c.id)
+        .limit(batch_size)
+        # concurrent runs (several workers) take disjoint batches
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(candidates).all()
+    if not rows:
+        db.rollback()
+        return 0
+
+    ids = [row.id for row in rows]
+    names = list(IncidentSnapshot._fields)
+    db.execute(insert(_archive).from_select(names, select(*_columns).where(_incidents.c.id.in_(ids))))
+    db.execute(delete(_incidents).where(_incidents.c.id.in_(ids)))
+    incident_writes.record_archived(db, *[_snapshot(row) for row in rows])
+    db.commit()
+    return len(rows)
+
+
+def archive_solved(db: Session, days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Archive everything currently due, batch by batch. Returns the number of incidents moved."""
+    cutoff = cutoff_for(days)
+    total = 0
+    while True:
+        moved = archive_batch(db, cutoff, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+def _run_once() -> int:
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    try:
+        archived = archive_solved(db)
+        pruned = change_log.prune(db)
+        _last_run.update(archived=archived, pruned_changes=pruned, error=None)
+        if archived or pruned:
+            logger.info(
+                "Archived %d solved incidents, pruned %d change log rows", archived, pruned,
+                extra={"archived": archived, "pruned_changes": pruned}
+            )
+        return archived
+    except Exception as e:
+        db.rollback()
+        _last_run.update(archived=0, pruned_changes=0, error=str(e))
+        logger.exception("Incident archival failed")
+        return 0
+    finally:
+        _last_run.update(at=datetime.now(timezone.utc), seconds=round(time.perf_counter() - started, 3))
+        db.close()
+
+
+async def _archive_loop():
+    while True:
+        # the sync engine exists in both DB modes; keep its blocking calls off the event loop
+        await run_in_threadpool(_run_once)
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+
+_task = None
+
+
+def start():
+    global _task
+    if ARCHIVE_INTERVAL_SECONDS > 0 and _task is None:
+        _task = asyncio.get_running_loop().create_task(_archive_loop())
+
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def stats() -> dict:
+    return {
+        "after_days": ARCHIVE_AFTER_DAYS,
+        "change_log_retention_days": change_log.CHANGE_LOG_RETENTION_DAYS,
+        "interval_seconds": ARCHIVE_INTERVAL_SECONDS,
+        "running": _task is not None,
+        "last_run": dict(_last_run),
+    }
@@ -0,0 +1,168 @@
+import json
+import os
+from typing import AsyncIterator, List, Tuple
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models import IncidentSnapshot
+from app.schemas.incident import IncidentCreate
+from app.utils import incident_writes
+
+# POST /incidents/bulk: items are validated one by one and inserted in batches,
+# one executemany INSERT ... RETURNING and one commit per batch.
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "50000"))
+# JSON array bodies are parsed whole, so their size is capped before reading
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(32 * 1024 * 1024)))
+# NDJSON lines are buffered until their newline arrives
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+_incidents = models.Incident.__table__
+_returning = (_incidents.c.id, _incidents.c.status, _incidents.c.created_at, _incidents.c.updated_at)
+
+
+def is_ndjson(request: Request) -> bool:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in NDJSON_TYPES
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    # split the streamed body on newlines without reading it all first; a line
+    # longer than the cap is refused before the rest of it is buffered
+    detail = f"NDJSON lines are limited to {BULK_MAX_LINE_BYTES} bytes"
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line) > BULK_MAX_LINE_BYTES:
+                raise _too_large(detail)
+            yield line
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            raise _too_large(detail)
+    yield buffer
+
+
+async def _capped_body(request: Request) -> bytes:
+    # refuse by Content-Length before reading; chunked bodies stop at the cap
+    detail = f"JSON array bodies are limited to {BULK_MAX_BYTES} bytes; send NDJSON for larger imports"
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > BULK_MAX_BYTES:
+        raise _too_large(detail)
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BULK_MAX_BYTES:
+            raise _too_large(detail)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def read_items(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """(index, decoded item) pairs from a JSON array or NDJSON body; undecodable lines yield an error."""
+    index = 0
+    if is_ndjson(request):
+        async for line in _ndjson_lines(request):
+            if not line.strip():
+                continue
+            if index >= BULK_MAX_ITEMS:
+                raise _too_large(f"At most {BULK_MAX_ITEMS} incidents per request")
+            try:
+                yield index, json.loads(line)
+            except ValueError as e:
+                yield index, ValueError(f"Invalid JSON: {e}")
+            index += 1
+        return
+
+    try:
+        items = json.loads(await _capped_body(request))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON")
+    if len(items) > BULK_MAX_ITEMS:
+        raise _too_large(f"At most {BULK_MAX_ITEMS} incidents per request")
+    for index, item in enumerate(items):
+        yield index, item
+
+
+def validate(item) -> Tuple[IncidentCreate, list]:
+    if isinstance(item, ValueError):
+        return None, [{"loc": [], "msg": str(item)}]
+    if not isinstance(item, dict):
+        return None, [{"loc": [], "msg": "Item must be a JSON object"}]
+    try:
+        return IncidentCreate(**item), None
+    except ValidationError as e:
+        return None, [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()]
+
+
+def _insert(db: Session, rows: List[dict]) -> List[IncidentSnapshot]:
+    result = db.execute(insert(_incidents).returning(*_returning, sort_by_parameter_order=True), rows)
+    snapshots = [
+        IncidentSnapshot(
+            id=r.id, category=row["category"], status=models.IncidentStatus(r.status).value,
+            priority=row["priority"], reporter_id=row["reporter_id"], resolver_id=None,
+            created_at=r.created_at, title=row["title"], description=row["description"],
+            updated_at=r.updated_at,
+        )
+        for row, r in zip(rows, result)
+    ]
+    incident_writes.record_created(db, *snapshots)
+    db.commit()
+    return snapshots
+
+
+def insert_batch(db: Session, batch: List[Tuple[int, IncidentCreate]]) -> List[dict]:
+    """Insert a batch in one transaction; if it fails, retry item by item to find the bad rows."""
+    rows = [dict(item.model_dump(), category=item.category.value, priority=item.priority.value) for _, item in batch]
+    try:
+        snapshots = _insert(db, rows)
+        return [{"index": index, "id": s.id} for (index, _), s in zip(batch, snapshots)]
+    except SQLAlchemyError:
+        db.rollback()
+        if len(batch) == 1:
+            return [{"index": batch[0][0], "errors": [{"loc": [], "msg": "Could not store incident"}]}]
+
+    results = []
+    for entry in batch:
+        results.extend(insert_batch(db, [entry]))
+    return results
+
+
+def summary(results: List[dict]) -> dict:
+    results.sort(key=lambda r: r["index"])
+    created = sum(1 for r in results if "id" in r)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+async def ingest(request: Request, run_batch) -> dict:
+    """
+    Validate the request items and hand full batches to run_batch, an awaitable
+    wrapper around insert_batch for the caller's session type.
+    """
+    results, batch = [], []
+    async for index, item in read_items(request):
+        incident, errors = validate(item)
+        if errors:
+            results.append({"index": index, "errors": errors})
+            continue
+        batch.append((index, incident))
+        if len(batch) >= BULK_BATCH_SIZE:
+            results.extend(await run_batch(batch))
+            batch = []
+    if batch:
+        results.extend(await run_batch(batch))
+    return summary(results)
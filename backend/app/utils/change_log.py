@@ -0,0 +1,88 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, delete, func
+from sqlalchemy.orm import Session
+
+from app.models import IncidentChange, IncidentSnapshot
+
+# Writes the incident_changes rows for a transaction. Called from
+# incident_writes with the same (type, before, after) tuples as the events.
+# Rows older than CHANGE_LOG_RETENTION_DAYS are pruned by the background job
+# in app/utils/archival; GET /incidents/changes answers 410 to cursors from
+# before the oldest row left, so those clients reload instead.
+#
+#   CHANGE_LOG_RETENTION_DAYS  days of changes kept for delta sync (default 30; 0 keeps everything)
+
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+PRUNE_BATCH_SIZE = 5000
+
+UPSERT, DELETE = "upsert", "delete"
+
+# any constant works; it only has to be the same for every writer
+_POSTGRES_LOCK_ID = 0x1C1DE27
+
+_changes = IncidentChange.__table__
+
+
+def _row(op: str, s: IncidentSnapshot) -> dict:
+    return {
+        "incident_id": s.id, "op": op, "category": s.category,
+        "reporter_id": s.reporter_id, "resolver_id": s.resolver_id,
+    }
+
+
+def _scope(s: IncidentSnapshot) -> tuple:
+    return (s.category, s.reporter_id, s.resolver_id)
+
+
+def rows_for(changes) -> list:
+    rows = []
+    for _, before, after in changes:
+        if after is None:
+            rows.append(_row(DELETE, before))
+            continue
+        if before is not None and _scope(before) != _scope(after):
+            # tombstone for subscribers that only saw the old scope
+            rows.append(_row(DELETE, before))
+        rows.append(_row(UPSERT, after))
+    return rows
+
+
+def record(db: Session, changes):
+    rows = rows_for(changes)
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        # hold seq order = commit order: without it a reader could see seq 11
+        # committed, move its cursor past it, and miss seq 10 committing later
+        db.execute(select(func.pg_advisory_xact_lock(_POSTGRES_LOCK_ID)))
+    db.execute(insert(_changes), rows)
+
+
+def prune_batch(db: Session, cutoff: datetime, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+    """Delete up to batch_size of the oldest rows logged before cutoff in one transaction."""
+    # the newest row always stays: its seq is where the feed resumes
+    newest = select(func.max(_changes.c.seq)).scalar_subquery()
+    oldest = (
+        select(_changes.c.seq)
+        .where(_changes.c.changed_at < cutoff, _changes.c.seq < newest)
+        .order_by(_changes.c.seq)
+        .limit(batch_size)
+    )
+    pruned = db.execute(delete(_changes).where(_changes.c.seq.in_(oldest))).rowcount
+    db.commit()
+    return pruned
+
+
+def prune(db: Session, days: int = CHANGE_LOG_RETENTION_DAYS, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+    """Delete changes logged more than days ago, batch by batch. Returns the number of rows deleted."""
+    if days <= 0:
+        return 0
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    total = 0
+    while True:
+        pruned = prune_batch(db, cutoff, batch_size)
+        total += pruned
+        if pruned < batch_size:
+            return total
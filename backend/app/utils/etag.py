@@ -0,0 +1,38 @@
+from hashlib import blake2b
+
+from fastapi import Request, Response
+
+# Conditional GET. The ETag is derived from a cheap version of what a response
+# depends on (the caller's position in the incident change log, or the user
+# row itself) plus the request parameters, so a matching If-None-Match can be
+# answered with 304 before the main query runs. Cached /stats responses keep
+# the ETag they were computed under (see routers/stats).
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    return '"%s"' % blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def query_key(request: Request) -> tuple:
+    return tuple(sorted(request.query_params.multi_items()))
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    tags = {t.strip() for t in header.split(",")}
+    tags |= {t[2:] for t in tags if t.startswith("W/")}
+    return "*" in tags or etag in tags
+
+
+def conditional(request: Request, response: Response, etag: str):
+    """Returns a 304 response when the client already has etag; otherwise tags the response."""
+    if is_fresh(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
@@ -0,0 +1,176 @@
+import html
+import os
+import re
+from typing import Optional
+
+from sqlalchemy import text, select, table, column, func, literal_column, or_, null, bindparam
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.models import Incident
+from app.utils.logger import logger
+
+# Full-text index over incident title + description.
+#  - SQLite: external-content FTS5 table kept in sync by triggers
+#  - Postgres: generated tsvector column with a GIN index
+# Other dialects (or SQLite builds without FTS5) fall back to ILIKE.
+
+FULLTEXT_LANGUAGE = os.getenv("FULLTEXT_LANGUAGE", "simple")
+
+# sentinels put around matches by the database, turned into <mark> after escaping
+_START, _STOP = "\x02", "\x03"
+
+_enabled_dialect: Optional[str] = None
+
+incidents_fts = table("incidents_fts", column("rowid"), column("title"), column("description"))
+_fts = literal_column("incidents_fts")
+_search_vector = literal_column("incidents.search_vector")
+
+SQLITE_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS incidents_fts_ai AFTER INSERT ON incidents BEGIN
+        INSERT INTO incidents_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS incidents_fts_ad AFTER DELETE ON incidents BEGIN
+        INSERT INTO incidents_fts(incidents_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS incidents_fts_au AFTER UPDATE OF title, description ON incidents BEGIN
+        INSERT INTO incidents_fts(incidents_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO incidents_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE incidents ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{FULLTEXT_LANGUAGE}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{FULLTEXT_LANGUAGE}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_incidents_search_vector ON incidents USING GIN (search_vector)",
+]
+
+
+def setup_fulltext(engine):
+    """Create the full-text index if missing; called once at startup."""
+    global _enabled_dialect
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'incidents_fts'")
+                ).first()
+                if not exists:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE incidents_fts USING fts5("
+                        "title, description, content='incidents', content_rowid='id', "
+                        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                    ))
+                    # index rows that existed before the FTS table
+                    conn.execute(text("INSERT INTO incidents_fts(incidents_fts) VALUES ('rebuild')"))
+                for ddl in SQLITE_DDL:
+                    conn.execute(text(ddl))
+            elif dialect == "postgresql":
+                for ddl in POSTGRES_DDL:
+                    conn.execute(text(ddl))
+            else:
+                logger.info("Full-text search not available for dialect %s, using ILIKE", dialect)
+                return
+        _enabled_dialect = dialect
+    except (OperationalError, ProgrammingError):
+        logger.exception("Full-text index setup failed, search falls back to ILIKE")
+
+
+def _terms(q: str):
+    return re.findall(r"\w+", q, re.UNICODE)
+
+
+def match_query(q: str) -> Optional[str]:
+    # every term must match, each as a prefix so search-as-you-type works
+    terms = _terms(q)
+    if not terms:
+        return None
+    if _enabled_dialect == "sqlite":
+        return " ".join(f'"{t}"*' for t in terms)
+    return " & ".join(f"{t}:*" for t in terms)
+
+
+ILIKE, MATCH = "ilike", "match"
+
+
+def search_mode(q: str) -> str:
+    """How q is searched: MATCH on the full-text index, or ILIKE when there is none (or no terms in q)."""
+    return MATCH if _enabled_dialect and match_query(q) is not None else ILIKE
+
+
+def search_params(q: str) -> dict:
+    # statements read the search through bound parameters, so they can be cached
+    return {"search_match": match_query(q), "search_pattern": f"%{q}%"}
+
+
+def search_condition(mode: str):
+    """Restrict incidents to rows matching the search, for an incident query in the given mode."""
+    if mode == ILIKE:
+        pattern = bindparam("search_pattern", required=True)
+        return or_(Incident.title.ilike(pattern), Incident.description.ilike(pattern))
+
+    match = bindparam("search_match", required=True)
+    if _enabled_dialect == "sqlite":
+        return Incident.id.in_(select(incidents_fts.c.rowid).where(_fts.op("MATCH")(match)))
+    return _search_vector.op("@@")(func.to_tsquery(FULLTEXT_LANGUAGE, match))
+
+
+def ranked_search(query, mode: str):
+    """
+    Add rank, highlighted title and description snippet columns to an incident
+    query and order it by relevance. Rows come back as (Incident, rank, title, snippet).
+    Run it with search_params().
+    """
+    if mode == ILIKE:
+        return query.filter(search_condition(ILIKE)).add_columns(
+            null().label("rank"), null().label("title_highlight"), null().label("snippet")
+        )
+
+    match = bindparam("search_match", required=True)
+    if _enabled_dialect == "sqlite":
+        # bm25 is lower-is-better; negate so higher rank means more relevant
+        rank = -func.bm25(_fts, 10.0, 1.0)
+        return (
+            query.join(incidents_fts, incidents_fts.c.rowid == Incident.id)
+            .filter(_fts.op("MATCH")(match))
+            .add_columns(
+                rank.label("rank"),
+                func.highlight(_fts, 0, _START, _STOP).label("title_highlight"),
+                func.snippet(_fts, 1, _START, _STOP, "…", 16).label("snippet"),
+            )
+            .order_by(rank.desc())
+        )
+
+    tsquery = func.to_tsquery(FULLTEXT_LANGUAGE, match)
+    rank = func.ts_rank_cd(_search_vector, tsquery)
+    options = f"StartSel={_START}, StopSel={_STOP}, MaxWords=24, MinWords=8"
+    return (
+        query.filter(_search_vector.op("@@")(tsquery))
+        .add_columns(
+            rank.label("rank"),
+            func.ts_headline(FULLTEXT_LANGUAGE, Incident.title, tsquery, "HighlightAll=true, " + options)
+            .label("title_highlight"),
+            func.ts_headline(FULLTEXT_LANGUAGE, Incident.description, tsquery, options).label("snippet"),
+        )
+        .order_by(rank.desc())
+    )
+
+
+def to_html(fragment: Optional[str]) -> Optional[str]:
+    # escape the incident text, then turn the match sentinels into <mark> tags
+    if fragment is None:
+        return None
+    return html.escape(fragment).replace(_START, "<mark>").replace(_STOP, "</mark>")
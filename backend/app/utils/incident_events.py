@@ -0,0 +1,160 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import IncidentSnapshot
+from app.queries import scope as role_scope
+from app.utils.logger import logger
+
+# In-process fan-out of committed incident writes to /incidents/stream
+# subscribers. incident_writes publishes after commit (from any thread); the
+# broker hops onto the event loop once per commit and hands each event only
+# to the subscribers whose role scope can see the incident before or after
+# the write. Subscribers are indexed by scope, so idle connections cost a
+# queue each and nothing per event they cannot see.
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+
+CREATED, STATUS_CHANGED, DELETED, ARCHIVED = "created", "status_changed", "deleted", "archived"
+
+RESYNC = {"type": "resync"}
+# ends the subscription; the client reconnects and is authorised again
+CLOSED = {"type": "closed"}
+
+
+class Subscriber:
+    def __init__(self, user):
+        self.user_id = user.id
+        self.email = user.email
+        self.scope = role_scope.of(user)
+        self.queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    def put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # a consumer this far behind refetches instead of replaying
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    def close(self):
+        # tell the client to refetch, then end the stream
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+        self.queue.put_nowait(CLOSED)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class IncidentEventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self._system = set()
+        self._sectors = defaultdict(set)    # category -> sector admins (unassigned incidents)
+        self._resolvers = defaultdict(set)  # user id -> sector admin (assigned to them)
+        self._reporters = defaultdict(set)  # user id -> reporter
+        self.published = 0
+
+    def _indexes(self, sub: Subscriber):
+        if sub.scope.kind == role_scope.SYSTEM:
+            return [self._system]
+        if sub.scope.kind == role_scope.SECTOR:
+            return [self._sectors[sub.scope.category], self._resolvers[sub.user_id]]
+        return [self._reporters[sub.user_id]]
+
+    def subscribe(self, user) -> Subscriber:
+        sub = Subscriber(user)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            for index in self._indexes(sub):
+                index.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            for index in self._indexes(sub):
+                index.discard(sub)
+
+    def _subscribers(self) -> set:
+        subs = set(self._system)
+        for index in (self._sectors, self._resolvers, self._reporters):
+            for group in index.values():
+                subs |= group
+        return subs
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers())
+
+    def disconnect(self, *emails: str):
+        """Close the subscriptions of these users, e.g. after a role change or deactivation (from any thread)."""
+        loop = self._loop
+        if not emails or loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._close, set(emails))
+        except RuntimeError:
+            pass
+
+    def _close(self, emails: set):
+        with self._lock:
+            subs = [sub for sub in self._subscribers() if sub.email in emails]
+            for sub in subs:
+                for index in self._indexes(sub):
+                    index.discard(sub)
+        for sub in subs:
+            sub.close()
+
+    def _audience(self, s: IncidentSnapshot) -> set:
+        # same visibility rules as the incident list
+        audience = set(self._system) | self._reporters.get(s.reporter_id, set())
+        if s.resolver_id is None:
+            audience |= self._sectors.get(s.category, set())
+        else:
+            audience |= self._resolvers.get(s.resolver_id, set())
+        return audience
+
+    def publish(self, changes):
+        """changes: (type, before, after) tuples from one committed transaction."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, changes)
+        except RuntimeError:
+            logger.warning("Incident event loop closed, dropping events")
+
+    def _deliver(self, changes):
+        with self._lock:
+            for event_type, before, after in changes:
+                snapshots = [s for s in (before, after) if s is not None]
+                event = {
+                    "id": next(self._ids),
+                    "type": event_type,
+                    "incident": jsonable_encoder((after or before)._asdict()),
+                }
+                for sub in set().union(*(self._audience(s) for s in snapshots)):
+                    sub.put(event)
+                self.published += 1
+
+
+broker = IncidentEventBroker()
+
+
+def to_sse(event: dict) -> str:
+    event_id = f"id: {event['id']}\n" if "id" in event else ""
+    return f"{event_id}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+
+from app import models
+
+# Incident exports streamed straight from a server-side cursor: rows are read
+# EXPORT_BATCH_SIZE at a time as plain tuples and encoded without building ORM
+# objects or pydantic models, so memory does not grow with the export.
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# the export endpoints' format= values; FastAPI rejects anything else with a 422
+ExportFormat = Literal["csv", "ndjson"]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+_incidents = models.Incident.__table__
+EXPORT_COLUMNS = [
+    _incidents.c.id, _incidents.c.title, _incidents.c.description, _incidents.c.category,
+    _incidents.c.status, _incidents.c.priority, _incidents.c.created_at, _incidents.c.updated_at,
+    _incidents.c.reporter_id, _incidents.c.resolver_id,
+]
+_names = [c.name for c in EXPORT_COLUMNS]
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+
+def encode(fmt: ExportFormat, rows, header: bool = False) -> str:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(_names, map(_plain, row))), ensure_ascii=False) + "\n" for row in rows
+        )
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(_names)
+    writer.writerows([_plain(v) for v in row] for row in rows)
+    return out.getvalue()
+
+
+def stream(engine, statement, params: dict, fmt: ExportFormat):
+    """Sync generator over the export; runs its own connection since the request session closes first."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(statement, params)
+        if fmt == "csv":
+            yield encode(fmt, [], header=True)
+        for rows in result.partitions():
+            yield encode(fmt, rows)
+
+
+async def stream_async(async_engine, statement, params: dict, fmt: ExportFormat):
+    async with async_engine.connect() as conn:
+        result = await conn.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE), params)
+        if fmt == "csv":
+            yield encode(fmt, [], header=True)
+        async for rows in result.partitions():
+            yield encode(fmt, rows)
+
+
+def response(chunks, fmt: ExportFormat) -> StreamingResponse:
+    filename = f"incidents-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,53 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import IncidentSnapshot
+from app.utils import stats_rollup, change_log
+from app.utils.stats_cache import stats_cache
+from app.utils.incident_events import broker, CREATED, STATUS_CHANGED, DELETED, ARCHIVED
+
+# Side effects of incident writes. Routers call record_* after flushing the
+# change and before commit: derived tables (daily rollup, change log) are
+# updated in the same transaction, and in-process caches and event
+# subscribers are notified once the transaction has committed.
+
+_PENDING_KEY = "incident_writes"
+
+
+def _after_commit_notify(db: Session, *changes):
+    change_log.record(db, changes)
+    db.info.setdefault(_PENDING_KEY, []).extend(changes)
+
+
+def record_created(db: Session, *incidents: IncidentSnapshot):
+    stats_rollup.record_created(db, *incidents)
+    _after_commit_notify(db, *[(CREATED, None, i) for i in incidents])
+
+
+def record_changed(db: Session, before: IncidentSnapshot, after: IncidentSnapshot):
+    stats_rollup.record_changed(db, before, after)
+    _after_commit_notify(db, (STATUS_CHANGED, before, after))
+
+
+def record_deleted(db: Session, *incidents: IncidentSnapshot):
+    stats_rollup.record_deleted(db, *incidents)
+    _after_commit_notify(db, *[(DELETED, i, None) for i in incidents])
+
+
+def record_archived(db: Session, *incidents: IncidentSnapshot):
+    # the rollup keeps counting archived incidents; the change log and
+    # subscribers see them leave the (default) incident list
+    _after_commit_notify(db, *[(ARCHIVED, i, None) for i in incidents])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(db: Session):
+    changes = db.info.pop(_PENDING_KEY, None)
+    if changes:
+        stats_cache.invalidate(*[s for _, before, after in changes for s in (before, after) if s is not None])
+        broker.publish(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(db: Session, previous_transaction):
+    db.info.pop(_PENDING_KEY, None)
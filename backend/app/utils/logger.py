@@ -1,34 +1,181 @@
+import atexit
+import contextvars
 import logging
-from logging.handlers import RotatingFileHandler
-import sys
 import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import orjson
+
+# Request code only puts records on a queue; a QueueListener thread formats
+# them and does the file/console I/O. Records carry request_id and user_email
+# as fields, taken from a per-request context (LogContextMiddleware, and
+# bind_user() once the caller is authenticated). The file gets one JSON object
+# per line; the console gets text in development and JSON otherwise.
+#
+#   LOG_FORMAT      console format: text or json
+#   LOG_QUEUE_SIZE  records buffered for the writer; overflow is dropped and counted
+#   LOG_SAMPLING    keep a fraction of debug/info records per logger, e.g.
+#                   "app_logger:debug=0.1,app_logger:info=0.5"
 
 #  directory 'logs/' exsist
 os.makedirs("logs", exist_ok=True)
 
+env = os.getenv("ENVIRONMENT", "development")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text" if env == "development" else "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+_context = contextvars.ContextVar("log_context", default=None)
+
+
+class LogContextMiddleware:
+    """Opens a log context per HTTP/WebSocket request holding its X-Request-ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        request_id = "N/A"
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        # a dict rather than separate vars: dependencies run in threadpool
+        # copies of the context, and they still share (and can fill in) this one
+        token = _context.set({"request_id": request_id, "user_email": "N/A"})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _context.reset(token)
+
+
+def bind_user(email: str):
+    context = _context.get()
+    if context is not None:
+        context["user_email"] = email
+
+
 class ContextFilter(logging.Filter):
     def filter(self, record):
+        context = _context.get() or {}
         if not hasattr(record, "request_id"):
-            record.request_id = "N/A"
+            record.request_id = context.get("request_id", "N/A")
         if not hasattr(record, "user_email"):
-            record.user_email = "N/A"
+            record.user_email = context.get("user_email", "N/A")
         return True
 
-formatter = logging.Formatter(
+
+def parse_sampling(spec: str) -> dict:
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        target, rate = entry.split("=")
+        name, level = target.rsplit(":", 1)
+        rates[(name.strip(), logging.getLevelName(level.strip().upper()))] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG/INFO records per logger (and its children); warnings and up always pass."""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+        self._resolved = {}
+        self.sampled_out = 0
+
+    def _rate(self, name: str, level: int) -> float:
+        key = (name, level)
+        if key not in self._resolved:
+            rate, parts = 1.0, name.split(".")
+            for i in range(len(parts), 0, -1):
+                candidate = (".".join(parts[:i]), level)
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+            self._resolved[key] = rate
+        return self._resolved[key]
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self._rate(record.name, record.levelno)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "user_email"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "N/A"),
+            "user_email": getattr(record, "user_email", "N/A"),
+        }
+        # anything passed through extra= becomes a field of its own
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _QueueHandler(QueueHandler):
+    """Never blocks the caller: a full queue drops the record."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # merge the arguments now, since they may change after the call returns;
+        # keep the traceback apart so formatters can place it
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = text_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+text_formatter = logging.Formatter(
     "%(asctime)s - %(levelname)s - %(name)s - [RequestID=%(request_id)s] [UserEmail=%(user_email)s] %(message)s"
 )
+json_formatter = JsonFormatter()
 
 file_handler = RotatingFileHandler(
     "logs/app.log", maxBytes=5*1024*1024, backupCount=5
 )
-file_handler.setFormatter(formatter)
+file_handler.setFormatter(json_formatter)
 
 console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(formatter)
+console_handler.setFormatter(json_formatter if LOG_FORMAT == "json" else text_formatter)
 
 logger = logging.getLogger("app_logger")
 
-env = os.getenv("ENVIRONMENT", "development")
 if env == "development":
     logger.setLevel(logging.DEBUG)
     console_handler.setLevel(logging.DEBUG)
@@ -38,22 +185,42 @@ else:
 
 file_handler.setLevel(logging.INFO)
 
-logger.addFilter(ContextFilter())
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+queue_handler = _QueueHandler(log_queue)
+sampling_filter = SamplingFilter(parse_sampling(LOG_SAMPLING))
+# on the handler rather than the logger so records from child loggers
+# (app_logger.sql, ...) get the context fields too
+queue_handler.addFilter(ContextFilter())
+queue_handler.addFilter(sampling_filter)
+
+logger.addHandler(queue_handler)
+
+listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+listener.start()
+# flush what is still queued on interpreter exit
+atexit.register(listener.stop)
+
+
+def stats() -> dict:
+    return {
+        "queued": log_queue.qsize(),
+        "queue_size": LOG_QUEUE_SIZE,
+        "dropped": queue_handler.dropped,
+        "sampled_out": sampling_filter.sampled_out,
+    }
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
 
-def info(msg, request_id="N/A", user_email="N/A"):
-    logger.info(msg, extra={"request_id": request_id, "user_email": user_email})
+def info(msg, *args, **extra):
+    logger.info(msg, *args, extra=extra or None)
 
-def debug(msg, request_id="N/A", user_email="N/A"):
-    logger.debug(msg, extra={"request_id": request_id, "user_email": user_email})
+def debug(msg, *args, **extra):
+    logger.debug(msg, *args, extra=extra or None)
 
-def warning(msg, request_id="N/A", user_email="N/A"):
-    logger.warning(msg, extra={"request_id": request_id, "user_email": user_email})
+def warning(msg, *args, **extra):
+    logger.warning(msg, *args, extra=extra or None)
 
-def error(msg, request_id="N/A", user_email="N/A"):
-    logger.error(msg, extra={"request_id": request_id, "user_email": user_email})
+def error(msg, *args, **extra):
+    logger.error(msg, *args, extra=extra or None)
 
-def exception(msg, request_id="N/A", user_email="N/A"):
-    logger.exception(msg, extra={"request_id": request_id, "user_email": user_email})
+def exception(msg, *args, **extra):
+    logger.exception(msg, *args, extra=extra or None)
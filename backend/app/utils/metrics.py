@@ -0,0 +1,168 @@
+import time
+from bisect import bisect_left
+
+from starlette.routing import Match
+
+# Per-route request metrics in Prometheus text format (served at /metrics).
+# Everything is updated from the event loop thread by MetricsMiddleware, so
+# plain dicts and ints are enough: no locks on the request path.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+UNMATCHED = "unmatched"
+ROUTE_CACHE_SIZE = 4096
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip((*self.buckets, "+Inf"), self.counts):
+            total += n
+            yield bound, total
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.latency = {}      # (method, route) -> Histogram
+        self.size = {}         # (method, route) -> Histogram
+        self.responses = {}    # (method, route, status) -> count
+        self.in_flight = {}    # (method, route) -> gauge
+
+    def started(self, method: str, route: str):
+        key = (method, route)
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route)
+        self.in_flight[key] -= 1
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.size[key] = Histogram(SIZE_BUCKETS)
+        latency.observe(seconds)
+        self.size[key].observe(size)
+        status_key = (method, route, status)
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self) -> str:
+        lines = []
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), h in sorted(series.items()):
+                labels = f'method="{method}",route="{_escape(route)}"'
+                for bound, total in h.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+                lines.append(f"{name}_sum{{{labels}}} {h.sum}")
+                lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+        histogram("http_request_duration_seconds", "Time from request start until the response finished.", self.latency)
+        histogram("http_response_size_bytes", "Response body size.", self.size)
+
+        lines.append("# HELP http_responses_total Responses by status code.")
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), n in sorted(self.responses.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {n}')
+
+        lines.append("# HELP http_requests_in_flight Requests currently being handled.")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for (method, route), n in sorted(self.in_flight.items()):
+            lines.append(f'http_requests_in_flight{{method="{method}",route="{_escape(route)}"}} {n}')
+
+        return "\n".join(lines) + "\n"
+
+
+def render_families(families) -> str:
+    """
+    Text for (name, type, help, samples) metric families, where samples are
+    (labels, value) pairs; a family with no samples is left out.
+    """
+    lines = []
+    for name, kind, help_text, samples in families:
+        if not samples:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            value = int(value) if isinstance(value, bool) else value
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """Records latency, response size, status and in-flight count per route template."""
+
+    def __init__(self, app, routes, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.routes = routes
+        self.metrics = metrics
+        self._route_cache = {}
+
+    def _route(self, scope) -> str:
+        # label by template (/incidents/{incident_id}), resolved before the
+        # request runs so in-flight counts have it too; memoized per raw path
+        key = (scope["method"], scope["path"])
+        route = self._route_cache.get(key)
+        if route is None:
+            route = UNMATCHED
+            for candidate in self.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = candidate.path
+                    break
+                if match == Match.PARTIAL and route == UNMATCHED:
+                    route = candidate.path
+            if len(self._route_cache) >= ROUTE_CACHE_SIZE:
+                self._route_cache.clear()
+            self._route_cache[key] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], self._route(scope)
+        self.metrics.started(method, route)
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.finished(method, route, status, time.perf_counter() - started, size)
@@ -0,0 +1,36 @@
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+# Opaque keyset cursor: base64url encoded JSON holding the sort the cursor
+# was issued for, the sort key of the last row and its id.
+
+def encode_cursor(sort_by: str, sort_order: str, key, last_id: int) -> str:
+    payload = {"s": sort_by, "o": sort_order, "k": key, "i": last_id}
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict) or not isinstance(payload.get("i"), int):
+            raise ValueError("malformed cursor")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if payload.get("s") != sort_by or payload.get("o") != sort_order:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return payload
+
+
+def next_cursor(rows: list, page_size: int, sort_by: str, sort_order: str, key_of) -> Optional[str]:
+    # rows were fetched with limit(page_size + 1): an extra row means there is a next page
+    if len(rows) <= page_size:
+        return None
+    last = rows[page_size - 1]
+    return encode_cursor(sort_by, sort_order, key_of(last), last.id)
@@ -0,0 +1,45 @@
+from sqlalchemy import inspect, text
+
+from app.models import Incident, IncidentArchive
+from app.models.incident import PRIORITY_RANK_SQL, STATUS_RANK_SQL
+
+# The priority_rank / status_rank generated columns the incident list sorts
+# and seeks on. create_all only creates missing tables, so databases created
+# before the columns get them here; SQLite can only add a generated column as
+# VIRTUAL, which indexes the same way. Those databases also hold created_at
+# values CURRENT_TIMESTAMP wrote without microseconds, and keep that column
+# default: those values are rewritten, and a trigger rewrites new ones, in
+# the format models.incident.utcnow writes, so created_at keys carried in a
+# cursor compare equal to the stored values.
+#
+# Their indexes are created by scripts/index_report.py --apply.
+
+RANK_COLUMNS = {"priority_rank": PRIORITY_RANK_SQL, "status_rank": STATUS_RANK_SQL}
+
+SQLITE_CREATED_AT_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS incidents_created_at_format AFTER INSERT ON incidents
+WHEN length(new.created_at) = 19 BEGIN
+    UPDATE incidents SET created_at = new.created_at || '.000000' WHERE id = new.id;
+END
+"""
+
+
+def setup_sort_ranks(engine):
+    """Add the sort rank columns to incident tables that lack them; called once at startup."""
+    dialect = engine.dialect.name
+    storage = "VIRTUAL" if dialect == "sqlite" else "STORED"
+    with engine.begin() as conn:
+        for table in (Incident.__tablename__, IncidentArchive.__tablename__):
+            existing = {column["name"] for column in inspect(conn).get_columns(table)}
+            missing = [name for name in RANK_COLUMNS if name not in existing]
+            for name in missing:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {name} INTEGER "
+                    f"GENERATED ALWAYS AS ({RANK_COLUMNS[name]}) {storage}"
+                ))
+            if missing and dialect == "sqlite":
+                conn.execute(text(
+                    f"UPDATE {table} SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+                ))
+                if table == Incident.__tablename__:
+                    conn.execute(text(SQLITE_CREATED_AT_TRIGGER))
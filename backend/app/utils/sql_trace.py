@@ -0,0 +1,140 @@
+import contextvars
+import logging
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-request SQL accounting. Cursor execute hooks on every Engine (the async
+# engine runs them too, through its sync_engine) add each statement's time to
+# the collector of the current request. When the request finishes,
+# SqlTraceMiddleware logs the count, the total time and the slowest
+# statements (at DEBUG, or INFO for requests with a slow statement), and flags
+# statements repeated often enough to look like N+1 loading. Statements over
+# SLOW_QUERY_MS are logged as they happen, inside or outside a request.
+# /metrics scrapes are not traced.
+#
+#   SLOW_QUERY_MS          slow-query log threshold (default 200; 0 disables)
+#   N_PLUS_ONE_THRESHOLD   executions of one statement per request that count as N+1 (default 10)
+#   SERVER_TIMING          "true" adds a Server-Timing: db;dur=... header to responses
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+SLOWEST_KEPT = 3
+STATEMENT_LOG_CHARS = 500
+UNTRACED_PATHS = ("/metrics",)
+
+logger = logging.getLogger("app_logger.sql")
+
+_current = contextvars.ContextVar("sql_trace", default=None)
+
+
+class RequestQueries:
+    __slots__ = ("count", "seconds", "slowest", "repeats")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = []   # [(seconds, statement)], longest first
+        self.repeats = {}   # statement -> executions
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.repeats[statement] = self.repeats.get(statement, 0) + 1
+        if len(self.slowest) < SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def n_plus_one(self) -> list:
+        return [(statement, n) for statement, n in self.repeats.items() if n >= N_PLUS_ONE_THRESHOLD]
+
+
+def _short(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= STATEMENT_LOG_CHARS else statement[:STATEMENT_LOG_CHARS] + "..."
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_trace_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["sql_trace_started"].pop()
+    seconds = time.perf_counter() - started
+
+    queries = _current.get()
+    if queries is not None:
+        queries.record(statement, seconds)
+
+    if SLOW_QUERY_MS and seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms): %s", seconds * 1000, _short(statement),
+            extra={"duration_ms": round(seconds * 1000, 1), "statement": _short(statement)}
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # the failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get("sql_trace_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+class SqlTraceMiddleware:
+    """Collects the SQL run while handling each HTTP request and reports it when the request ends."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNTRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        # shared by the threadpool copies of the context that run sync endpoints
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_wrapper(message):
+            if SERVER_TIMING and message["type"] == "http.response.start":
+                header = f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries"'
+                message = dict(message, headers=[*message.get("headers", []), (b"server-timing", header.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if queries.count:
+                _report(scope, queries)
+
+
+def _report(scope, queries: RequestQueries):
+    route = getattr(scope.get("route"), "path", scope["path"])
+    # one line per request is only worth INFO when something in it was slow
+    slow = SLOW_QUERY_MS and queries.slowest[0][0] * 1000 >= SLOW_QUERY_MS
+    level = logging.INFO if slow else logging.DEBUG
+    if logger.isEnabledFor(level):
+        logger.log(
+            level, "SQL for %s %s: %d queries, %.1f ms", scope["method"], route, queries.count, queries.seconds * 1000,
+            extra={
+                "db_queries": queries.count,
+                "db_time_ms": round(queries.seconds * 1000, 2),
+                "slowest": [
+                    {"ms": round(seconds * 1000, 2), "statement": _short(statement)}
+                    for seconds, statement in queries.slowest
+                ],
+            }
+        )
+    for statement, n in queries.n_plus_one():
+        logger.warning(
+            "Possible N+1 in %s %s: %d executions of %s", scope["method"], route, n, _short(statement),
+            extra={"executions": n, "statement": _short(statement)}
+        )
@@ -0,0 +1,61 @@
+import os
+import threading
+from datetime import datetime
+
+from app.queries import scope as role_scope
+from app.utils.cache import TTLCache
+
+# Cached /stats responses, with their ETag, keyed by (endpoint, role scope,
+# UTC day). Incident writes evict the entries of every scope they touch (see
+# incident_writes). The TTL only bounds staleness from writes made by other
+# processes.
+
+STATS_CACHE_MAX_ENTRIES = int(os.getenv("STATS_CACHE_MAX_ENTRIES", "2048"))
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "300"))
+
+
+class StatsCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        # bumped on every invalidation so a result computed before a write is not stored after it
+        self._generation = 0
+        self.evictions = 0
+
+    def key(self, endpoint: str, user) -> tuple:
+        return (endpoint, role_scope.of(user), datetime.utcnow().date())
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def generation(self) -> int:
+        return self._generation
+
+    def set(self, key, value, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._cache.set(key, value)
+
+    def invalidate(self, *incidents):
+        """Evict entries whose scope can see any of the given incident snapshots."""
+        categories = {i.category for i in incidents}
+        reporters = {i.reporter_id for i in incidents}
+        resolvers = {i.resolver_id for i in incidents if i.resolver_id is not None}
+
+        def affected(key):
+            scope = key[1]
+            if scope.kind == role_scope.SYSTEM:
+                return True
+            if scope.kind == role_scope.SECTOR:
+                return scope.category in categories or scope.user_id in resolvers
+            return scope.user_id in reporters
+
+        with self._lock:
+            self._generation += 1
+            self.evictions += self._cache.evict(affected)
+
+    def stats(self) -> dict:
+        return dict(self._cache.stats(), evictions=self.evictions)
+
+
+stats_cache = StatsCache(STATS_CACHE_MAX_ENTRIES, STATS_CACHE_TTL_SECONDS)
@@ -0,0 +1,107 @@
+from collections import Counter
+from datetime import timezone
+
+from sqlalchemy import select, delete, insert, update, func, cast, Date, String, union_all
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import Incident, IncidentArchive, IncidentDailyStat, IncidentSnapshot
+
+# Daily incident counts per (day, category, status, priority, reporter, resolver).
+# The /stats endpoints read these rows instead of grouping the incidents table.
+
+UNASSIGNED = 0
+
+KEY_COLUMNS = ["day", "category", "status", "priority", "reporter_id", "resolver_id"]
+
+
+def utc_day(created_at):
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def rollup_key(s: IncidentSnapshot) -> tuple:
+    return (
+        utc_day(s.created_at), s.category, s.status, s.priority,
+        s.reporter_id, s.resolver_id or UNASSIGNED,
+    )
+
+
+def apply_deltas(db: Session, deltas: Counter):
+    """Add the per-key count deltas to the rollup inside the caller's transaction."""
+    rows = [dict(zip(KEY_COLUMNS, key), count=n) for key, n in deltas.items() if n]
+    if not rows:
+        return
+
+    table = IncidentDailyStat.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        upsert = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(table)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={"count": table.c.count + upsert.excluded.count}
+        )
+        db.execute(upsert, rows)
+        return
+
+    for row in rows:
+        match = [table.c[col] == row[col] for col in KEY_COLUMNS]
+        result = db.execute(update(table).where(*match).values(count=table.c.count + row["count"]))
+        if result.rowcount == 0:
+            db.execute(insert(table).values(**row))
+
+
+def record_created(db: Session, *incidents: IncidentSnapshot):
+    apply_deltas(db, Counter(rollup_key(s) for s in incidents))
+
+
+def record_changed(db: Session, before: IncidentSnapshot, after: IncidentSnapshot):
+    old_key, new_key = rollup_key(before), rollup_key(after)
+    if old_key != new_key:
+        apply_deltas(db, Counter({old_key: -1, new_key: 1}))
+
+
+def record_deleted(db: Session, *incidents: IncidentSnapshot):
+    apply_deltas(db, Counter({key: -n for key, n in Counter(rollup_key(s) for s in incidents).items()}))
+
+
+def _day_expression(dialect: str, created_at=Incident.created_at):
+    if dialect == "postgresql":
+        return cast(func.timezone("UTC", created_at), Date)
+    return func.date(created_at)
+
+
+def rebuild(db: Session) -> int:
+    """Recompute the whole rollup from the incidents and incidents_archive tables. Returns the row count."""
+    dialect = db.get_bind().dialect.name
+    # archived incidents still count
+    both = union_all(*[
+        select(
+            _day_expression(dialect, t.c.created_at).label("day"),
+            cast(t.c.category, String).label("category"),
+            cast(t.c.status, String).label("status"),
+            cast(t.c.priority, String).label("priority"),
+            t.c.reporter_id,
+            func.coalesce(t.c.resolver_id, UNASSIGNED).label("resolver_id"),
+        )
+        for t in (Incident.__table__, IncidentArchive.__table__)
+    ]).subquery()
+    keys = [both.c[name] for name in KEY_COLUMNS]
+    source = select(*keys, func.count()).group_by(*keys)
+    table = IncidentDailyStat.__table__
+    db.execute(delete(table))
+    db.execute(insert(table).from_select(KEY_COLUMNS + ["count"], source))
+    return db.execute(select(func.count()).select_from(table)).scalar()
+
+
+def backfill_if_empty(engine):
+    """Build the rollup on first start against a database that already has incidents."""
+    with Session(engine) as db:
+        has_rollup = db.execute(select(IncidentDailyStat.day).limit(1)).first() is not None
+        has_incidents = db.execute(select(Incident.id).limit(1)).first() is not None
+        if has_incidents and not has_rollup:
+            rebuild(db)
+            db.commit()
+
@@ -1,9 +1,17 @@
+from collections import namedtuple
 from datetime import datetime, timedelta
+import threading
+import time
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import database, models
+from app.utils.cache import TTLCache
+from app.utils.logger import bind_user
+from app.utils.incident_events import broker
 from dotenv import load_dotenv
 import os
 
@@ -14,6 +22,14 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 100
 
 security = HTTPBearer()
 
+# Authenticated-user caches. Entries are per process: update_user / delete_user
+# invalidate them, so keep the TTL short when running several workers.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+
+token_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE * 4, ttl=USER_CACHE_TTL_SECONDS)
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -22,6 +38,103 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
+def decode_token(token: str, secret_key: str = SECRET_KEY, purpose: str = None) -> dict:
+    """
+    jwt.decode with a cache of successful results; raises JWTError like
+    jwt.decode. Single-purpose tokens (a "typ" claim, e.g. stream tickets) only
+    decode when that purpose is asked for, so they never pass as access tokens.
+    """
+    key = (secret_key, token)
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
+        # never serve a payload past its own expiry
+        exp = payload.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        token_cache.set(key, payload, ttl=ttl)
+    if payload.get("typ") != purpose:
+        raise JWTError("token is not valid for this purpose")
+    return payload
+
+
+# /incidents/stream tickets: browsers cannot send headers with EventSource or
+# WebSocket requests, so they trade their access token for one of these and
+# put it in the URL, where it may be logged. It is only good for opening a
+# stream, and only for a short while.
+STREAM_TICKET = "stream"
+STREAM_TICKET_SECONDS = int(os.getenv("STREAM_TICKET_SECONDS", "30"))
+
+
+def create_stream_ticket(email: str) -> str:
+    expire = datetime.utcnow() + timedelta(seconds=STREAM_TICKET_SECONDS)
+    return jwt.encode({"sub": email, "typ": STREAM_TICKET, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+# What an authenticated request knows about its user: a plain snapshot of the
+# row, never an ORM instance, so it is safe to share between sessions and
+# threads and has no relationships to lazy-load.
+CachedUser = namedtuple("CachedUser", "id name email role sector is_active created_at")
+
+_user_columns = [getattr(models.User, field) for field in CachedUser._fields]
+
+# Bumped by every user change, before its commit and again after it, so a row
+# read while the change was in flight is never stored.
+_user_lock = threading.Lock()
+_user_generation = 0
+
+
+def _user_query(email: str):
+    return select(*_user_columns).where(models.User.email == email)
+
+
+def _cache_user(email: str, row, generation: int):
+    if row is None or row.is_active is False:
+        return None
+    user = CachedUser(*row)
+    with _user_lock:
+        if generation == _user_generation:
+            user_cache.set(email, user)
+    return user
+
+
+def get_user_by_email(db: Session, email: str):
+    """Active user for a token subject, as a cached CachedUser snapshot."""
+    user = user_cache.get(email)
+    if user is None:
+        generation = _user_generation
+        user = _cache_user(email, db.execute(_user_query(email)).first(), generation)
+    return user
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    """get_user_by_email for AsyncSession; shares the same cache."""
+    user = user_cache.get(email)
+    if user is None:
+        generation = _user_generation
+        user = _cache_user(email, (await db.execute(_user_query(email))).first(), generation)
+    return user
+
+
+def _forget_users(emails):
+    global _user_generation
+    with _user_lock:
+        _user_generation += 1
+        for email in emails:
+            user_cache.pop(email)
+
+
+def user_changing(*emails: str):
+    """Call before committing a change to these users; invalidate_user after it."""
+    _forget_users([email for email in emails if email])
+
+
+def invalidate_user(*emails: str):
+    emails = [email for email in emails if email]
+    _forget_users(emails)
+    # open event streams were authorised for the old user row
+    broker.disconnect(*emails)
+
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(database.get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,16 +142,17 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         headers={"WWW-Authenticate":"Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(credentials.credentials)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = get_user_by_email(db, email)
     if user is None:
         raise credentials_exception
+    bind_user(user.email)
     return user
 
 
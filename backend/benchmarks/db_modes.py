@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Compare request throughput of DB_MODE=sync and DB_MODE=async.
+
+Each mode runs in its own process against a freshly seeded database, driving
+the app in-process through httpx's ASGI transport with a fixed number of
+concurrent clients:
+    python benchmarks/db_modes.py --requests 2000 --concurrency 64
+    python benchmarks/db_modes.py --database-url postgresql://user:pw@localhost/bench
+
+With --database-url every mode reuses (and reseeds) that database; the
+default is a temporary SQLite file per mode.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = [
+    "/incidents/?page_size=20",
+    "/incidents/?page_size=20&sortBy=priority&status=open",
+    "/incidents/search?q=printer",
+    "/stats/dashboard",
+    "/auth/me",
+]
+
+CATEGORIES = ["hardware", "software", "network", "security"]
+PRIORITIES = ["low", "medium", "high", "critical"]
+STATUSES = ["open", "in_progress", "solved"]
+
+
+def seed(incidents: int):
+    from app import models
+    from app.database import SessionLocal
+    from app.utils.hashing import hash_password
+    from app.utils.stats_rollup import rebuild
+
+    db = SessionLocal()
+    try:
+        db.query(models.Incident).delete()
+        db.query(models.User).delete()
+        password = hash_password("bench")
+        users = [
+            models.User(name=role, email=f"{role}@bench.example.com", password=password, role=role,
+                        sector="Network" if role != "user" else None, is_active=True)
+            for role in ("admin_system", "admin_network", "user")
+        ]
+        db.add_all(users)
+        db.flush()
+        reporter = users[-1].id
+        db.add_all([
+            models.Incident(
+                title=f"printer {i} not responding",
+                description=f"the network printer on floor {i % 9} fails to print job {i}",
+                category=CATEGORIES[i % 4], priority=PRIORITIES[i % 4], status=STATUSES[i % 3],
+                reporter_id=reporter,
+            )
+            for i in range(incidents)
+        ])
+        db.flush()
+        rebuild(db)
+        db.commit()
+        return [u.email for u in users]
+    finally:
+        db.close()
+
+
+async def drive(app, emails, total: int, concurrency: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = []
+        for email in emails:
+            r = await client.post("/auth/login", json={"email": email, "password": "bench"})
+            r.raise_for_status()
+            headers.append({"Authorization": f"Bearer {r.json()['access_token']}"})
+
+        latencies = {path: [] for path in ENDPOINTS}
+        errors = 0
+        next_request = 0
+
+        async def client_loop():
+            nonlocal next_request, errors
+            while next_request < total:
+                n = next_request
+                next_request += 1
+                path = ENDPOINTS[n % len(ENDPOINTS)]
+                started = time.perf_counter()
+                r = await client.get(path, headers=headers[n % len(headers)])
+                latencies[path].append(time.perf_counter() - started)
+                if r.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return elapsed, latencies, errors
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2),
+        "p50_ms": round(pick(0.50), 2),
+        "p95_ms": round(pick(0.95), 2),
+        "p99_ms": round(pick(0.99), 2),
+    }
+
+
+def worker(args):
+    sys.path.append(BACKEND_DIR)
+    import logging
+    from app import app, database
+
+    # measure request handling, not console logging
+    logging.getLogger("app_logger").setLevel(logging.WARNING)
+
+    emails = seed(args.incidents)
+    async def run():
+        try:
+            return await drive(app, emails, args.requests, args.concurrency)
+        finally:
+            # pooled aiosqlite connections keep non-daemon threads alive until closed
+            if database.async_engine is not None:
+                await database.async_engine.dispose()
+
+    elapsed, latencies, errors = asyncio.run(run())
+    all_samples = [s for samples in latencies.values() for s in samples]
+    print(json.dumps({
+        "mode": database.DB_MODE,
+        "dialect": database.engine.dialect.name,
+        "profile": database.DB_PROFILE,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "overall": _percentiles(all_samples),
+        "endpoints": {path: _percentiles(samples) for path, samples in latencies.items() if samples},
+    }))
+
+
+def run_mode(mode: str, args) -> dict:
+    env = dict(os.environ, DB_MODE=mode)
+    env.setdefault("DB_PROFILE", "bench")
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    workdir = tempfile.mkdtemp(prefix=f"bench-{mode}-")
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker",
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--incidents", str(args.incidents),
+    ]
+    # run from a scratch directory so logs/ and the default database stay out of the tree
+    result = subprocess.run(command, env=env, cwd=workdir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} benchmark failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DB_MODE=sync against DB_MODE=async")
+    parser.add_argument("--modes", default="sync,async", help="Comma separated modes to run")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--incidents", type=int, default=5000, help="Incidents seeded before the run")
+    parser.add_argument("--database-url", help="Database to seed and use (default: temporary SQLite)")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    results = [run_mode(mode.strip(), args) for mode in args.modes.split(",") if mode.strip()]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for r in results:
+        o = r["overall"]
+        print(f"{r['mode']:>6} ({r['dialect']}): {r['requests_per_second']:>8} req/s  "
+              f"p50 {o['p50_ms']}ms  p95 {o['p95_ms']}ms  p99 {o['p99_ms']}ms  errors {r['errors']}")
+        for path, p in r["endpoints"].items():
+            print(f"         {path:<55} p50 {p['p50_ms']:>7}ms  p95 {p['p95_ms']:>7}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Per-row cost of the list read paths, before and after the fast path.
+
+    orm:  ORM instances -> pydantic validation (from_attributes) -> json.dumps,
+          which is what a response_model endpoint does with JSONResponse
+    core: Core select() rows -> dicts -> orjson, as GET /incidents/ and
+          GET /users/ do now (app/utils/fast_json.py)
+
+Each pipeline is timed as a whole and split into fetch and serialize, on a
+temporary SQLite database (or --database-url) seeded with --rows incidents:
+    python benchmarks/serialization.py --rows 5000 --page-size 100 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ["hardware", "software", "network", "security"]
+PRIORITIES = ["low", "medium", "high", "critical"]
+STATUSES = ["open", "in_progress", "solved"]
+
+
+def seed(rows: int):
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(models.Incident).delete()
+        db.query(models.User).delete()
+        users = [
+            models.User(name=f"user {i}", email=f"user{i}@bench.example.com", password="x",
+                        role="user", is_active=True)
+            for i in range(200)
+        ]
+        db.add_all(users)
+        db.flush()
+        db.add_all([
+            models.Incident(
+                title=f"printer {i} not responding",
+                description=f"the network printer on floor {i % 9} fails to print job {i}. " * 4,
+                category=CATEGORIES[i % 4], priority=PRIORITIES[i % 4], status=STATUSES[i % 3],
+                reporter_id=users[i % len(users)].id,
+            )
+            for i in range(rows)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def pipelines(page_size: int):
+    import orjson
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app import models
+    from app.queries.incidents import INCIDENT_FIELDS, select_fields
+    from app.routers.userTable import USER_READ_FIELDS, USER_READ_COLUMNS
+    from app.schemas import IncidentRead, UserRead
+    from app.utils import fast_json
+
+    def stdlib_json(content) -> bytes:
+        # starlette's JSONResponse.render
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    def orm(entity, schema):
+        adapter = TypeAdapter(List[schema])
+        order = (entity.id.desc(),)
+
+        def fetch(db):
+            return db.query(entity).order_by(*order).limit(page_size).all()
+
+        def serialize(rows):
+            return stdlib_json(adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json"))
+        return fetch, serialize
+
+    def core(columns, names, id_column):
+        def fetch(db):
+            return db.execute(select(*columns).order_by(id_column.desc()).limit(page_size)).all()
+
+        def serialize(rows):
+            return orjson.dumps(fast_json.rows_to_dicts(rows, names), option=fast_json.OPTIONS)
+        return fetch, serialize
+
+    return {
+        "incidents": {
+            "orm": orm(models.Incident, IncidentRead),
+            "core": core(select_fields(), INCIDENT_FIELDS, models.Incident.id),
+        },
+        "users": {
+            "orm": orm(models.User, UserRead),
+            "core": core(USER_READ_COLUMNS, USER_READ_FIELDS, models.User.id),
+        },
+    }
+
+
+def measure(fetch, serialize, repeat: int) -> dict:
+    from app.database import SessionLocal
+
+    timings = {"fetch": [], "serialize": [], "total": []}
+    rows_per_page = 0
+    for _ in range(repeat):
+        # a fresh session per page, like a request
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            rows = fetch(db)
+            fetched = time.perf_counter()
+            serialize(rows)
+            done = time.perf_counter()
+        rows_per_page = len(rows)
+        timings["fetch"].append(fetched - started)
+        timings["serialize"].append(done - fetched)
+        timings["total"].append(done - started)
+
+    per_row = lambda samples: round(statistics.median(samples) / max(rows_per_page, 1) * 1e6, 2)
+    return {
+        "rows_per_page": rows_per_page,
+        "page_ms": round(statistics.median(timings["total"]) * 1000, 3),
+        "fetch_us_per_row": per_row(timings["fetch"]),
+        "serialize_us_per_row": per_row(timings["serialize"]),
+        "total_us_per_row": per_row(timings["total"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row cost of the ORM/pydantic and Core/orjson list paths")
+    parser.add_argument("--rows", type=int, default=5000, help="Incidents seeded before the run")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200, help="Pages read per pipeline")
+    parser.add_argument("--database-url", help="Database to seed and use (default: temporary SQLite)")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-serialization-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("DB_PROFILE", "bench")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    # keep logs/ out of the tree
+    os.chdir(workdir)
+    sys.path.append(BACKEND_DIR)
+
+    from app import models
+    from app.database import engine
+    models.Base.metadata.create_all(bind=engine)
+    seed(args.rows)
+
+    results = {}
+    for endpoint, paths in pipelines(args.page_size).items():
+        for name, (fetch, serialize) in paths.items():
+            measure(fetch, serialize, max(1, args.repeat // 10))  # warm up
+            results.setdefault(endpoint, {})[name] = measure(fetch, serialize, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for endpoint, paths in results.items():
+        orm, core = paths["orm"], paths["core"]
+        print(f"{endpoint} ({orm['rows_per_page']} rows/page)")
+        for name, r in paths.items():
+            print(f"  {name:>4}: {r['total_us_per_row']:>7} us/row  (fetch {r['fetch_us_per_row']:>6}, "
+                  f"serialize {r['serialize_us_per_row']:>6})  {r['page_ms']:>7} ms/page")
+        print(f"  speedup: {orm['total_us_per_row'] / max(core['total_us_per_row'], 1e-9):.1f}x per row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Replay a reproducible mix of API calls against a seeded database and report
+throughput and latency percentiles per operation.
+
+The database is seeded at a fixed scale by scripts/seed.py (users in every
+role, incidents spread over the last year), then a request sequence drawn from
+--seed is replayed through the real ASGI app (httpx's ASGI transport) by
+--concurrency clients. The same seed and scale always give the same data and
+the same sequence of requests:
+    python benchmarks/workload.py --scale small --requests 5000 --output baseline.json
+    python benchmarks/workload.py --scale small --requests 5000 --baseline baseline.json
+
+Scales: small (10k incidents), medium (1M), large (5M). Seeding the larger
+ones takes a while, so seed a persistent database once and reuse it:
+    python benchmarks/workload.py --scale large --database-url postgresql://user:pw@localhost/bench --seed-only
+    python benchmarks/workload.py --scale large --database-url postgresql://user:pw@localhost/bench --no-seed
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from scripts.seed import CATEGORIES, PRIORITIES, STATUSES, SUBJECTS, seed_database
+
+SCALES = {
+    "small": {"incidents": 10_000, "users": 1_000},
+    "medium": {"incidents": 1_000_000, "users": 5_000},
+    "large": {"incidents": 5_000_000, "users": 10_000},
+}
+
+PASSWORD = "bench"
+RESULT_FILE = "result.json"
+
+# operation -> share of the replayed requests
+MIX = {
+    "list": 30,
+    "filter": 25,
+    "search": 15,
+    "stats": 20,
+    "update_status": 8,
+    "login": 2,
+}
+STATS_ENDPOINTS = ["dashboard", "last-7-days", "by-category", "status-distirubtion", "last-3-months"]
+
+
+def load_actors(per_role: int):
+    """Emails of the users that replay the workload: a few of every role."""
+    from sqlalchemy import select
+
+    from app import models
+    from app.constants import UserRole
+    from app.database import SessionLocal
+
+    users = models.User.__table__
+    with SessionLocal() as db:
+        actors = {
+            role.value: db.execute(
+                select(users.c.email).where(users.c.role == role.value, users.c.is_active == True)
+                .order_by(users.c.id).limit(per_role)
+            ).scalars().all()
+            for role in UserRole
+        }
+        incident_ids = models.Incident.__table__.c.id
+        max_id = db.execute(select(incident_ids).order_by(incident_ids.desc()).limit(1)).scalar() or 0
+    return {role: emails for role, emails in actors.items() if emails}, max_id
+
+
+def plan(rng: random.Random, total: int, actors: dict, max_incident_id: int):
+    """The replayed requests as (operation, method, path, actor email)."""
+    operations, weights = zip(*MIX.items())
+    roles = list(actors)
+    sector_admins = [email for role, emails in actors.items() if role.startswith("admin_") and role != "admin_system" for email in emails]
+    everybody = [email for emails in actors.values() for email in emails]
+    requests = []
+    for _ in range(total):
+        operation = rng.choices(operations, weights)[0]
+        actor = rng.choice(actors[rng.choice(roles)])
+        if operation == "list":
+            path = f"/incidents/?page_size={rng.choice([10, 20, 50])}"
+            if rng.random() < 0.3:
+                path += f"&page={rng.randint(2, 10)}"
+            # the incident list page asks for the total
+            if rng.random() < 0.5:
+                path += "&include=total"
+        elif operation == "filter":
+            params = [f"status={rng.choice(STATUSES)}"]
+            if rng.random() < 0.5:
+                params.append(f"category={rng.choice(CATEGORIES)}")
+            if rng.random() < 0.3:
+                params.append(f"priority={rng.choice(PRIORITIES)}")
+            params.append(f"sortBy={rng.choice(['created_at', 'priority', 'status'])}")
+            path = "/incidents/?page_size=20&" + "&".join(params)
+        elif operation == "search":
+            category = rng.choice(CATEGORIES)
+            path = f"/incidents/search?q={rng.choice(SUBJECTS[category]).split()[0]}"
+        elif operation == "stats":
+            path = f"/stats/{rng.choice(STATS_ENDPOINTS)}"
+        elif operation == "update_status":
+            actor = rng.choice(sector_admins)
+            path = f"/incidents/{rng.randint(1, max_incident_id)}/status?new_status={rng.choice(STATUSES)}"
+        else:
+            requests.append((operation, "POST", "/auth/login", rng.choice(everybody)))
+            continue
+        requests.append((operation, "PATCH" if operation == "update_status" else "GET", path, actor))
+    return requests
+
+
+async def replay(app, actors: dict, requests, concurrency: int, warmup: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        headers = {}
+        for email in {email for emails in actors.values() for email in emails}:
+            r = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+            r.raise_for_status()
+            headers[email] = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        async def call(method, path, actor):
+            if path == "/auth/login":
+                return await client.post(path, json={"email": actor, "password": PASSWORD})
+            return await client.request(method, path, headers=headers[actor])
+
+        for operation, method, path, actor in requests[:warmup]:
+            await call(method, path, actor)
+
+        measured = requests[warmup:]
+        latencies = {operation: [] for operation in MIX}
+        errors = {operation: 0 for operation in MIX}
+        next_request = 0
+
+        async def client_loop():
+            nonlocal next_request
+            while next_request < len(measured):
+                operation, method, path, actor = measured[next_request]
+                next_request += 1
+                started = time.perf_counter()
+                r = await call(method, path, actor)
+                latencies[operation].append(time.perf_counter() - started)
+                # a 404 on a status update is a deleted/archived id, not a failure
+                if r.status_code >= 500 or (r.status_code >= 400 and r.status_code != 404):
+                    errors[operation] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return elapsed, latencies, errors
+
+
+def _percentiles(samples, elapsed: float):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return {
+        "count": len(samples),
+        "requests_per_second": round(len(samples) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2),
+        "p50_ms": round(pick(0.50), 2),
+        "p95_ms": round(pick(0.95), 2),
+        "p99_ms": round(pick(0.99), 2),
+    }
+
+
+def worker(args):
+    import logging
+    from app import app, database
+
+    # measure request handling, not console logging
+    logging.getLogger("app_logger").setLevel(logging.WARNING)
+
+    scale = dict(SCALES[args.scale])
+    scale["incidents"] = args.incidents or scale["incidents"]
+    scale["users"] = args.users or scale["users"]
+
+    seeded = None
+    if not args.no_seed:
+        seeded = seed_database(
+            scale["incidents"], scale["users"], seed=args.seed, workers=args.seed_workers,
+            password=PASSWORD, reset_first=True,
+        )
+    if args.seed_only:
+        _write_result({"seeded": seeded})
+        return
+
+    actors, max_incident_id = load_actors(args.actors_per_role)
+    # the request sequence has its own generator so it does not depend on whether this run seeded
+    requests = plan(random.Random(args.seed + 1), args.warmup + args.requests, actors, max_incident_id)
+
+    async def run():
+        try:
+            return await replay(app, actors, requests, args.concurrency, args.warmup)
+        finally:
+            # pooled aiosqlite connections keep non-daemon threads alive until closed
+            if database.async_engine is not None:
+                await database.async_engine.dispose()
+
+    elapsed, latencies, errors = asyncio.run(run())
+    all_samples = [s for samples in latencies.values() for s in samples]
+    _write_result({
+        "scale": args.scale,
+        "incidents": scale["incidents"],
+        "users": scale["users"],
+        "seed": args.seed,
+        "seeding": seeded,
+        "mode": database.DB_MODE,
+        "dialect": database.engine.dialect.name,
+        "profile": database.DB_PROFILE,
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(all_samples) / elapsed, 1),
+        "errors": errors,
+        "overall": _percentiles(all_samples, elapsed),
+        "operations": {op: _percentiles(samples, elapsed) for op, samples in latencies.items() if samples},
+    })
+
+
+def _write_result(result: dict):
+    # a file rather than stdout, which the log writer thread shares
+    with open(RESULT_FILE, "w") as f:
+        json.dump(result, f)
+
+
+def run_worker(args) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DB_PROFILE", "bench")
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    workdir = tempfile.mkdtemp(prefix="bench-workload-")
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    command = [sys.executable, os.path.abspath(__file__), "--worker"] + sys.argv[1:]
+    # run from a scratch directory so logs/ and the default database stay out of the tree
+    result = subprocess.run(command, env=env, cwd=workdir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"workload benchmark failed:\n{result.stderr}")
+    with open(os.path.join(workdir, RESULT_FILE)) as f:
+        return json.load(f)
+
+
+def _change(new, old) -> str:
+    if not old:
+        return ""
+    return f" ({(new - old) / old * 100:+.1f}%)"
+
+
+def report(result: dict, baseline: dict = None):
+    o = result["overall"]
+    base = (baseline or {}).get("operations", {})
+    print(f"{result['scale']} ({result['incidents']} incidents, {result['users']} users), "
+          f"{result['mode']} / {result['dialect']}, concurrency {result['concurrency']}")
+    print(f"overall: {result['requests_per_second']} req/s{_change(result['requests_per_second'], (baseline or {}).get('requests_per_second'))}  "
+          f"p50 {o['p50_ms']}ms  p95 {o['p95_ms']}ms  p99 {o['p99_ms']}ms")
+    for operation, p in result["operations"].items():
+        b = base.get(operation, {})
+        print(f"  {operation:<14} {p['count']:>6}  "
+              f"p50 {p['p50_ms']:>8}ms{_change(p['p50_ms'], b.get('p50_ms')):<10}  "
+              f"p95 {p['p95_ms']:>8}ms{_change(p['p95_ms'], b.get('p95_ms')):<10}  "
+              f"p99 {p['p99_ms']:>8}ms{_change(p['p99_ms'], b.get('p99_ms')):<10}  "
+              f"errors {result['errors'][operation]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a synthetic API workload and report per-operation latency")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--incidents", type=int, help="Override the incident count of --scale")
+    parser.add_argument("--users", type=int, help="Override the user count of --scale")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the data and the request sequence")
+    parser.add_argument("--requests", type=int, default=5000, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=200, help="Requests replayed before measuring")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--actors-per-role", type=int, default=5, help="Logged-in users per role that send requests")
+    parser.add_argument("--database-url", help="Database to seed and use (default: temporary SQLite)")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already in --database-url")
+    parser.add_argument("--seed-only", action="store_true", help="Seed --database-url and exit")
+    parser.add_argument("--seed-workers", type=int, default=1, help="Worker processes for scripts/seed.py")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+    if (args.no_seed or args.seed_only) and not args.database_url:
+        parser.error("--no-seed and --seed-only need --database-url")
+
+    result = run_worker(args)
+    if args.seed_only:
+        seeded = result["seeded"]
+        print(f"Seeded {seeded['incidents']} incidents and {seeded['users']} users "
+              f"(load {seeded['load_seconds']}s, indexes {seeded['index_seconds']}s, rollup {seeded['rollup_seconds']}s)")
+        return
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Move solved incidents older than ARCHIVE_AFTER_DAYS to incidents_archive now,
+instead of waiting for the background job:
+    python scripts/archive_incidents.py [--days 90] [--batch-size 500]
+"""
+
+import argparse
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.utils.archival import archive_solved, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+
+def archive_incidents(days: int, batch_size: int):
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        archived = archive_solved(db, days, batch_size)
+        print(f"Archived {archived} incidents solved more than {days} days ago in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"Error archiving incidents: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+    archive_incidents(args.days, args.batch_size)
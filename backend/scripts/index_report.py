@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Index usage report: runs EXPLAIN for the statements the incident list and
+/stats routers execute, built by app.queries with their real parameters, and
+shows which index each one uses. A query is reported as FULL SCAN when it
+reads a whole table and as SORT when it sorts every row its filters match to
+return a page, instead of reading an index in order.
+
+    python scripts/index_report.py            # report only
+    python scripts/index_report.py --apply    # create missing indexes first
+    python scripts/index_report.py --strict   # exit 1 if a scoped or filtered query scans a whole table
+                                              # or sorts its whole scope
+
+Works against SQLite (EXPLAIN QUERY PLAN) and Postgres (EXPLAIN) through DATABASE_URL.
+"""
+
+import argparse
+import re
+import sys
+import os
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Executable, ClauseElement
+
+from app.database import engine
+from app.models import Incident, IncidentArchive, IncidentChange, IncidentDailyStat
+from app.queries import incidents as incident_queries, stats as stats_queries, changes as change_queries
+from app.utils.pagination import encode_cursor
+
+
+class explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(explain)
+def _explain_default(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+@compiles(explain, "sqlite")
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+
+REPORT_TABLES = [Incident, IncidentArchive, IncidentChange, IncidentDailyStat]
+ROLES = ("admin_system", "admin_network", "user")
+
+
+# system-wide totals read every rollup row by design; the rollup is small
+WHOLE_ROLLUP = ("by-category", "status-distirubtion", "dashboard")
+
+
+def router_queries(user_id):
+    """(name, Scoped, whether a full scan is expected) for the statements behind each route, per role."""
+    queries = []
+    for role in ROLES:
+        user = SimpleNamespace(role=role, id=user_id)
+        where = incident_queries.list_filter(user)
+
+        queries.append((f"scope version (ETag) [{role}]", change_queries.scope_version(user), False))
+        page, _ = incident_queries.page_query(where, None, "created_at", "desc", 1, 10)
+        queries.append((f"GET /incidents/ [{role}]", page, False))
+        cursor = encode_cursor("created_at", "desc", datetime.utcnow().isoformat(), 1)
+        page, _ = incident_queries.page_query(where, None, "created_at", "desc", 1, 10, cursor)
+        queries.append((f"GET /incidents/?cursor= [{role}]", page, False))
+
+        for endpoint, build in stats_queries.BUILDERS.items():
+            if endpoint == "by-category" and stats_queries.is_sector_admin(user):
+                continue
+            query = build(user)
+            whole = role == "admin_system" and endpoint in WHOLE_ROLLUP
+            queries.append((f"GET /stats/{endpoint} [{role}]", (query.statement, query.params), whole))
+
+    system = SimpleNamespace(role="admin_system", id=user_id)
+    for name, values in (("status", ["open"]), ("category", ["network"])):
+        where = incident_queries.list_filter(system, **{name: values})
+        page, _ = incident_queries.page_query(where, None, "created_at", "desc", 1, 10)
+        queries.append((f"GET /incidents/?{name}={values[0]}", page, False))
+    return queries + shape_queries(user_id)
+
+
+def _cursor(sort_by: str, sort_order: str) -> str:
+    key = datetime.utcnow().isoformat() if sort_by == "created_at" else 2
+    return encode_cursor(sort_by, sort_order, key, 1)
+
+
+def shape_queries(user_id):
+    """The other cached statement shapes: every keyset seek, search, the archive union, counts and the change feed."""
+    queries = []
+    for role in ROLES:
+        user = SimpleNamespace(role=role, id=user_id)
+        where = incident_queries.list_filter(user)
+        for sort_by in ("created_at", "priority", "status"):
+            for sort_order in ("asc", "desc"):
+                page, _ = incident_queries.page_query(where, None, sort_by, sort_order, 1, 10, _cursor(sort_by, sort_order))
+                queries.append((f"GET /incidents/?sortBy={sort_by}&sortOrder={sort_order}&cursor= [{role}]", page, False))
+
+        searched = incident_queries.list_filter(user, search="printer")
+        page, _ = incident_queries.page_query(searched, None, "created_at", "desc", 1, 10)
+        queries.append((f"GET /incidents/?search= [{role}]", page, False))
+        queries.append((f"GET /incidents/search?q= [{role}]", incident_queries.search_query(user, "printer", None, 0, 10), False))
+
+        for suffix, list_where in (("", where), ("&search=", searched)):
+            page, _ = incident_queries.page_query(list_where, None, "created_at", "desc", 2, 10, include_archived=True)
+            queries.append((f"GET /incidents/?include_archived=true{suffix} [{role}]", page, False))
+        page, _ = incident_queries.page_query(where, None, "created_at", "desc", 1, 10, _cursor("created_at", "desc"), True)
+        queries.append((f"GET /incidents/?include_archived=true&cursor= [{role}]", page, False))
+
+        on_date = incident_queries.on_date(where, datetime.utcnow())
+        queries.append((f"GET /incidents/?startDate= exists probe [{role}]", incident_queries.exists_query(on_date, True), False))
+        for facets in incident_queries.facet_queries(where, True):
+            # an unfiltered count reads the whole scope: all rows for system admins
+            queries.append((f"GET /incidents/?include=facets [{role}]", facets, role == "admin_system"))
+
+        changes = change_queries.changes_since(user, 0, 500)
+        queries.append((f"GET /incidents/changes [{role}]", (changes.statement, changes.params), False))
+    return queries
+
+
+def plan_rows(conn, statement, params):
+    """EXPLAIN output as (id, parent id, line); the ids are None for Postgres, whose lines are indented instead."""
+    # raw cursor rows: the result processors belong to the explained statement's columns
+    result = conn.execute(explain(statement), params)
+    rows = result.cursor.fetchall()
+    result.close()
+    if conn.dialect.name == "sqlite":
+        return [(row[0], row[1], row[-1]) for row in rows]
+    return [(None, None, row[0]) for row in rows]
+
+
+def _report_tables():
+    return [model.__tablename__ for model in REPORT_TABLES]
+
+
+def is_full_scan(dialect, lines):
+    tables = _report_tables()
+    if dialect == "sqlite":
+        return any(
+            line.startswith("SCAN") and "USING" not in line and line.split()[1] in tables
+            for line in lines
+        )
+    return any(f"Seq Scan on {table} " in f"{line} " for line in lines for table in tables)
+
+
+def _reads_table(line, tables) -> bool:
+    # a table read that yields a range of rows, not single rows by primary key (a fulltext match list)
+    words = line.split()
+    return words[0] in ("SCAN", "SEARCH") and words[1] in tables and "INTEGER PRIMARY KEY" not in line
+
+
+def sorts_whole_scope(dialect, rows):
+    """
+    Whether the plan sorts every row its filters match to return a page: a
+    temp B-tree ORDER BY over a table read, instead of reading an index in
+    order. Sorts of a bounded subquery (merged page arms) and of the ties
+    within an index order ("RIGHT PART OF ORDER BY") do not count.
+    """
+    tables = _report_tables()
+    if dialect == "sqlite":
+        children = defaultdict(list)
+        for step_id, parent, line in rows:
+            children[parent].append((step_id, line))
+
+        def reads(step_id, line):
+            # table reads of a step, through the branches of a MULTI-INDEX OR but not into subqueries
+            if line.startswith(("MULTI-INDEX OR", "INDEX ")):
+                return any(reads(*child) for child in children[step_id])
+            return _reads_table(line, tables)
+
+        return any(
+            any(line == "USE TEMP B-TREE FOR ORDER BY" for _, line in steps) and any(reads(*step) for step in steps)
+            for steps in children.values()
+        )
+    lines = [line for _, _, line in rows]
+    for i, line in enumerate(lines):
+        if re.match(r"\s*(->\s+)?Sort\b", line):
+            child = next((l for l in lines[i + 1:] if "->" in l), "")
+            table = re.search(r"Scan on (\w+)", child)
+            if table and table.group(1) in tables:
+                return True
+    return False
+
+
+def apply_indexes(conn):
+    for model in REPORT_TABLES:
+        existing = {ix["name"] for ix in inspect(conn).get_indexes(model.__tablename__)}
+        for index in model.__table__.indexes:
+            if index.name not in existing:
+                index.create(conn)
+                print(f"created {index.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="create indexes missing from the database")
+    parser.add_argument("--strict", action="store_true",
+                        help="exit with status 1 if a query does a full scan or sorts its whole scope")
+    parser.add_argument("--no-seqscan", action="store_true",
+                        help="Postgres only: disable seq scans so small tables still show index eligibility")
+    parser.add_argument("--user-id", type=int, default=1, help="user id used for scoped queries")
+    args = parser.parse_args()
+
+    engine.echo = False
+    failures = []
+    with engine.begin() as conn:
+        if args.apply:
+            apply_indexes(conn)
+        if args.no_seqscan and conn.dialect.name == "postgresql":
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for name, (statement, params), whole in router_queries(args.user_id):
+            rows = plan_rows(conn, statement, params)
+            lines = [line for _, _, line in rows]
+            if is_full_scan(conn.dialect.name, lines):
+                label = "all rows" if whole else "FULL SCAN"
+            elif sorts_whole_scope(conn.dialect.name, rows):
+                label = "all rows" if whole else "SORT"
+            else:
+                label = "index"
+            if label in ("FULL SCAN", "SORT"):
+                failures.append(name)
+            print(f"{label:9}  {name}")
+            for line in lines:
+                print(f"           {line}")
+
+    print(f"\n{len(failures)} quer{'y' if len(failures) == 1 else 'ies'} scanning a whole table or sorting a whole scope")
+    if args.strict and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
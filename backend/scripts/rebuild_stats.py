@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Rebuild the incident_daily_stats rollup from the incidents table.
+
+Run after bulk imports or manual data fixes that bypassed the API:
+    python scripts/rebuild_stats.py
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.utils.stats_rollup import rebuild
+
+
+def rebuild_stats():
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        rows = rebuild(db)
+        db.commit()
+        print(f"Rebuilt incident_daily_stats: {rows} rows in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"Error rebuilding stats: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_stats()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Bulk-load synthetic users and incidents for staging and benchmarks.
+
+    python scripts/seed.py --incidents 1000000 --users 5000
+    python scripts/seed.py --incidents 5000000 --users 10000 --workers 4 --reset
+
+Users cover every role and share one precomputed password hash. Incidents are
+spread over the last --days with more recent days, business hours and
+weekdays weighted up, and realistic mixes of category, priority and status;
+in-progress and solved incidents get a resolver from the admins of their
+sector. The same --seed gives the same rows, relative to the day of the
+run, for any --workers.
+
+Rows are generated in chunks and written without the ORM: plain executemany
+on SQLite, COPY on Postgres (psycopg2), Core executemany elsewhere. The
+incident indexes and the SQLite full-text trigger are dropped during the load
+and rebuilt once at the end (--keep-indexes to skip that), then the /stats
+rollup is rebuilt. With --workers, chunks are generated in worker processes;
+on Postgres each worker also COPYs its own chunks.
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import random
+import sys
+import time
+from bisect import bisect
+from datetime import datetime, timezone
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the app is imported inside the functions that need it, so worker processes
+# only generate rows and never run the app's startup (schema, triggers)
+
+CHUNK_SIZE = 20_000
+DEFAULT_PASSWORD = "seed1234"
+EMAIL_DOMAIN = "seed.example.com"
+
+CATEGORIES = ["hardware", "software", "network", "security"]
+SECTORS = {"hardware": "Hardware", "software": "Software", "network": "Network", "security": "Security"}
+CATEGORY_WEIGHTS = [30, 35, 25, 10]
+PRIORITIES = ["low", "medium", "high", "critical"]
+PRIORITY_WEIGHTS = [35, 40, 20, 5]
+STATUSES = ["open", "in_progress", "solved"]
+STATUS_WEIGHTS = [20, 15, 65]
+# incidents per hour of the day, and per weekday (Monday first)
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 10, 18, 20, 19, 16, 12, 16, 18, 16, 12, 8, 5, 3, 2, 2, 1, 1]
+WEEKDAY_WEIGHTS = [22, 21, 20, 19, 16, 2, 1]
+# mean hours until the last update of in-progress and solved incidents
+UPDATE_DELAY_HOURS = {"in_progress": 6, "solved": 40}
+IN_PROGRESS_ASSIGNED = 0.7
+
+SUBJECTS = {
+    "hardware": ["printer", "laptop", "monitor", "docking station", "keyboard", "projector"],
+    "software": ["outlook", "erp client", "vpn client", "browser", "license server", "excel macro"],
+    "network": ["wifi", "switch", "vpn tunnel", "dns", "firewall rule", "uplink"],
+    "security": ["phishing mail", "locked account", "malware alert", "badge reader", "certificate", "usb policy"],
+}
+PROBLEMS = ["not responding", "keeps crashing", "very slow", "fails after update", "shows an error", "cannot connect"]
+PLACES = ["floor 1", "floor 2", "floor 3", "building A", "building B", "warehouse", "reception", "meeting room 4"]
+
+INCIDENT_COLUMNS = (
+    "title", "description", "category", "status", "priority",
+    "reporter_id", "resolver_id", "created_at", "updated_at",
+)
+
+
+def user_rows(count: int, password_hash: str) -> list:
+    """System admins, sector admins and reporters in a fixed proportion; every role is present."""
+    roles = [("admin_system", "Software")] * max(1, count // 200)
+    for category in CATEGORIES:
+        roles += [(f"admin_{category}", SECTORS[category])] * max(1, count // 50)
+    roles += [("user", None)] * max(0, count - len(roles))
+    now = datetime.utcnow()
+    return [
+        {"name": f"{role} {i}", "email": f"{role}.{i}@{EMAIL_DOMAIN}", "password": password_hash,
+         "role": role, "sector": sector, "is_active": True, "created_at": now}
+        for i, (role, sector) in enumerate(roles)
+    ]
+
+
+def _cumulative(weights):
+    total, out = 0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+# set in each process by _init_worker
+_plan = None
+_engine = None
+
+
+def _init_worker(plan: dict):
+    global _plan, _engine
+    _plan = dict(plan)
+    # day d of the window starts at start + d * 86400 (UTC midnights); the last day is today
+    days, end = plan["days"], plan["end"]
+    start = end - end % 86400 - (days - 1) * 86400
+    # days weighted by weekday and by recency (traffic grows over time)
+    day_weights = []
+    for d in range(days):
+        weekday = datetime.fromtimestamp(start + d * 86400, timezone.utc).weekday()
+        day_weights.append(WEEKDAY_WEIGHTS[weekday] * (1 + d / days))
+    _plan["start"] = start
+    _plan["day_cum"] = _cumulative(day_weights)
+    _plan["hour_cum"] = _cumulative(HOUR_WEIGHTS)
+    _plan["category_cum"] = _cumulative(CATEGORY_WEIGHTS)
+    _plan["status_cum"] = _cumulative(STATUS_WEIGHTS)
+    _plan["priority_cum"] = _cumulative(PRIORITY_WEIGHTS)
+    _plan["titles"] = {c: [f"{s} {p}" for s in SUBJECTS[c] for p in PROBLEMS] for c in CATEGORIES}
+    # timestamps are put together from per-day and per-second strings rather
+    # than formatted row by row; SQLite gets the format SQLAlchemy stores
+    suffix = "+00" if plan["target"] == "copy" else ""
+    _plan["day_text"] = [
+        datetime.fromtimestamp(start + d * 86400, timezone.utc).strftime("%Y-%m-%d ") for d in range(days)
+    ]
+    _plan["second_text"] = [
+        f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}{suffix}" for s in range(86400)
+    ]
+    _engine = None
+
+
+def generate_chunk(index: int, size: int) -> list:
+    """Rows of chunk index as tuples in INCIDENT_COLUMNS order, formatted for the plan's target."""
+    plan = _plan
+    # one generator per chunk: the output does not depend on how chunks are spread over workers
+    rng = random.Random(f"{plan['seed']}-{index}")
+    start, now, target = plan["start"], plan["end"], plan["target"]
+
+    # chunk i takes the i-th slice of the weighted timeline, so written in
+    # order the ids follow created_at (to the day) as they would in production
+    day_cum = plan["day_cum"]
+    low, width = day_cum[-1] * index / plan["chunks"], day_cum[-1] / plan["chunks"]
+    # random() and indexing instead of choice()/randrange() in the per-row loops: same distribution, half the cost
+    random_ = rng.random
+    days = [bisect(day_cum, low + width * random_()) for _ in range(size)]
+    hours = rng.choices(range(24), cum_weights=plan["hour_cum"], k=size)
+    created = sorted(
+        min(now, start + day * 86400 + hour * 3600 + int(3600 * random_())) for day, hour in zip(days, hours)
+    )
+    categories = rng.choices(CATEGORIES, cum_weights=plan["category_cum"], k=size)
+    statuses = rng.choices(STATUSES, cum_weights=plan["status_cum"], k=size)
+    priorities = rng.choices(PRIORITIES, cum_weights=plan["priority_cum"], k=size)
+    reporters = rng.choices(plan["reporters"], k=size)
+    places = rng.choices(PLACES, k=size)
+    title_picks = rng.choices(range(len(SUBJECTS["hardware"]) * len(PROBLEMS)), k=size)
+
+    if target == "core":
+        timestamp = lambda ts: datetime.fromtimestamp(ts, timezone.utc)
+    else:
+        day_text, second_text = plan["day_text"], plan["second_text"]
+        timestamp = lambda ts: day_text[(ts - start) // 86400] + second_text[(ts - start) % 86400]
+
+    rows = []
+    first_ticket = index * plan["chunk_size"]
+    titles, resolvers = plan["titles"], plan["resolvers"]
+    for i in range(size):
+        category, status, created_at = categories[i], statuses[i], created[i]
+        title = titles[category][title_picks[i]]
+        resolver = None
+        updated_at = created_at
+        if status != "open":
+            if status == "solved" or random_() < IN_PROGRESS_ASSIGNED:
+                candidates = resolvers[category]
+                resolver = candidates[int(len(candidates) * random_())]
+            updated_at = min(now, created_at + int(rng.expovariate(1 / (UPDATE_DELAY_HOURS[status] * 3600))))
+        rows.append((
+            title,
+            f"the {title} in {places[i]} (ticket {first_ticket + i})",
+            category, status, priorities[i], reporters[i], resolver,
+            timestamp(created_at), timestamp(updated_at),
+        ))
+    return rows
+
+
+def _generate(args):
+    return generate_chunk(*args)
+
+
+def _copy_chunk(args):
+    # Postgres workers: generate and COPY a chunk over the worker's own connection
+    global _engine
+    from sqlalchemy import create_engine
+    if _engine is None:
+        _engine = create_engine(_plan["url"], pool_size=1)
+    rows = generate_chunk(*args)
+    write_copy(_engine, rows)
+    return len(rows)
+
+
+def write_sqlite(conn, rows):
+    conn.exec_driver_sql(
+        f"INSERT INTO incidents ({', '.join(INCIDENT_COLUMNS)}) VALUES ({', '.join('?' * len(INCIDENT_COLUMNS))})",
+        rows
+    )
+
+
+def write_copy(engine, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join("\\N" if v is None else str(v) for v in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.copy_expert(f"COPY incidents ({', '.join(INCIDENT_COLUMNS)}) FROM STDIN", buffer)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def write_core(conn, rows):
+    from app.models import Incident
+    conn.execute(Incident.__table__.insert(), [dict(zip(INCIDENT_COLUMNS, row)) for row in rows])
+
+
+def _chunks(count: int):
+    return [(i, min(CHUNK_SIZE, count - i * CHUNK_SIZE)) for i in range((count + CHUNK_SIZE - 1) // CHUNK_SIZE)]
+
+
+def drop_incident_indexes(engine) -> list:
+    """Drop the secondary incident indexes and the SQLite full-text insert trigger; returns what to restore."""
+    from sqlalchemy import text
+    from app.models import Incident
+
+    dialect = engine.dialect.name
+    indexes = list(Incident.__table__.indexes)
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn, checkfirst=True)
+        if dialect == "sqlite":
+            conn.execute(text("DROP TRIGGER IF EXISTS incidents_fts_ai"))
+        elif dialect == "postgresql":
+            conn.execute(text("DROP INDEX IF EXISTS ix_incidents_search_vector"))
+    return indexes
+
+
+def restore_incident_indexes(engine, indexes):
+    from sqlalchemy import text
+    from app.utils import fulltext
+
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+        if dialect == "sqlite":
+            has_fts = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'incidents_fts'")
+            ).first()
+            if has_fts:
+                conn.execute(text("INSERT INTO incidents_fts(incidents_fts) VALUES ('rebuild')"))
+                conn.execute(text(fulltext.SQLITE_DDL[0]))
+        elif dialect == "postgresql":
+            conn.execute(text(fulltext.POSTGRES_DDL[1]))
+
+
+def seed_users(engine, count: int, password: str) -> dict:
+    """Insert the users that are not there yet; returns reporter ids and resolver ids per category."""
+    from sqlalchemy import insert, select
+    from app.models import User
+    from app.utils.hashing import hash_password
+
+    users = User.__table__
+    # one bcrypt hash shared by every seeded user
+    rows = user_rows(count, hash_password(password))
+    with engine.begin() as conn:
+        existing = set(conn.execute(select(users.c.email).where(users.c.email.like(f"%@{EMAIL_DOMAIN}"))).scalars())
+        rows = [row for row in rows if row["email"] not in existing]
+        if rows:
+            conn.execute(insert(users), rows)
+        seeded = conn.execute(
+            select(users.c.id, users.c.role).where(users.c.email.like(f"%@{EMAIL_DOMAIN}")).order_by(users.c.id)
+        ).all()
+    return {
+        "reporters": [user_id for user_id, role in seeded if role == "user"],
+        "resolvers": {c: [user_id for user_id, role in seeded if role == f"admin_{c}"] for c in CATEGORIES},
+    }
+
+
+def reset(engine):
+    """Delete all incidents (archived too), their change log and rollup, and every user."""
+    from sqlalchemy import delete, text
+    from app.models import Incident, IncidentArchive, IncidentChange, IncidentDailyStat, User
+    from app.utils import fulltext
+
+    with engine.begin() as conn:
+        has_fts = engine.dialect.name == "sqlite" and conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'incidents_fts'")
+        ).first()
+        if has_fts:
+            # without the per-row delete trigger SQLite truncates the table in one go
+            conn.execute(text("DROP TRIGGER IF EXISTS incidents_fts_ad"))
+        for model in (IncidentChange, IncidentDailyStat, IncidentArchive, Incident, User):
+            conn.execute(delete(model.__table__))
+        if has_fts:
+            conn.execute(text("INSERT INTO incidents_fts(incidents_fts) VALUES ('delete-all')"))
+            conn.execute(text(fulltext.SQLITE_DDL[1]))
+
+
+def seed_incidents(engine, count: int, ids: dict, seed: int = 1, days: int = 365, workers: int = 1,
+                   keep_indexes: bool = False, progress=None) -> dict:
+    """Generate and write count incidents; returns the count and the load / index rebuild times."""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        target = "sqlite"
+    elif dialect == "postgresql" and engine.dialect.driver == "psycopg2":
+        target = "copy"
+    else:
+        target = "core"
+
+    chunks = _chunks(count)
+    plan = {
+        "seed": seed, "days": days, "end": int(time.time()), "target": target,
+        "chunks": len(chunks), "chunk_size": CHUNK_SIZE,
+        "url": engine.url.render_as_string(hide_password=False), **ids,
+    }
+    dropped = [] if keep_indexes else drop_incident_indexes(engine)
+    written = 0
+    pool = None
+    started = time.perf_counter()
+    try:
+        if workers > 1:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(plan,))
+        else:
+            _init_worker(plan)
+
+        if target == "copy" and pool is not None:
+            for n in pool.imap_unordered(_copy_chunk, chunks):
+                written += n
+                if progress:
+                    progress(written)
+        else:
+            # one writer: SQLite takes one at a time, and ids stay in created_at order
+            generated = pool.imap(_generate, chunks) if pool is not None else map(_generate, chunks)
+            with engine.connect() as conn:
+                if dialect == "sqlite":
+                    conn.exec_driver_sql("PRAGMA synchronous=OFF")
+                for rows in generated:
+                    if target == "copy":
+                        write_copy(engine, rows)
+                    elif target == "sqlite":
+                        write_sqlite(conn, rows)
+                    else:
+                        write_core(conn, rows)
+                    conn.commit()
+                    written += len(rows)
+                    if progress:
+                        progress(written)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        loaded = time.perf_counter()
+        if dropped:
+            restore_incident_indexes(engine, dropped)
+    return {
+        "incidents": written,
+        "load_seconds": round(loaded - started, 2),
+        "index_seconds": round(time.perf_counter() - loaded, 2),
+    }
+
+
+def seeding_engine():
+    """An engine on the app database with the profile's settings but no SQL echo."""
+    from sqlalchemy import create_engine
+    from app import database
+
+    # the dev profile echoes every statement, which for a bulk load is every batch
+    engine = create_engine(database.DATABASE_URL, **dict(database.engine_options(database.DATABASE_URL), echo=False))
+    database.configure_sqlite(engine)
+    return engine
+
+
+def seed_database(incidents: int, users: int, seed: int = 1, days: int = 365, workers: int = 1,
+                  password: str = DEFAULT_PASSWORD, reset_first: bool = False, keep_indexes: bool = False,
+                  progress=None) -> dict:
+    """Seed the app database; returns counts and timings."""
+    from sqlalchemy.orm import Session
+    from app.utils.stats_rollup import rebuild
+
+    engine = seeding_engine()
+    try:
+        timings = {}
+        started = time.perf_counter()
+        if reset_first:
+            reset(engine)
+        ids = seed_users(engine, users, password)
+        timings["users_seconds"] = round(time.perf_counter() - started, 2)
+
+        loaded = seed_incidents(engine, incidents, ids, seed, days, workers, keep_indexes, progress)
+
+        started = time.perf_counter()
+        with Session(engine) as db:
+            rebuild(db)
+            db.commit()
+        timings["rollup_seconds"] = round(time.perf_counter() - started, 2)
+    finally:
+        engine.dispose()
+    return {"users": users, **loaded, **timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic users and incidents")
+    parser.add_argument("--incidents", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=1, help="Random seed; same seed, same data")
+    parser.add_argument("--days", type=int, default=365, help="Spread incidents over this many past days")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating (and on Postgres writing) chunks")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password of every seeded user")
+    parser.add_argument("--reset", action="store_true", help="Delete all incidents and users first")
+    parser.add_argument("--keep-indexes", action="store_true", help="Insert with the incident indexes in place")
+    args = parser.parse_args()
+
+    # seeding_engine never echoes; keep the app startup run on import quiet too
+    os.environ.setdefault("DB_ECHO", "false")
+
+    def progress(written):
+        print(f"\r{written}/{args.incidents} incidents", end="", flush=True)
+
+    try:
+        result = seed_database(
+            args.incidents, args.users, args.seed, args.days, args.workers,
+            args.password, args.reset, args.keep_indexes, progress,
+        )
+    except Exception as e:
+        print(f"\nError seeding database: {e}")
+        sys.exit(1)
+    print()
+    print(f"Users: {result['users']} in {result['users_seconds']}s (password: {args.password})")
+    print(f"Incidents: {result['incidents']} in {result['load_seconds']}s "
+          f"({result['incidents'] / max(result['load_seconds'], 1e-9):,.0f} rows/s)")
+    if not args.keep_indexes:
+        print(f"Incident indexes and full-text index rebuilt in {result['index_seconds']}s")
+    print(f"Stats rollup rebuilt in {result['rollup_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+
+# one in-memory database shared by the app and the tests; set before app is imported
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["DB_MODE"] = "sync"
+os.environ["DB_ECHO"] = "false"
+os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, text
+
+from app import app, models, database
+from app.utils import token
+
+ROLES = ("admin_system", "admin_network", "user")
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    with database.SessionLocal() as db:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            db.execute(delete(table))
+        # AUTOINCREMENT counters (the change log seq) start over as well
+        db.execute(text("DELETE FROM sqlite_sequence"))
+        db.commit()
+    # user ids are reused across tests
+    token.user_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def users(db):
+    """One user per role, plus a second reporter, keyed by role name. They authenticate with auth(), not a password."""
+    created = {}
+    for name, role in [(role, role) for role in ROLES] + [("other_user", "user")]:
+        user = models.User(name=name, email=f"{name}@example.com", password="-", role=role)
+        db.add(user)
+        created[name] = user
+    db.commit()
+    for user in created.values():
+        db.refresh(user)
+        db.expunge(user)
+    return created
+
+
+@pytest.fixture
+def headers(users):
+    """Bearer headers per user, keyed like users."""
+    return {
+        name: {"Authorization": f"Bearer {token.create_access_token({'sub': user.email})}"}
+        for name, user in users.items()
+    }
@@ -0,0 +1,47 @@
+import json
+
+from sqlalchemy import func, select
+
+from app import models
+from app.utils import bulk_ingest
+
+
+def item(users, i):
+    return {"title": f"printer {i}", "description": "jammed", "category": "hardware", "priority": "high",
+            "reporter_id": users["user"].id}
+
+
+def post(client, headers, body, content_type):
+    return client.post("/incidents/bulk", headers=dict(headers["user"], **{"Content-Type": content_type}), content=body)
+
+
+def count(db):
+    return db.execute(select(func.count()).select_from(models.Incident)).scalar()
+
+
+def test_ndjson_batches_are_stored(client, db, users, headers, monkeypatch):
+    # several batches, each committed in a session of its own
+    monkeypatch.setattr(bulk_ingest, "BULK_BATCH_SIZE", 3)
+    lines = [json.dumps(item(users, i)) for i in range(7)] + ["{not json"]
+    response = post(client, headers, "\n".join(lines), "application/x-ndjson")
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == 7 and response.json()["failed"] == 1
+    assert count(db) == 7
+
+
+def test_ndjson_line_over_the_cap_is_refused(client, db, users, headers, monkeypatch):
+    monkeypatch.setattr(bulk_ingest, "BULK_MAX_LINE_BYTES", 1024)
+    # no newline at all: the body is never buffered past the cap
+    response = post(client, headers, b"x" * 4096, "application/x-ndjson")
+    assert response.status_code == 413
+
+    long_item = dict(item(users, 0), description="x" * 2048)
+    response = post(client, headers, json.dumps(item(users, 1)) + "\n" + json.dumps(long_item) + "\n", "application/x-ndjson")
+    assert response.status_code == 413
+
+
+def test_json_array_over_the_cap_is_refused(client, db, users, headers, monkeypatch):
+    monkeypatch.setattr(bulk_ingest, "BULK_MAX_BYTES", 1024)
+    body = json.dumps([item(users, i) for i in range(50)])
+    assert post(client, headers, body, "application/json").status_code == 413
+    assert count(db) == 0
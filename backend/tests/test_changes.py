@@ -0,0 +1,34 @@
+def create(client, headers, users, category):
+    body = dict(title="printer", description="jammed", category=category, priority="high",
+                reporter_id=users["user"].id)
+    response = client.post("/incidents/", headers=headers["user"], json=body)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def walk(client, headers, since, limit):
+    ids, has_more = [], True
+    while has_more:
+        response = client.get("/incidents/changes", headers=headers, params={"since": since, "limit": limit})
+        assert response.status_code == 200, response.text
+        feed = response.json()
+        ids += [change["id"] for change in feed["changes"]]
+        since, has_more = feed["cursor"], feed["has_more"]
+    return ids
+
+
+def test_sector_admin_feed_merges_both_scope_branches(client, users, headers):
+    # seq values are never reused, so start from the current cursor
+    start = client.get("/incidents/changes", headers=headers["admin_network"]).json()["cursor"]
+    # unassigned network incidents, and hardware ones assigned to the network admin
+    network = [create(client, headers, users, "network") for _ in range(4)]
+    hardware = [create(client, headers, users, "hardware") for _ in range(4)]
+    for incident_id in hardware[::2]:
+        response = client.patch(f"/incidents/{incident_id}/status", headers=headers["admin_network"],
+                                params={"new_status": "solved"})
+        assert response.status_code == 200
+
+    # entries come in the order of each incident's last change
+    expected = network + hardware[::2]
+    assert walk(client, headers["admin_network"], start, 1000) == expected
+    assert walk(client, headers["admin_network"], start, 2) == expected
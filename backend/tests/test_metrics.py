@@ -0,0 +1,23 @@
+import re
+
+
+def sample(body: str, name: str) -> float:
+    return float(re.search(rf"^{re.escape(name)} (\S+)$", body, re.M).group(1))
+
+
+def test_pool_status_is_pool_and_engine_state(client, headers):
+    response = client.get("/admin/pool", headers=headers["admin_system"])
+    assert response.status_code == 200, response.text
+    assert set(response.json()) == {"mode", "profile", "database", "threadpool"}
+
+
+def test_process_counters_are_metrics(client, headers):
+    misses = 'app_cache_misses_total{cache="stats"}'
+    before = sample(client.get("/metrics").text, misses)
+    client.get("/stats/dashboard", headers=headers["admin_system"])
+    body = client.get("/metrics").text
+    assert "# TYPE app_cache_hits_total counter" in body
+    assert sample(body, misses) == before + 1
+    assert sample(body, "password_hash_queued") == 0
+    assert sample(body, "archive_job_running") == 0
+    assert "statement_cache_statements " in body
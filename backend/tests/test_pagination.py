@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+from app import models
+from app.models import PRIORITY_RANK, STATUS_RANK
+from app.utils import archival
+from app.utils.pagination import encode_cursor, decode_cursor
+
+PAGE_SIZE = 7
+SORTS = [(sort_by, sort_order) for sort_by in ("created_at", "priority", "status") for sort_order in ("asc", "desc")]
+ROLES = ("admin_system", "admin_network", "user")
+
+BASE = datetime(2026, 1, 5, 9, 0, 0)
+CATEGORIES = list(models.IncidentCategory)
+PRIORITIES = list(models.IncidentPriority)
+STATUSES = list(models.IncidentStatus)
+
+
+def _row(i, users):
+    # few distinct sort keys, so every page boundary falls inside a run of ties
+    return {
+        "title": f"incident {i}",
+        "description": "seeded",
+        "category": CATEGORIES[(i // 2) % 4],
+        "priority": PRIORITIES[(i // 4) % 4],
+        "status": STATUSES[(i // 3) % 3],
+        "reporter_id": users["user" if i % 3 else "other_user"].id,
+        "resolver_id": users["admin_network"].id if i % 5 == 0 else None,
+        "created_at": BASE + timedelta(hours=i % 4),
+        # recent, so the archival job only takes rows a test backdates
+        "updated_at": datetime(2026, 9, 1),
+    }
+
+
+@pytest.fixture
+def incidents(db, users):
+    """48 live incidents and 6 archived ones, as plain dicts with their ids."""
+    live = [_row(i, users) for i in range(48)]
+    ids = db.execute(insert(models.Incident).returning(models.Incident.id, sort_by_parameter_order=True), live).scalars().all()
+    archived = [dict(_row(i, users), id=1000 + i, status=models.IncidentStatus.solved) for i in range(6)]
+    db.execute(insert(models.IncidentArchive), archived)
+    db.commit()
+    return {"live": [dict(row, id=id_) for row, id_ in zip(live, ids)], "archived": archived}
+
+
+def visible(row, user) -> bool:
+    if user.role == "admin_system":
+        return True
+    if user.role.startswith("admin_"):
+        sector = user.role.replace("admin_", "")
+        return row["resolver_id"] == user.id or (row["resolver_id"] is None and row["category"].value == sector)
+    return row["reporter_id"] == user.id
+
+
+def expected_ids(rows, user, sort_by, sort_order) -> list:
+    keys = {
+        "created_at": lambda row: row["created_at"],
+        "priority": lambda row: PRIORITY_RANK[row["priority"]],
+        "status": lambda row: STATUS_RANK[row["status"]],
+    }
+    key = keys[sort_by]
+    ordered = sorted((row for row in rows if visible(row, user)), key=lambda row: (key(row), row["id"]),
+                     reverse=sort_order == "desc")
+    return [row["id"] for row in ordered]
+
+
+def get_page(client, headers, sort_by, sort_order, include_archived=False, **params):
+    response = client.get("/incidents/", headers=headers, params=dict(
+        params, sortBy=sort_by, sortOrder=sort_order, page_size=PAGE_SIZE,
+        include_archived=str(include_archived).lower()
+    ))
+    assert response.status_code == 200, response.text
+    return [row["id"] for row in response.json()], response.headers.get("X-Next-Cursor")
+
+
+def offset_walk(client, headers, sort_by, sort_order, include_archived=False) -> list:
+    ids, page = [], 1
+    while True:
+        rows, _ = get_page(client, headers, sort_by, sort_order, include_archived, page=page)
+        if not rows:
+            return ids
+        ids += rows
+        page += 1
+
+
+def cursor_walk(client, headers, sort_by, sort_order, include_archived=False, after_first_page=None) -> list:
+    ids, cursor = get_page(client, headers, sort_by, sort_order, include_archived)
+    if after_first_page:
+        after_first_page(ids[-1])
+    while cursor:
+        rows, cursor = get_page(client, headers, sort_by, sort_order, include_archived, cursor=cursor)
+        # a cursor is only issued when another row exists, and never leads back
+        assert rows and not set(rows) & set(ids)
+        ids += rows
+    return ids
+
+
+@pytest.mark.parametrize("include_archived", [False, True])
+@pytest.mark.parametrize("sort_by,sort_order", SORTS)
+@pytest.mark.parametrize("role", ROLES)
+def test_cursor_walk_matches_offset_walk(client, users, headers, incidents, role, sort_by, sort_order, include_archived):
+    rows = incidents["live"] + (incidents["archived"] if include_archived else [])
+    expected = expected_ids(rows, users[role], sort_by, sort_order)
+    assert len(expected) > PAGE_SIZE
+
+    assert offset_walk(client, headers[role], sort_by, sort_order, include_archived) == expected
+    assert cursor_walk(client, headers[role], sort_by, sort_order, include_archived) == expected
+
+
+@pytest.mark.parametrize("sort_by,sort_order", SORTS)
+@pytest.mark.parametrize("role", ROLES)
+def test_cursor_survives_deleted_anchor(client, users, headers, incidents, role, sort_by, sort_order):
+    expected = expected_ids(incidents["live"], users[role], sort_by, sort_order)
+
+    def delete_anchor(incident_id):
+        assert client.delete(f"/incidents/{incident_id}", headers=headers["admin_system"]).status_code == 204
+
+    # the anchor was already returned on the first page; nothing after it is skipped or repeated
+    assert cursor_walk(client, headers[role], sort_by, sort_order, after_first_page=delete_anchor) == expected
+
+
+@pytest.mark.parametrize("sort_by,sort_order", SORTS)
+def test_cursor_survives_archived_anchor(client, db, users, headers, incidents, sort_by, sort_order):
+    expected = expected_ids(incidents["live"], users["admin_system"], sort_by, sort_order)
+    cutoff = datetime(2026, 6, 1)
+
+    def archive_anchor(incident_id):
+        db.execute(
+            update(models.Incident).where(models.Incident.id == incident_id)
+            .values(status=models.IncidentStatus.solved, updated_at=BASE)
+        )
+        db.commit()
+        assert archival.archive_batch(db, cutoff) == 1
+
+    assert cursor_walk(client, headers["admin_system"], sort_by, sort_order, after_first_page=archive_anchor) == expected
+
+
+def test_cursor_matches_database_timestamps(client, users, headers):
+    # created_at comes from the column default here, and the cursor carries it back
+    body = dict(description="jammed", category="hardware", priority="high", reporter_id=users["user"].id)
+    created = [
+        client.post("/incidents/", headers=headers["user"], json=dict(body, title=f"printer {i}")).json()["id"]
+        for i in range(PAGE_SIZE * 2 + 1)
+    ]
+    assert cursor_walk(client, headers["user"], "created_at", "desc") == created[::-1]
+
+
+def test_last_page_has_no_cursor(client, headers, incidents):
+    ids, cursor = get_page(client, headers["user"], "created_at", "desc")
+    while cursor:
+        ids, cursor = get_page(client, headers["user"], "created_at", "desc", cursor=cursor)
+    assert 0 < len(ids) <= PAGE_SIZE
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("priority", "asc", 3, 42)
+    assert decode_cursor(cursor, "priority", "asc") == {"s": "priority", "o": "asc", "k": 3, "i": 42}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("priority", "asc", 3, 42), encode_cursor("created_at", "desc", "yesterday", 1)])
+def test_invalid_cursor_is_rejected(client, headers, incidents, cursor):
+    response = client.get("/incidents/", headers=headers["user"], params={"cursor": cursor})
+    assert response.status_code == 400
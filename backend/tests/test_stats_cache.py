@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import event
+
+from app import database
+from app.utils.stats_cache import stats_cache
+
+
+@pytest.fixture
+def statements():
+    """SQL statements run by the app while the test body runs."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(database.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    stats_cache._cache.evict(lambda key: True)
+
+
+def reads_rollup(statements) -> bool:
+    return any("incident_daily_stats" in statement for statement in statements)
+
+
+def create(client, headers, users):
+    body = dict(title="printer", description="jammed", category="hardware", priority="high",
+                reporter_id=users["user"].id)
+    assert client.post("/incidents/", headers=headers["user"], json=body).status_code == 201
+
+
+def test_miss_answers_304_before_the_stats_query(client, users, headers, statements):
+    create(client, headers, users)
+    first = client.get("/stats/dashboard", headers=headers["user"])
+    assert first.status_code == 200
+
+    # a fresh worker, an eviction or an expired entry
+    stats_cache._cache.evict(lambda key: True)
+    statements.clear()
+    again = client.get("/stats/dashboard", headers=dict(headers["user"], **{"If-None-Match": first.headers["ETag"]}))
+    assert again.status_code == 304
+    assert not reads_rollup(statements)
+
+
+def test_hit_runs_no_query(client, users, headers, statements):
+    first = client.get("/stats/last-7-days", headers=headers["user"])
+    statements.clear()
+    again = client.get("/stats/last-7-days", headers=headers["user"])
+    assert again.json() == first.json() and again.headers["ETag"] == first.headers["ETag"]
+    assert not reads_rollup(statements)
+
+
+def test_write_in_scope_changes_the_tag(client, users, headers):
+    before = client.get("/stats/dashboard", headers=headers["user"])
+    create(client, headers, users)
+    after = client.get("/stats/dashboard", headers=dict(headers["user"], **{"If-None-Match": before.headers["ETag"]}))
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert sum(after.json()["by_category"].values()) == 1
@@ -0,0 +1,41 @@
+from sqlalchemy import update
+
+from app import models
+from app.utils import token
+
+
+def test_cached_user_is_a_snapshot(db, users):
+    user = token.get_user_by_email(db, users["user"].email)
+    assert isinstance(user, token.CachedUser)
+    assert (user.id, user.role, user.is_active) == (users["user"].id, "user", True)
+    # the snapshot outlives the session that loaded it
+    db.close()
+    assert token.user_cache.get(user.email) == user
+
+
+def test_me_reads_the_snapshot(client, headers, users):
+    response = client.get("/auth/me", headers=headers["admin_network"])
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == users["admin_network"].email
+
+
+def test_row_read_during_a_change_is_not_cached(db, users):
+    email = users["user"].email
+    # a request reads the row, then the user is deactivated before it caches it
+    generation = token._user_generation
+    row = db.execute(token._user_query(email)).first()
+    token.user_changing(email)
+    db.execute(update(models.User).where(models.User.email == email).values(is_active=False))
+    db.commit()
+    token.invalidate_user(email)
+
+    assert token._cache_user(email, row, generation) is not None
+    assert token.user_cache.get(email) is None
+    assert token.get_user_by_email(db, email) is None
+
+
+def test_deleted_user_is_rejected(client, headers, users):
+    assert client.get("/auth/me", headers=headers["user"]).status_code == 200
+    response = client.delete(f"/users/{users['user'].id}", headers=headers["admin_system"])
+    assert response.status_code == 200, response.text
+    assert client.get("/auth/me", headers=headers["user"]).status_code == 401
@@ -2,6 +2,8 @@ import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import Menu from "../Menu/Menu";
 import api from "../../services/api";
+import { applyIncidentEvent } from "../../services/incidentEvents";
+import useIncidentEvents from "../../hooks/useIncidentEvents";
 import "../Dashboards/Dashboard.css";
 import ThreeMonthsDonutApex from "../Statistics/statsDonutChartStatus";
 import Last7DaysAreaChart from "../Statistics/statusAreaChartStatus";
@@ -9,6 +11,7 @@ import Last7DaysAreaChart from "../Statistics/statusAreaChartStatus";
 export default function SystemAdminDashboard() {
   const [incidents, setIncidents] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [reloadKey, setReloadKey] = useState(0);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -25,7 +28,13 @@ export default function SystemAdminDashboard() {
     };
     fetchIncidents();
     return () => (isMounted = false);
-  }, []);
+  }, [reloadKey]);
+
+  // live updates instead of refetching; a resync means events were missed
+  useIncidentEvents((event) => {
+    if (event.type === "resync") setReloadKey((k) => k + 1);
+    else setIncidents((prev) => applyIncidentEvent(prev, event));
+  });
 
   const latestIncidents = [...incidents]
     .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))
@@ -7,15 +7,18 @@ import { ChevronDownCircleIcon } from "lucide-react";
 import DatePicker from "react-datepicker";
 import "react-datepicker/dist/react-datepicker.css";
 import useClickOutside from "../../hooks/useClickOutside";
+import useIncidentEvents from "../../hooks/useIncidentEvents";
 
 export default function IncidentList() {
   const [incidents, setIncidents] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [currentPage, setCurrentPage] = useState(0);
+  const [total, setTotal] = useState(null);
   const [query, setQuery] = useState("");
   const [filters, setFilters] = useState({ status: [], priority: [], category: [], createdAt: null });
   const [tempFilters, setTempFilters] = useState(filters);
+  const [includeArchived, setIncludeArchived] = useState(false);
   const [sortBy, setSortBy] = useState("created_at");
   const [sortOrder, setSortOrder] = useState("desc");
   const [showFilterModal, setShowFilterModal] = useState({ status: false, priority: false, category: false, createdAt: false });
@@ -90,8 +93,12 @@ export default function IncidentList() {
           startDate: formattedDate,
           sort_by: sortBy,
           sort_order: sortOrder,
-          category: filters.category.length ? filters.category : undefined
+          category: filters.category.length ? filters.category : undefined,
+          include: "total",
+          includeArchived
         });
+        setTotal(data.total);
+        data = data.items;
       }
 
       setIncidents(data.map(i => ({ ...i, animate: false })));
@@ -110,9 +117,22 @@ export default function IncidentList() {
       loadIncidents();
     }, 300);
     return () => clearTimeout(handler);
-  }, [query, currentPage, filters, sortBy, sortOrder]);
+  }, [query, currentPage, filters, sortBy, sortOrder, includeArchived]);
 
-  const hasNextPage = !query && incidents.length === itemsPerPage;
+  // live updates: patch the rows on this page in place, reload only when a
+  // new incident would appear on the first page or events were missed
+  useIncidentEvents((event) => {
+    const changed = event.incident;
+    if (event.type === "resync" || (event.type === "created" && currentPage === 0 && !query)) {
+      loadIncidents();
+    } else if (event.type === "deleted" || (event.type === "archived" && !includeArchived)) {
+      setIncidents(prev => prev.filter(i => i.id !== changed.id));
+    } else if (event.type === "status_changed") {
+      setIncidents(prev => prev.map(i => i.id === changed.id ? { ...i, ...changed } : i));
+    }
+  });
+
+  const hasNextPage = !query && (total === null ? incidents.length === itemsPerPage : (currentPage + 1) * itemsPerPage < total);
 
   const handleStatusChange = async (incidentId, newStatus) => {
     try {
@@ -143,6 +163,14 @@ export default function IncidentList() {
         <div className="search-bar-container">
           <SearchBar query={query} setQuery={setQuery} inputRef={inputRef} />
         </div>
+        <label className="archived-toggle">
+          <input
+            type="checkbox"
+            checked={includeArchived}
+            onChange={(e) => { setIncludeArchived(e.target.checked); setCurrentPage(0); }}
+          />
+          Include archived
+        </label>
       </div>
 
       {loading && <p>Loading incidents...</p>}
@@ -304,7 +332,7 @@ export default function IncidentList() {
       {!query && (
         <div className="pagination">
           <button onClick={() => setCurrentPage(p => Math.max(p-1,0))} disabled={currentPage===0}>Previous</button>
-          <span> Page {currentPage+1} </span>
+          <span> Page {currentPage+1}{total !== null && ` of ${Math.max(1, Math.ceil(total / itemsPerPage))} (${total} results)`} </span>
           <button onClick={() => hasNextPage && setCurrentPage(p=>p+1)} disabled={!hasNextPage}>Next</button>
         </div>
       )}
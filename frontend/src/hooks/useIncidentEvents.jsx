@@ -0,0 +1,9 @@
+import { useEffect, useRef } from "react";
+import { subscribeIncidentEvents } from "../services/incidentEvents";
+
+export default function useIncidentEvents(onEvent) {
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+
+  useEffect(() => subscribeIncidentEvents((event) => handler.current(event)), []);
+}
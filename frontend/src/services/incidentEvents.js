@@ -0,0 +1,72 @@
+import api from "./api";
+
+// Live incident changes from /incidents/stream. One EventSource per tab is
+// shared by every component that listens, instead of refetching the list.
+const EVENT_TYPES = ["created", "status_changed", "deleted", "archived", "resync"];
+const listeners = new Set();
+let source = null;
+let connecting = false;
+
+const reconnectLater = () => {
+    setTimeout(() => {
+        if (listeners.size && !source) connect();
+    }, 5000);
+};
+
+const connect = async () => {
+    if (!localStorage.getItem("token") || connecting) return;
+
+    // the stream URL carries a short-lived ticket, never the access token
+    connecting = true;
+    let ticket;
+    try {
+        ticket = (await api.post("/incidents/stream/ticket")).data.ticket;
+    } catch {
+        reconnectLater();
+        return;
+    } finally {
+        connecting = false;
+    }
+    if (!listeners.size || source) return;
+
+    source = new EventSource(`${api.defaults.baseURL}/incidents/stream?ticket=${encodeURIComponent(ticket)}`);
+    EVENT_TYPES.forEach((type) => {
+        source.addEventListener(type, (e) => {
+            const event = JSON.parse(e.data);
+            listeners.forEach((listener) => listener(event));
+        });
+    });
+    source.onerror = () => {
+        // the browser retries on its own unless the server refused the stream
+        // (e.g. an expired ticket); reconnect later with a new ticket
+        if (source.readyState === EventSource.CLOSED) {
+            source = null;
+            reconnectLater();
+        }
+    };
+};
+
+export const subscribeIncidentEvents = (listener) => {
+    listeners.add(listener);
+    if (!source) connect();
+    return () => {
+        listeners.delete(listener);
+        if (!listeners.size && source) {
+            source.close();
+            source = null;
+        }
+    };
+};
+
+// apply a created / status_changed / deleted / archived event to a list of incidents
+// (archived incidents leave the default list)
+export const applyIncidentEvent = (incidents, event) => {
+    const incident = event.incident;
+    if (event.type === "deleted" || event.type === "archived") {
+        return incidents.filter((i) => i.id !== incident.id);
+    }
+    if (incidents.some((i) => i.id === incident.id)) {
+        return incidents.map((i) => (i.id === incident.id ? { ...i, ...incident } : i));
+    }
+    return [incident, ...incidents];
+};
@@ -11,6 +11,8 @@ export const getIncidents = async ({
   endDate,
   sort_by = "created_at",
   sort_order = "desc",
+  include,
+  includeArchived,
 } = {}) => {
   try {
     const response = await api.get("/incidents/", {
@@ -24,6 +26,8 @@ export const getIncidents = async ({
         endDate,
         sortBy: sort_by,
         sortOrder: sort_order,
+        include,
+        include_archived: includeArchived || undefined,
       },
       paramsSerializer: params => {
         const searchParams = new URLSearchParams();
@@ -1,41 +1,41 @@
 import api from "./api";
 
-export const getLast7DaysStats = async () =>{
+// All statistics come from one /stats/dashboard request. Charts mounted
+// together share the in-flight request instead of making four round trips.
+let dashboardRequest = null;
+
+export const getDashboardStats = async () =>{
+    if (!dashboardRequest) {
+        dashboardRequest = api.get("/stats/dashboard")
+            .then((response) => response.data)
+            .finally(() => {
+                dashboardRequest = null;
+            });
+    }
     try{
-        const response = await api.get("/stats/last-7-days");
-        return response.data;
+        return await dashboardRequest;
     }catch(error){
         console.error("Error fetching stats", error);
         throw error;
     }
 };
 
+export const getLast7DaysStats = async () =>{
+    const data = await getDashboardStats();
+    return data.last_7_days;
+};
+
 export const  getCategoryStats = async() =>{
-    try{
-        const response = await api.get("/stats/by-category");
-        return response.data;
-    }catch(error){
-        console.error("Error fetching stats", error);
-        throw error;
-    }
+    const data = await getDashboardStats();
+    return data.by_category;
 };
 
 export const getStatusDistribution = async() =>{
-    try{
-        const response = await api.get("/stats/status-distirubtion");
-        return response.data;
-    }catch(error){
-        console.error("Error fetching stats", error);
-        throw error;
-    }
+    const data = await getDashboardStats();
+    return data.status_distribution;
 };
 
 export const getLast3MonthsStats = async() =>{
-    try{
-        const response = await api.get("/stats/last-3-months");
-        return response.data;
-    }catch(error){
-        console.error("Error fetching data", error);
-        throw error;
-    }
-};
\ No newline at end of file
+    const data = await getDashboardStats();
+    return data.last_3_months;
+};